@@ -0,0 +1,276 @@
+"""Scaling benchmarks for argparse_class_namespace.
+
+Synthetic namespace classes are generated along several axes (fields,
+subcommands, nesting depth, groups, `Literal` sizes and `list[...]` nargs
+lengths) and measured against an equivalent hand-written argparse parser:
+
+- decorate: building the tree with `namespace()` / `group()`
+- parse: `NamespaceWrapper.parse_args` on a representative argv
+- help: rendering `--help` of the root and of the selected leaf
+- memory: peak traced allocation while building the tree
+
+Usage:
+    python benchmarks/bench_scale.py --output bench.json
+    python benchmarks/bench_scale.py --compare bench.json --threshold 1.25
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import statistics
+import tracemalloc
+import importlib.util
+from typing import Callable, Any
+
+SCENARIOS: list[dict[str, int]] = [
+    dict(fields=8, subcommands=2, depth=1, groups=1, literal=4, nargs=8),
+    dict(fields=64, subcommands=2, depth=1, groups=1, literal=4, nargs=8),
+    dict(fields=256, subcommands=2, depth=1, groups=1, literal=4, nargs=8),
+    dict(fields=8, subcommands=32, depth=1, groups=1, literal=4, nargs=8),
+    dict(fields=8, subcommands=128, depth=1, groups=1, literal=4, nargs=8),
+    dict(fields=8, subcommands=4, depth=4, groups=1, literal=4, nargs=8),
+    dict(fields=8, subcommands=2, depth=1, groups=16, literal=4, nargs=8),
+    dict(fields=8, subcommands=2, depth=1, groups=1, literal=256, nargs=8),
+    dict(fields=8, subcommands=2, depth=1, groups=1, literal=4, nargs=10_000),
+]
+
+QUICK_SCENARIOS = SCENARIOS[:1] + SCENARIOS[3:4] + SCENARIOS[-1:]
+
+_FIELD_KINDS = ('int', 'str', 'literal', 'list', 'float')
+
+def _field_lines(prefix: str, n_fields: int, literal: int) -> list[str]:
+    values = ', '.join(repr(f'v{i}') for i in range(literal))
+    lines = []
+    for i in range(n_fields):
+        kind = _FIELD_KINDS[i % len(_FIELD_KINDS)]
+        name = f'{prefix}{i}'
+        if kind == 'int':
+            lines.append(f'{name}: int = 0')
+        elif kind == 'str':
+            lines.append(f'{name}: str = ""')
+        elif kind == 'literal':
+            lines.append(f'{name}: Literal[{values}] = "v0"')
+        elif kind == 'list':
+            lines.append(f'{name}: list[int] = []')
+        else:
+            lines.append(f'{name}: float = 0.0')
+        lines.append(f'"""Help for {name}."""')
+    return lines
+
+def _indent(lines: list[str], level: int) -> list[str]:
+    return ['    ' * level + line for line in lines]
+
+def generate_source(fields: int, subcommands: int, depth: int, groups: int, literal: int, nargs: int) -> str:
+    """Returns a module with `build(namespace, group)` creating a fresh tree."""
+
+    body: list[str] = []
+    for s in range(subcommands):
+        for d in reversed(range(depth)):
+            body.append('@namespace')
+            body.append(f'class Cmd{s}_{d}:')
+            if d == depth - 1:
+                body.extend(_indent(_field_lines('f', fields, literal), 1))
+            else:
+                body.extend(_indent([f'level{d + 1} = Cmd{s}_{d + 1}', '"""Next level."""'], 1))
+    body.append('@namespace')
+    body.append('class Root:')
+    root_lines = _field_lines('r', min(fields, 4), literal)
+    for g in range(groups):
+        root_lines.append('@group')
+        root_lines.append(f'class group{g}:')
+        root_lines.extend(_indent(_field_lines(f'g{g}_', 4, literal), 1))
+    for s in range(subcommands):
+        root_lines.append(f'cmd{s} = Cmd{s}_0')
+        root_lines.append(f'"""Subcommand {s}."""')
+    body.extend(_indent(root_lines, 1))
+    body.append('return Root')
+
+    return '\n'.join([
+        'from typing import Literal',
+        '',
+        'def build(namespace, group):',
+        *_indent(body, 1),
+        '',
+    ])
+
+def leaf_argv(fields: int, subcommands: int, depth: int, groups: int, literal: int, nargs: int) -> list[str]:
+    argv = ['--r0', '1', 'cmd0'] + [f'level{d}' for d in range(1, depth)]
+    for i in range(fields):
+        kind = _FIELD_KINDS[i % len(_FIELD_KINDS)]
+        if kind == 'int':
+            argv += [f'--f{i}', '7']
+        elif kind == 'literal':
+            argv += [f'--f{i}', f'v{literal - 1}']
+        elif kind == 'list':
+            argv += [f'--f{i}', *map(str, range(nargs))]
+    return argv
+
+def _add_fields(container: Any, prefix: str, n_fields: int, literal: int):
+    values = [f'v{i}' for i in range(literal)]
+    for i in range(n_fields):
+        kind = _FIELD_KINDS[i % len(_FIELD_KINDS)]
+        name = f'{prefix}{i}'
+        help = f'Help for {name}.'
+        if kind == 'int':
+            container.add_argument(f'--{name}', type=int, default=0, help=help)
+        elif kind == 'str':
+            container.add_argument(f'--{name}', default='', help=help)
+        elif kind == 'literal':
+            container.add_argument(f'--{name}', choices=values, default='v0', help=help)
+        elif kind == 'list':
+            container.add_argument(f'--{name}', type=int, nargs='*', default=[], help=help)
+        else:
+            container.add_argument(f'--{name}', type=float, default=0.0, help=help)
+
+def build_argparse(fields: int, subcommands: int, depth: int, groups: int, literal: int, nargs: int) -> argparse.ArgumentParser:
+    """The hand-written argparse equivalent of `generate_source`."""
+
+    root = argparse.ArgumentParser()
+    _add_fields(root, 'r', min(fields, 4), literal)
+    for g in range(groups):
+        _add_fields(root.add_argument_group(f'group{g}'), f'g{g}_', 4, literal)
+    subparsers = root.add_subparsers(dest='command')
+    for s in range(subcommands):
+        parser = subparsers.add_parser(f'cmd{s}', help=f'Subcommand {s}.')
+        for d in range(1, depth):
+            parser = parser.add_subparsers(dest=f'level{d - 1}').add_parser(
+                f'level{d}', help='Next level.'
+            )
+        _add_fields(parser, 'f', fields, literal)
+    return root
+
+def _load_builder(source: str, directory: str, index: int) -> Callable:
+    name = f'_bench_scale_{index}'
+    path = os.path.join(directory, name + '.py')
+    with open(path, 'w') as f:
+        f.write(source)
+    spec = importlib.util.spec_from_file_location(name, path)
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module.build
+
+def _timeit(func: Callable[[], object], repeat: int, number: int = 1) -> dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return {'min_s': min(samples), 'median_s': statistics.median(samples)}
+
+def _peak_memory(func: Callable[[], object]) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def run_scenario(params: dict[str, int], directory: str, index: int, repeat: int) -> list[dict[str, Any]]:
+    from argparse_class_namespace import namespace, group
+
+    build = _load_builder(generate_source(**params), directory, index)
+    argv = leaf_argv(**params)
+    root = build(namespace, group)
+    baseline = build_argparse(**params)
+    leaf_path = ['cmd0'] + [f'level{d}' for d in range(1, params['depth'])]
+
+    def leaf_help(parser: argparse.ArgumentParser) -> str:
+        for name in leaf_path:
+            subparsers = next(
+                a for a in parser._actions if isinstance(a, argparse._SubParsersAction)
+            )
+            parser = subparsers.choices[name]
+        return parser.format_help()
+
+    measurements = {
+        ('decorate', 'wrapper'): lambda: build(namespace, group),
+        ('decorate', 'argparse'): lambda: build_argparse(**params),
+        ('parse', 'wrapper'): lambda: root.parse_args(argv),
+        ('parse', 'argparse'): lambda: baseline.parse_args(argv),
+        ('help', 'wrapper'): lambda: (root.parser.format_help(), leaf_help(root.parser)),
+        ('help', 'argparse'): lambda: (baseline.format_help(), leaf_help(baseline)),
+    }
+
+    results = []
+    for (metric, impl), func in measurements.items():
+        number = 1 if metric == 'decorate' else 5
+        results.append({
+            'params': params, 'metric': metric, 'impl': impl,
+            **_timeit(func, repeat, number),
+        })
+    for impl, func in (
+        ('wrapper', lambda: build(namespace, group)),
+        ('argparse', lambda: build_argparse(**params)),
+        ):
+        results.append({
+            'params': params, 'metric': 'memory', 'impl': impl,
+            'peak_bytes': _peak_memory(func),
+        })
+    return results
+
+def _result_key(result: dict[str, Any]) -> str:
+    params = ','.join(f'{k}={v}' for k, v in sorted(result['params'].items()))
+    return f"{result['metric']}/{result['impl']}/{params}"
+
+def compare(current: list[dict[str, Any]], previous: list[dict[str, Any]], threshold: float) -> list[str]:
+    previous_by_key = {_result_key(r): r for r in previous}
+    regressions = []
+    for result in current:
+        old = previous_by_key.get(_result_key(result), None)
+        if old is None or result['impl'] != 'wrapper':
+            continue
+        field = 'peak_bytes' if result['metric'] == 'memory' else 'min_s'
+        if old.get(field) and result[field] > old[field] * threshold:
+            regressions.append(
+                f'{_result_key(result)}: {old[field]:.6g} -> {result[field]:.6g}'
+                f' ({result[field] / old[field]:.2f}x)'
+            )
+    return regressions
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--quick', action='store_true', help='run a small subset of the scenarios')
+    parser.add_argument('--compare', help='previous JSON report to check for regressions')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='slowdown factor reported as a regression (default: 1.25)')
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for index, params in enumerate(QUICK_SCENARIOS if args.quick else SCENARIOS):
+            results.extend(run_scenario(params, directory, index, args.repeat))
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'timestamp': time.time(),
+        },
+        'results': results,
+    }
+    text = json.dumps(report, indent=1)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f)['results'], args.threshold)
+        for line in regressions:
+            print(f'regression: {line}', file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,3 +1,15 @@
+from typing import TYPE_CHECKING
+
 from .core import mixin
 from .core import namespace, group
+from .core.lazy import lazy_exports
 from . import core
+
+if TYPE_CHECKING:
+    from .core import set_cache_dir, save_snapshot, load_snapshot, generate_parser_module
+    from .core import Completer, CachedCompleter, cached_completer, ResponseFile, CompactList
+
+__getattr__ = lazy_exports(__name__, dict.fromkeys((
+    'set_cache_dir', 'save_snapshot', 'load_snapshot', 'generate_parser_module',
+    'Completer', 'CachedCompleter', 'cached_completer', 'ResponseFile', 'CompactList',
+), '.core'))
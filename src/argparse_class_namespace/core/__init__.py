@@ -1,7 +1,11 @@
-from typing import TypeVar, overload, Unpack, Callable
+from typing import TypeVar, overload, Unpack, Callable, TYPE_CHECKING
 import argparse
 
 from .help_formatter import DestAndTypeHelpFormatter
+from .help_cache import CachedHelpAction
+from .indexed_parser import IndexedArgumentParser
+from .compact import WrapperArgumentParser
+from .lazy import lazy_exports
 from .namespace_wrapper import (
     NamespaceWrapper,
     _resolve_namespace_options, NamespaceOptions, NamespaceOptionsPartial,
@@ -13,8 +17,52 @@ from .group_wrapper import (
     GroupWithOptions
 )
 
+if TYPE_CHECKING:
+    from .disk_cache import set_cache_dir
+    from .snapshot import save_snapshot, load_snapshot
+    from .codegen import generate_parser_module
+    from .completion import Completer, CachedCompleter, cached_completer
+    from .batch import ParseOutcome, parse_many
+    from .dispatch import DispatchOutcome
+    from .profiler import enable_profiling, disable_profiling, profile_report, write_trace
+    from .result_cache import ResultCacheInfo
+    from .sources import load_config_file
+    from .response_file import ResponseFile, ResponseFileLines
+    from .compact import CompactList
+    from .fingerprint import FrozenNamespace
+
+# imported on first use, like `daemon`
+__getattr__ = lazy_exports(__name__, {
+    'set_cache_dir': '.disk_cache',
+    'save_snapshot': '.snapshot',
+    'load_snapshot': '.snapshot',
+    'generate_parser_module': '.codegen',
+    'Completer': '.completion',
+    'CachedCompleter': '.completion',
+    'cached_completer': '.completion',
+    'ParseOutcome': '.batch',
+    'parse_many': '.batch',
+    'DispatchOutcome': '.dispatch',
+    'enable_profiling': '.profiler',
+    'disable_profiling': '.profiler',
+    'profile_report': '.profiler',
+    'write_trace': '.profiler',
+    'ResultCacheInfo': '.result_cache',
+    'load_config_file': '.sources',
+    'ResponseFile': '.response_file',
+    'ResponseFileLines': '.response_file',
+    'CompactList': '.compact',
+    'FrozenNamespace': '.fingerprint',
+})
+
 _NS_co = TypeVar('_NS_co', covariant=True, bound=object)
 
+def _new_parser(indexed: bool = False) -> argparse.ArgumentParser:
+    parser_class = IndexedArgumentParser if indexed else WrapperArgumentParser
+    parser = parser_class(add_help=False, formatter_class=DestAndTypeHelpFormatter)
+    parser._add_action(CachedHelpAction(['-h', '--help']))
+    return parser
+
 @overload
 def namespace(
     ns_type: type[_NS_co],
@@ -59,15 +107,20 @@ def namespace(
         ```
     """
 
-    parser = argparse.ArgumentParser(add_help=False, formatter_class=DestAndTypeHelpFormatter)
-    parser._add_action(argparse._HelpAction(['-h', '--help']))
-
     if ns_type is not None:
+        parser = _new_parser(partial_options.get('indexed', False))
         return NamespaceWrapper(ns_type, _resolve_namespace_options(
         NamespaceOptions(
             container=parser,
             parser=parser,
-            defaults={}
+            defaults={},
+            slots=False,
+            lazy=False,
+            config_files=[],
+            env_prefix=None,
+            result_cache=0,
+            indexed=False,
+            response_file_prefix_chars=None
         ),
         partial_options
     ))
@@ -92,11 +145,19 @@ def namespace(
         options = parent_options | partial_options
 
         if ns_type is not None:
+            parser = _new_parser(options.get('indexed', False))
             return NamespaceWrapper(ns_type, _resolve_namespace_options(
                 NamespaceOptions(
                     container=parser,
                     parser=parser,
-                    defaults={}
+                    defaults={},
+                    slots=False,
+                    lazy=False,
+                    config_files=[],
+                    env_prefix=None,
+                    result_cache=0,
+                    indexed=False,
+                    response_file_prefix_chars=None
                 ),
                 options
             ))
@@ -124,7 +185,8 @@ def group(
         return GroupWrapper(ns_type, _resolve_group_wrapper_options(
             GroupWrapperOptions(
                 container=None,
-                defaults={}
+                defaults={},
+                slots=False
             ),
             partial_options
         ))
@@ -152,7 +214,8 @@ def group(
             return GroupWrapper(ns_type, _resolve_group_wrapper_options(
                 GroupWrapperOptions(
                     container=None,
-                    defaults={}
+                    defaults={},
+                    slots=False
                 ),
                 options
             ))
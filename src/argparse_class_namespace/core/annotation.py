@@ -0,0 +1,189 @@
+import sys
+import weakref
+from collections import deque
+from functools import lru_cache
+from types import UnionType, MappingProxyType
+from typing import (
+    Protocol, runtime_checkable,
+    Callable, Mapping, NamedTuple,
+    Union, Literal, Annotated,
+    TypedDict, get_origin, get_type_hints
+)
+
+from .lazy import loaded
+from .compact import CompactList, compact_list_action
+from .converters import compile_converter
+
+@runtime_checkable
+class SupportsOriginAndArgs(Protocol):
+    __origin__: type
+    __args__: tuple['type | SupportsOriginAndArgs', ...]
+
+class ArgumentRecipe(TypedDict, total=False):
+    """The part of the `add_argument` kwargs that depends only on the annotation."""
+    nargs: int | str
+    action: Literal['store_true'] | Callable[..., object]
+    """`'store_true'` for `bool` fields, where a truthy default turns it into
+    `store_false`; an action class for `CompactList` fields."""
+    type: Callable[[str], object]
+    completer: Callable[..., object]
+
+_ANALYSIS_CACHE_SIZE = 1024
+
+_class_hints = weakref.WeakKeyDictionary[type, Mapping[str, object]]()
+
+def _resolve_each(cls: type) -> dict[str, object]:
+    # `get_type_hints` fails as a whole on one unresolvable name; resolve
+    # each annotation on its own to name the field that fails
+    module = sys.modules.get(cls.__module__, None)
+    globalns = dict(getattr(module, '__dict__', {}))
+    localns = dict(vars(cls))
+    hints = dict[str, object]()
+    for name, ann in cls.__dict__.get('__annotations__', {}).items():
+        if isinstance(ann, str):
+            try:
+                ann = eval(ann, globalns, localns)
+            except Exception as e:
+                raise NameError(
+                    f"cannot resolve the annotation {ann!r} of "
+                    f"{cls.__qualname__}.{name}: {e}"
+                ) from e
+        hints[name] = ann
+    return hints
+
+def get_class_hints(cls: type) -> Mapping[str, object]:
+    """Returns the resolved annotations of `cls` itself, memoized per class.
+
+    String annotations (`from __future__ import annotations`) are resolved
+    with `typing.get_type_hints`, keeping `Annotated` metadata. Raises
+    `NameError` naming the field when an annotation cannot be resolved,
+    e.g. a name local to the function defining the class.
+    """
+
+    hints = _class_hints.get(cls, None)
+    if hints is None:
+        own = cls.__dict__.get('__annotations__', {})
+        try:
+            resolved = get_type_hints(cls, include_extras=True)
+        except Exception:
+            resolved = _resolve_each(cls)
+        hints = _class_hints[cls] = MappingProxyType({
+            name: resolved.get(name, ann) for name, ann in own.items()
+        })
+    return hints
+
+class _LiteralValue(NamedTuple):
+    value: object
+
+def _analyze(ann: object) -> ArgumentRecipe:
+
+    recipe = ArgumentRecipe()
+    from_response_file = False
+    compact: CompactList | None = None
+
+    if get_origin(ann) is Annotated:
+        # `Completer()` or `ResponseFile()` metadata means its module was imported
+        completion, response_file = loaded('completion'), loaded('response_file')
+        for metadata in ann.__metadata__: # type: ignore
+            if completion is not None and isinstance(metadata, completion.Completer):
+                recipe['completer'] = metadata.func
+            elif response_file is not None and isinstance(metadata, response_file.ResponseFile):
+                from_response_file = True
+            elif isinstance(metadata, CompactList):
+                compact = metadata
+        ann = ann.__origin__ # type: ignore
+
+    stack: deque[object | type | SupportsOriginAndArgs]
+    if isinstance(ann, SupportsOriginAndArgs):
+        if ann.__origin__ is list:
+            stack = deque(ann.__args__)
+            recipe['nargs'] = '*'
+        elif ann.__origin__ is tuple:
+            stack = deque(ann.__args__)
+            recipe['nargs'] = len(ann.__args__)
+        else:
+            stack = deque([ann])
+    else:
+        stack = deque([ann])
+
+    bool_found = False
+    # constructor -> accepted Literal values, or None when any value is accepted
+    allowed = dict[type, set[object] | None]()
+
+    while stack:
+        current = stack.popleft()
+
+        if isinstance(current, SupportsOriginAndArgs):
+            if current.__origin__ is Literal:
+                stack.extend(_LiteralValue(value) for value in current.__args__)
+            elif current.__origin__ is Union:
+                stack.extend(current.__args__)
+            else:
+                stack.append(current.__origin__)
+        elif isinstance(current, UnionType):
+            stack.extend(current.__args__)
+        elif isinstance(current, type):
+            if issubclass(current, bool):
+                bool_found = True
+            else:
+                allowed[current] = None
+        elif isinstance(current, _LiteralValue):
+            if not isinstance(current.value, str | int | bool):
+                raise TypeError(f"Unsupported Literal value: {current.value!r}")
+            values = allowed.setdefault(type(current.value), set())
+            if values is not None:
+                values.add(current.value)
+        elif isinstance(current, str):
+            # a string outside `Literal` is an annotation that was never resolved
+            raise TypeError(f"Unresolved type annotation: {current!r}")
+        else:
+            raise TypeError(f"Unsupported type annotation: {current}")
+
+    if bool_found:
+        recipe['action'] = 'store_true'
+    elif allowed:
+        recipe['type'] = compile_converter(tuple(
+            (t, None if values is None else frozenset(values))
+            for t, values in allowed.items()
+        ))
+    else:
+        recipe['type'] = str
+
+    if from_response_file:
+        if recipe.get('nargs', None) != '*' or recipe.get('type', None) is not str:
+            raise TypeError(f"ResponseFile() applies to list[str] fields, got {ann}")
+        del recipe['nargs']
+        from .response_file import response_file
+        recipe['type'] = response_file
+
+    if compact is not None:
+        element_types = [t for t, values in allowed.items() if values is None]
+        if (
+            recipe.get('nargs', None) != '*' or bool_found
+            or len(allowed) != 1 or len(element_types) != 1
+        ):
+            raise TypeError(f"CompactList() applies to list fields of a single type, got {ann}")
+        (element_type,) = element_types
+        recipe['action'] = compact_list_action(compact.typecode_for(element_type))
+        recipe['type'] = element_type
+
+    return recipe
+
+@lru_cache(maxsize=_ANALYSIS_CACHE_SIZE)
+def _analyze_cached(ann: object, ann_repr: str) -> ArgumentRecipe:
+    return _analyze(ann)
+
+def analyze_annotation(ann: object) -> ArgumentRecipe:
+    """Returns the argparse kwargs recipe for a resolved annotation.
+
+    Results are kept in a bounded cache keyed by the annotation, so the
+    same field types across classes are analyzed once. The returned dict
+    is a fresh copy and may be modified.
+    """
+    try:
+        hash(ann)
+    except TypeError:
+        return _analyze(ann)
+    # unions compare equal regardless of order, but their order decides
+    # which constructor is tried first, so the repr is part of the key
+    return _analyze_cached(ann, repr(ann)).copy()
@@ -0,0 +1,446 @@
+# The parsing runtime of modules written by `codegen.generate_parser_module`.
+# This file is copied into every generated module as is, followed by the
+# tables describing one command line (`_SOURCE`, `_FILES`, `_CONVERTERS`,
+# `_LEVELS` and the record classes), so it must not import this package:
+# it only runs argparse's algorithm on the common cases and hands anything
+# else to the real wrapper.
+
+import os
+import sys
+
+class _Fallback(Exception):
+    """Raised when argparse itself has to handle the arguments."""
+
+_MISSING = object()
+
+_ZERO_OR_MORE = '*'
+_ONE_OR_MORE = '+'
+_OPTIONAL = '?'
+_PARSER = 'A...'
+
+class _Spec:
+    # one argparse action; `kind` is 'store', 'const', 'compact', 'parser' or
+    # 'fallback', and `arg` the constant, the typecode or the subcommands
+    __slots__ = ('dest', 'kind', 'nargs', 'convert', 'arg', 'default')
+
+    def __init__(self, dest, kind, nargs=None, convert=None, arg=None, default=None):
+        self.dest = dest
+        self.kind = kind
+        self.nargs = nargs
+        self.convert = convert
+        self.arg = arg
+        self.default = default
+
+class _Level:
+    # one parser: the root or a subcommand; `required` holds `_Spec`s
+    __slots__ = ('path', 'options', 'positionals', 'defaults', 'required', 'table')
+
+    def __init__(self, path, options, positionals, defaults, required, table):
+        self.path = path
+        self.options = options
+        self.positionals = positionals
+        self.defaults = defaults
+        self.required = required
+        self.table = table
+
+class _Lazy:
+    # a default that is not a literal, read from the real parser on use
+    __slots__ = ('level', 'dest')
+
+    def __init__(self, level, dest):
+        self.level = level
+        self.dest = dest
+
+class _Ref:
+    # a converter imported on first use
+    __slots__ = ('module', 'qualname', '_obj')
+
+    def __init__(self, module, qualname):
+        self.module = module
+        self.qualname = qualname
+        self._obj = None
+
+    def __call__(self, value):
+        if self._obj is None:
+            self._obj = _import(self.module, self.qualname)
+        return self._obj(value)
+
+class _Union:
+    # `converters.LiteralConverter` and `converters.UnionConverter`
+    __slots__ = ('steps',)
+
+    def __init__(self, steps):
+        self.steps = steps
+
+    def __call__(self, value):
+        for convert, values in self.steps:
+            try:
+                result = convert(value)
+            except (TypeError, ValueError):
+                continue
+            if values is None or result in values:
+                return result
+        raise ValueError(value)
+
+def _import(module_name, qualname):
+    # converters like `pathlib.Path` are imported without this package
+    __import__(module_name)
+    obj = sys.modules[module_name]
+    for name in qualname.split('.'):
+        obj = getattr(obj, name)
+    if type(obj).__module__.startswith('argparse_class_namespace.'):
+        # a wrapped class; its module has loaded the package anyway
+        return _resolve(module_name, qualname)
+    return obj
+
+def _resolve(module_name, qualname):
+    from argparse_class_namespace.core.pickling import resolve, _is_wrapper
+    obj = resolve(module_name, qualname)
+    return obj.T if _is_wrapper(obj) else obj
+
+_wrapper = None
+
+def _root_wrapper():
+    global _wrapper
+    if _wrapper is None:
+        from argparse_class_namespace.core.pickling import resolve_wrapper
+        _wrapper = resolve_wrapper(*_SOURCE)
+    return _wrapper
+
+def _level_parser(index):
+    wrapper = _root_wrapper()
+    for bindname in _LEVELS[index].path:
+        wrapper = wrapper._subnamespaces[bindname]
+    return wrapper.parser
+
+def _value(value):
+    if type(value) is _Lazy:
+        return _level_parser(value.level).get_default(value.dest)
+    if type(value) in (list, dict, set):
+        # argparse hands out the default itself; keep the tables unchanged
+        return value.copy()
+    return value
+
+_fresh = None
+
+def _is_fresh():
+    # the tables describe the modules as they were at generation time
+    global _fresh
+    if _fresh is None:
+        _fresh = True
+        for path, (mtime_ns, size) in _FILES.items():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                _fresh = False
+                break
+            if stat.st_mtime_ns != mtime_ns or stat.st_size != size:
+                _fresh = False
+                break
+    return _fresh
+
+def _is_negative_number(arg):
+    # argparse's '^-\d+$|^-\d*\.\d+$'
+    body = arg[1:]
+    if body.isdigit() and body.isascii():
+        return True
+    head, dot, tail = body.partition('.')
+    return bool(dot) and (not head or head.isdigit() and head.isascii()) and tail.isdigit() and tail.isascii()
+
+def _bounds(nargs):
+    if nargs is None:
+        return 1, 1
+    if nargs == _OPTIONAL:
+        return 0, 1
+    if nargs == _ZERO_OR_MORE:
+        return 0, sys.maxsize
+    if nargs == _ONE_OR_MORE:
+        return 1, sys.maxsize
+    if type(nargs) is int:
+        return nargs, nargs
+    raise _Fallback
+
+def _run_length(pattern, start):
+    end = start
+    while end < len(pattern) and pattern[end] == 'A':
+        end += 1
+    return end - start
+
+def _match(specs, pattern, start):
+    # argparse's regular expressions, matched from `start` with backtracking
+    if not specs:
+        return []
+    spec = specs[0]
+    if spec.nargs == _PARSER:
+        if start >= len(pattern) or pattern[start] != 'A':
+            return None
+        counts = range(len(pattern) - start, 0, -1)
+    else:
+        low, high = _bounds(spec.nargs)
+        counts = range(min(high, _run_length(pattern, start)), low - 1, -1)
+    for count in counts:
+        rest = _match(specs[1:], pattern, start + count)
+        if rest is not None:
+            return [count, *rest]
+    return None
+
+def _match_partial(specs, pattern):
+    for i in range(len(specs), 0, -1):
+        counts = _match(specs[:i], pattern, 0)
+        if counts is not None:
+            return counts
+    return []
+
+def _convert(spec, arg):
+    if spec.convert is None:
+        return arg
+    try:
+        return spec.convert(arg)
+    except Exception:
+        # argparse reports it, or raises it itself
+        raise _Fallback
+
+def _action_value(spec, args, is_positional):
+    kind = spec.kind
+    if kind == 'const':
+        return spec.arg
+    if kind == 'compact':
+        from array import array
+        try:
+            return array(spec.arg, map(spec.convert, args))
+        except Exception:
+            raise _Fallback
+    if kind != 'store':
+        raise _Fallback
+    nargs = spec.nargs
+    if nargs is None:
+        return _convert(spec, args[0])
+    if nargs == _OPTIONAL:
+        if args:
+            return _convert(spec, args[0])
+        value = spec.default if is_positional else spec.arg
+        return _convert(spec, value) if isinstance(value, str) else value
+    if not args and nargs == _ZERO_OR_MORE and is_positional:
+        return _value(spec.default) if spec.default is not None else []
+    return [_convert(spec, arg) for arg in args]
+
+def _parse_level(index, args):
+    """Returns the index of the selected level and the values parsed for it."""
+
+    level = _LEVELS[index]
+    options = level.options
+    values = dict(level.defaults)
+
+    pattern = []
+    found = {}
+    for i, arg in enumerate(args):
+        if arg == '--':
+            raise _Fallback
+        if not arg or arg[0] != '-' or arg == '-':
+            pattern.append('A')
+            continue
+        spec = options.get(arg, None)
+        if spec is not None:
+            found[i] = (spec, None)
+            pattern.append('O')
+            continue
+        if arg.startswith('--'):
+            name, eq, explicit = arg.partition('=')
+            spec = options.get(name, None) if eq else None
+            if spec is not None:
+                found[i] = (spec, explicit)
+                pattern.append('O')
+                continue
+            if any(option.startswith(name) for option in options):
+                # an abbreviation
+                raise _Fallback
+            if ' ' in arg:
+                pattern.append('A')
+                continue
+        elif _is_negative_number(arg):
+            pattern.append('A')
+            continue
+        else:
+            raise _Fallback
+        found[i] = (None, None)
+        pattern.append('O')
+    pattern = ''.join(pattern)
+
+    seen = set()
+    selected = [index, values]
+    positionals = list(level.positionals)
+
+    def take(spec, spec_args, is_positional):
+        seen.add(spec)
+        if spec.kind == 'parser':
+            sub = spec.arg.get(spec_args[0], None)
+            if sub is None:
+                raise _Fallback
+            selected[:] = _parse_level(sub, spec_args[1:])
+            return
+        values[spec.dest] = _action_value(spec, spec_args, is_positional)
+
+    def consume_optional(start):
+        spec, explicit = found[start]
+        if spec is None:
+            raise _Fallback
+        if explicit is not None:
+            if spec.kind == 'const' or spec.nargs not in (None, _OPTIONAL, _ZERO_OR_MORE, _ONE_OR_MORE, 1):
+                raise _Fallback
+            take(spec, [explicit], False)
+            return start + 1
+        if spec.kind == 'const':
+            take(spec, [], False)
+            return start + 1
+        low, high = _bounds(spec.nargs)
+        count = min(high, _run_length(pattern, start + 1))
+        if count < low:
+            raise _Fallback
+        take(spec, args[start + 1:start + 1 + count], False)
+        return start + 1 + count
+
+    def consume_positionals(start):
+        counts = _match_partial(positionals, pattern[start:])
+        for spec, count in zip(positionals, counts):
+            take(spec, args[start:start + count], True)
+            start += count
+        del positionals[:len(counts)]
+        return start
+
+    option_indices = sorted(found)
+    max_option = option_indices[-1] if option_indices else -1
+    start = 0
+    while start <= max_option:
+        next_option = min(i for i in option_indices if i >= start)
+        if start != next_option:
+            end = consume_positionals(start)
+            if end > start:
+                start = end
+                continue
+            start = end
+        if start not in found:
+            # arguments argparse leaves unrecognized
+            raise _Fallback
+        start = consume_optional(start)
+    if consume_positionals(start) != len(args):
+        raise _Fallback
+
+    for required in level.required:
+        if required not in seen:
+            raise _Fallback
+    return selected
+
+def _build(index, values):
+    record, groups, fields, parents = _LEVELS[index].table
+    defaults = _LEVELS[index].defaults
+    ns = record()
+    targets = [ns]
+    for gname, group in groups:
+        gns = group()
+        setattr(ns, gname, gns)
+        targets.append(gns)
+    for dest, slot, fallback in fields:
+        value = values.get(dest, _MISSING)
+        if value is _MISSING:
+            value = fallback
+        if value is _MISSING:
+            continue
+        if value is fallback or value is defaults.get(dest, _MISSING):
+            value = _value(value)
+        setattr(targets[slot], dest, value)
+    for bindname, parent in parents:
+        parent_ns = parent()
+        setattr(parent_ns, bindname, ns)
+        ns = parent_ns
+    return ns
+
+class _Record:
+    """A parsed result in the shape of the wrapped class, without importing it.
+
+    Fields that were not set read as the class defaults of the wrapped
+    class, and methods and properties of the wrapped class are looked up
+    on first use. Pickling or `to_result` turn records into results of the
+    real wrapper.
+    """
+
+    __slots__ = ()
+
+    # module, qualname, literal class defaults, attribute names that hold groups or subcommands
+    __aot_type__ = ('', '', {}, frozenset())
+
+    def __getattr__(self, name):
+        module_name, qualname, defaults, nested = self.__aot_type__
+        if name in nested:
+            return None
+        if name in defaults:
+            value = defaults[name]
+            return value.copy() if type(value) in (list, dict, set) else value
+        if name.startswith('__') and name.endswith('__'):
+            raise AttributeError(name)
+        ns_type = _resolve(module_name, qualname)
+        for klass in ns_type.__mro__:
+            if name in vars(klass):
+                member = vars(klass)[name]
+                break
+        else:
+            raise AttributeError(f"'{qualname}' object has no attribute '{name}'")
+        if isinstance(member, classmethod):
+            return getattr(ns_type, name)
+        if hasattr(type(member), '__get__'):
+            return member.__get__(self, type(self))
+        return member
+
+    def _set_items(self):
+        items = []
+        for name in self.__slots__:
+            try:
+                items.append((name, object.__getattribute__(self, name)))
+            except AttributeError:
+                pass
+        return items
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self._set_items() == other._set_items()
+
+    __hash__ = None
+
+    def __repr__(self):
+        return (
+            f'{type(self).__name__}('
+            + ', '.join(f'{name}={value!r}' for name, value in self._set_items())
+            + ')'
+        )
+
+    def __reduce__(self):
+        from argparse_class_namespace.core.slotted import _rebuild
+        module_name, qualname, _, _ = self.__aot_type__
+        return (_rebuild, (module_name, qualname, dict(self._set_items())))
+
+def to_result(obj):
+    """Returns a result of the real wrapper with the same fields as the record `obj`."""
+    if not isinstance(obj, _Record):
+        return obj
+    from argparse_class_namespace.core.slotted import _rebuild
+    module_name, qualname, _, _ = obj.__aot_type__
+    return _rebuild(module_name, qualname, {
+        name: to_result(value) for name, value in obj._set_items()
+    })
+
+def parse_args(args=None):
+    """Parses `args` (default: `sys.argv[1:]`) into records of the wrapped classes.
+
+    Records have the fields of the wrapped classes but are not instances of
+    them: `isinstance(record, Cli.T)` is False until `to_result(record)`.
+    `--help`, shell completion, errors and anything beyond plain options,
+    positionals and subcommands are handed to the real wrapper, which
+    returns its own results.
+    """
+    args = sys.argv[1:] if args is None else list(args)
+    if '_ARGCOMPLETE' in os.environ or not _is_fresh():
+        return _root_wrapper().parse_args(args)
+    try:
+        return _build(*_parse_level(0, args))
+    except _Fallback:
+        return _root_wrapper().parse_args(args)
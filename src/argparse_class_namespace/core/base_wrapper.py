@@ -1,15 +1,22 @@
 from typing import (
     TypeVar, Generic, Protocol, runtime_checkable,
     Callable, Iterable,
-    Union, Literal, Unpack, Concatenate,
+    Union, Literal, Unpack, Concatenate, Annotated,
     TypedDict, DefaultDict,
-    Self, Any, overload
+    Self, Any, overload, get_origin, TYPE_CHECKING
 )
 from types import UnionType
-from itertools import chain
 import argparse
+import _thread
 
-from .variable_docstring import get_variable_docstrings
+from .fields import ClassFields, is_dunder, field_tables, field_owners, collect_attrnames, collect_docstrings
+from .annotation import SupportsOriginAndArgs, get_class_hints, analyze_annotation
+from .slotted import make_slotted_type
+from .lazy import loaded
+from . import pickling, profiler, help_cache
+
+if TYPE_CHECKING:
+    from . import snapshot
 
 _NS = TypeVar('_NS', bound=object)
 _NS_co = TypeVar('_NS_co', covariant=True, bound=object)
@@ -17,6 +24,11 @@ _NS_co = TypeVar('_NS_co', covariant=True, bound=object)
 _T = TypeVar('_T', bound=object)
 _O = TypeVar('_O', bound=object)
 
+# held while a wrapper tree is built or changed, so that threads parsing
+# with a lazy tree never see half-built parsers; `_thread` because
+# importing `threading` costs more than this whole package
+_tree_lock = _thread.RLock()
+
 def _return_bool(value: bool) -> bool:
     return value
 
@@ -34,9 +46,27 @@ class AddArgumentKwargs(TypedDict, total=False):
     dest: str
     nargs: int | str
     choices: list[object]
-    action: str
+    action: str | Callable[..., argparse.Action]
     type: type | Callable[[str], object]
     help: str | None
+    completer: Callable[..., object]
+
+def _add_argument(
+    container: ArgumentAddable,
+    args: Iterable[str],
+    kwargs: AddArgumentKwargs
+    ) -> Any:
+    if isinstance(container, DummyContainer):
+        # replayed through this function once the group is bound
+        return container.add_argument(*args, **kwargs)
+    help_cache.invalidate()
+    kwargs = kwargs.copy()
+    completer = kwargs.pop('completer', None)
+    action = container.add_argument(*args, **kwargs)
+    if completer is not None and action is not None:
+        # read by argcomplete
+        action.completer = completer
+    return action
 
 class AddWrapperKwargs(TypedDict, total=False):
     pass
@@ -44,41 +74,22 @@ class AddWrapperKwargs(TypedDict, total=False):
 class WrapperOptions(TypedDict):
     container: argparse.ArgumentParser | argparse._ArgumentGroup | None
     defaults: dict[str, object]
+    slots: bool
 class WrapperOptionsPartial(TypedDict, total=False):
     container: argparse.ArgumentParser | argparse._ArgumentGroup | None
     defaults: dict[str, object]
-
-@runtime_checkable
-class SupportsOriginAndArgs(Protocol):
-    __origin__: type
-    __args__: tuple['type | SupportsOriginAndArgs', ...]
+    slots: bool
 
 class BaseWrapper(Generic[_NS_co]):
 
-    class _Sentinel:
-        def __eq__(self, other): return True
-    _allow_any_value = _Sentinel()
-
     @staticmethod
     def _is_dunder(attrname: str) -> bool:
-        return attrname.startswith('__') and attrname.endswith('__')
+        return is_dunder(attrname)
 
     @staticmethod
     def _get_attrnames(type_: type) -> list[str]:
-
-        annotations_keys = type_.__annotations__.keys()
-        dict_keys = type_.__dict__.keys()
-        
-        ordered_keys = {
-            k: i for i, k in enumerate(annotations_keys)
-        } | {
-            k: i for i, k in enumerate(dict_keys, start=len(annotations_keys))
-        }
-
-        return sorted(
-            (k for k in annotations_keys | dict_keys if not BaseWrapper._is_dunder(k)),
-            key=lambda k: ordered_keys[k]
-        )
+        # fields of base classes come first, see `fields.collect_attrnames`
+        return collect_attrnames(type_)
 
     def _bind(self, bindname: str, parent: 'BaseWrapper'):
         raise NotImplementedError(
@@ -103,80 +114,59 @@ class BaseWrapper(Generic[_NS_co]):
         attrname: str
         ) -> tuple[list[str], AddArgumentKwargs]:
 
+        annotated, assigned, documented = field_owners(field_tables(self._ns_co_type), attrname)
+        # kept on the class defining the field, for every namespace inheriting it
+        owner = annotated or assigned
+        if owner is None:
+            return self._analyze_field(attrname, None, None, documented)
+        key = (attrname, assigned, documented)
+        prepared = owner.arguments.get(key, None)
+        if prepared is None:
+            prepared = owner.arguments[key] = self._analyze_field(
+                attrname, annotated, assigned, documented
+            )
+
+        args, kwargs = prepared
+        if 'completer' not in kwargs:
+            completer = getattr(self._ns_co_type, '__completers__', {}).get(attrname, None)
+            if completer is not None:
+                kwargs = AddArgumentKwargs(kwargs, completer=completer)
+        return args, kwargs
+
+    @staticmethod
+    def _analyze_field(
+        attrname: str,
+        annotated: ClassFields | None,
+        assigned: ClassFields | None,
+        documented: ClassFields | None
+        ) -> tuple[list[str], AddArgumentKwargs]:
+
         kwargs: AddArgumentKwargs = {}
 
-        if attrname in self._ns_co_type.__dict__:
+        if assigned is not None:
             _name_or_flag = '--' + attrname.replace('_', '-')
-            kwargs['default'] = self._ns_co_type.__dict__[attrname]
+            kwargs['default'] = assigned.cls.__dict__[attrname]
             if _name_or_flag != attrname:
                 kwargs['dest'] = attrname
         else:
             _name_or_flag = attrname.replace('-', '_')
 
-        ann = self._ns_co_type.__annotations__.get(attrname, str)
-
-        stack: list[object | type | SupportsOriginAndArgs] 
-        if isinstance(ann, SupportsOriginAndArgs):
-            if ann.__origin__ is list:
-                stack = list(ann.__args__)
-                kwargs['nargs'] = '*'
-            elif ann.__origin__ is tuple:
-                stack = list(ann.__args__)
-                kwargs['nargs'] = len(ann.__args__)
-            else:
-                stack = [ann]
-        else:
-            stack = [ann]
-
-        bool_found = False
-        allowed = DefaultDict(list[object])
+        hints = get_class_hints(annotated.cls) if annotated is not None else {}
+        recipe = analyze_annotation(hints.get(attrname, str))
 
-        while stack:
-            current = stack.pop(0)
-
-            if isinstance(current, SupportsOriginAndArgs):
-                if current.__origin__ is Union or current.__origin__ is Literal:
-                    stack.extend(current.__args__)
-                else:
-                    stack.append(current.__origin__)
-            elif isinstance(current, UnionType):
-                stack.extend(current.__args__)
-            elif isinstance(current, type):
-                if issubclass(current, bool):
-                    bool_found = True
-                else:
-                    allowed[current].append(self._allow_any_value)
-            elif isinstance(current, str | int | bool):
-                allowed[type(current)].append(current)
-            else:
-                raise TypeError(f"Unsupported type annotation: {current}")
-
-        choices = list(chain.from_iterable(allowed.values()))
-        if bool_found:
+        if recipe.get('action', None) == 'store_true':
             kwargs['action'] = 'store_false' if kwargs.get('default', None) else 'store_true'
             del kwargs['default']
-        elif self._allow_any_value not in choices:
-            kwargs['choices'] = choices
-        elif allowed:
-            def _type(value_string: str):
-                errors: list[TypeError | ValueError] = []
-                for t, a in allowed.items():
-                    try:
-                        value = t(value_string)
-                    except (TypeError, ValueError) as e:
-                        errors.append(e)
-                        continue
-                    if self._allow_any_value not in a or value in a:
-                        return value
-                raise TypeError(
-                    f"Value '{value_string}' does not match any of the allowed types: "
-                    f"{', '.join(str(t) for t in allowed.keys())}. Errors: {errors}"
-                )
-            kwargs['type'] = _type
-        else:
-            kwargs['type'] = str
+        elif 'action' in recipe:
+            kwargs['action'] = recipe['action']
+        for key in ('nargs', 'type'):
+            if key in recipe:
+                kwargs[key] = recipe[key]
 
-        kwargs['help'] = self._docstrings.get(attrname, None)
+        kwargs['help'] = documented.docstrings[attrname] if documented is not None else None
+        completer = recipe.get('completer', None)
+        if completer is not None:
+            kwargs['completer'] = completer
 
         return [_name_or_flag], kwargs
 
@@ -186,21 +176,68 @@ class BaseWrapper(Generic[_NS_co]):
         options: WrapperOptions
         ):
 
-        self._options = options
-        self._default_keys = set[str]()
-
-        self._ns_co_type = ns_type
-        self._attrnames = self._get_attrnames(ns_type)
-        self._docstrings = get_variable_docstrings(ns_type)
-
-        self._parent: 'BaseWrapper | None' = None
-        self._bindname: str | None = None
-        self._dummy_container = DummyContainer()
-
-        self._subparsers: argparse._SubParsersAction[argparse.ArgumentParser] | None = None
-        self._argument_groups = dict[str, 'BaseWrapper']()
-
-        self._register_namespace(ns_type)
+        with profiler.phase('decorate', ns_type):
+            self._options = options
+            self._default_keys = set[str]()
+
+            self._ns_co_type = ns_type
+            pickling.register(ns_type)
+            self._attrnames: list[str] = []
+            self._docstrings: dict[str, str] = {}
+            self._prepared_args = dict[str, tuple[list[str], AddArgumentKwargs]]()
+
+            self._parent: 'BaseWrapper | None' = None
+            self._bindname: str | None = None
+            self._dummy_container = DummyContainer()
+
+            self._subparsers: argparse._SubParsersAction[argparse.ArgumentParser] | None = None
+            self._argument_groups = dict[str, 'BaseWrapper']()
+            self._subnamespaces = dict[str, 'BaseWrapper']()
+
+            self._slotted_type: type | None = None
+
+            self._built = False
+            self._complete = False
+            self._frozen = False
+            if not self._is_lazy():
+                self._build()
+
+    def _is_lazy(self) -> bool:
+        return False
+
+    def _build(self):
+        if self._complete:
+            return
+        with _tree_lock:
+            # `_built` is set first, so nested calls from this thread return early
+            if self._built:
+                return
+            self._built = True
+
+            with profiler.phase('build', self._ns_co_type):
+                self._attrnames = self._get_attrnames(self._ns_co_type)
+
+                # recipes only exist once `load_snapshot` imported the module
+                snapshot = loaded('snapshot')
+                recipe = None if snapshot is None else snapshot.lookup_recipe(self._ns_co_type)
+                if recipe is not None and recipe['attrnames'] == self._attrnames:
+                    self._docstrings = dict(recipe['docstrings'])
+                    self._prepared_args = dict(recipe['arguments'])
+                else:
+                    with profiler.phase('docstrings', self._ns_co_type):
+                        self._docstrings = collect_docstrings(self._ns_co_type)
+
+                self._register_namespace(self._ns_co_type)
+            self._complete = True
+
+    def _recipe(self) -> 'snapshot.WrapperRecipe':
+        from .snapshot import WrapperRecipe
+        self._build()
+        return WrapperRecipe(
+            attrnames=list(self._attrnames),
+            docstrings=dict(self._docstrings),
+            arguments=dict(self._prepared_args),
+        )
 
     def _register_namespace(self, ns_type: type): # call once
 
@@ -229,9 +266,11 @@ class BaseWrapper(Generic[_NS_co]):
             if is_continue:
                 continue
             else:
-                add_argument_args.append(
-                    self._prepare_arg(attrname)
-                )
+                prepared = self._prepared_args.get(attrname, None)
+                if prepared is None:
+                    with profiler.phase('prepare_arg', self._ns_co_type):
+                        prepared = self._prepared_args[attrname] = self._prepare_arg(attrname)
+                add_argument_args.append(prepared)
 
         for w_type, w_args in add_wrapper_args.items():
             for inst, args, kwargs in w_args:
@@ -243,7 +282,7 @@ class BaseWrapper(Generic[_NS_co]):
             self._subparsers.required = True
                 
         for args, kwargs in add_argument_args:
-            self.argument_addable_object.add_argument(*args, **kwargs)
+            _add_argument(self.argument_addable_object, args, kwargs)
 
     def add_wrapper(self, target: 'BaseWrapper', *args, **kwargs):
         raise NotImplementedError(
@@ -263,8 +302,23 @@ class BaseWrapper(Generic[_NS_co]):
         return self._ns_co_type
     @property
     def attrnames(self) -> list[str]:
+        self._build()
         return self._attrnames
     @property
+    def result_type(self) -> type[_NS_co]:
+        """The type parse results are created as: the wrapped class, or its
+        generated `__slots__` sibling when the `slots` option is set."""
+        if not self._options.get('slots', False):
+            return self._ns_co_type
+        fieldnames = tuple(dict.fromkeys((*self.attrnames, *sorted(self.default_keys))))
+        slotted_type = self._slotted_type
+        if slotted_type is None or slotted_type.__slots__ != fieldnames:
+            with _tree_lock:
+                slotted_type = self._slotted_type
+                if slotted_type is None or slotted_type.__slots__ != fieldnames:
+                    slotted_type = self._slotted_type = make_slotted_type(self, fieldnames)
+        return slotted_type
+    @property
     def container(self) -> argparse.ArgumentParser | argparse._ArgumentGroup:
         container = self._options['container']
         if container is None:
@@ -298,6 +352,18 @@ class BaseWrapper(Generic[_NS_co]):
             f"{self.__class__.__name__} does not implement __get__"
         )
 
+    def _check_mutable(self, what: str):
+        if self._frozen:
+            raise RuntimeError(
+                f"{self._ns_co_type.__qualname__} is frozen; call {what} before freeze()"
+            )
+
     def set_defaults(self, **kwargs: object):
-        self._default_keys.update(kwargs.keys())
-        return self.container.set_defaults(**kwargs)
+        self._check_mutable('set_defaults')
+        with _tree_lock:
+            help_cache.invalidate()
+            fingerprint = loaded('fingerprint')
+            if fingerprint is not None:
+                fingerprint.forget(self)
+            self._default_keys.update(kwargs.keys())
+            return self.container.set_defaults(**kwargs)
@@ -0,0 +1,151 @@
+import io
+import contextlib
+from collections import deque
+from itertools import islice
+from typing import (
+    TypeVar, Generic, NamedTuple, TypedDict, Unpack,
+    Iterable, Iterator, Sequence, TYPE_CHECKING
+)
+
+from . import pickling
+
+if TYPE_CHECKING:
+    from .namespace_wrapper import NamespaceWrapper
+
+_NS = TypeVar('_NS', bound=object)
+
+class ParseOutcome(NamedTuple, Generic[_NS]):
+    index: int
+    """Position of the argument vector in the input."""
+    argv: Sequence[str]
+    result: _NS | None
+    """The parsed namespace, or None if parsing failed."""
+    error: BaseException | None
+    """`SystemExit` raised by argparse, or the exception raised while parsing."""
+    message: str
+    """What argparse wrote to stderr for this argument vector."""
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+class ParseManyOptions(TypedDict):
+    processes: int | None
+    chunksize: int
+class ParseManyOptionsPartial(TypedDict, total=False):
+    processes: int | None
+    chunksize: int
+def _resolve_parse_many_options(full: ParseManyOptions, partial: ParseManyOptionsPartial) -> ParseManyOptions:
+    options = full.copy()
+    options.update(partial)
+    return options
+
+def _parse_chunk(
+    wrapper: 'NamespaceWrapper[_NS]',
+    chunk: list[tuple[int, Sequence[str]]]
+    ) -> list[ParseOutcome[_NS]]:
+
+    outcomes = list[ParseOutcome[_NS]]()
+    stderr = io.StringIO()
+    with contextlib.redirect_stderr(stderr):
+        for index, argv in chunk:
+            try:
+                # response files and the result cache apply as in `parse_args`
+                result = wrapper._materialize_values(wrapper._parse_values(argv, complete=False))
+            except (SystemExit, Exception) as e:
+                outcomes.append(ParseOutcome(index, argv, None, e, stderr.getvalue()))
+            else:
+                outcomes.append(ParseOutcome(index, argv, result, None, stderr.getvalue()))
+            stderr.seek(0)
+            stderr.truncate()
+    return outcomes
+
+def _chunks(
+    argvs: Iterable[Sequence[str]],
+    chunksize: int
+    ) -> Iterator[list[tuple[int, Sequence[str]]]]:
+    indexed = enumerate(argvs)
+    while chunk := list(islice(indexed, chunksize)):
+        yield chunk
+
+_worker_wrapper: 'NamespaceWrapper | None' = None
+
+def _init_worker(module_name: str, qualname: str):
+    global _worker_wrapper
+    _worker_wrapper = pickling.resolve_wrapper(module_name, qualname) # type: ignore
+    _worker_wrapper._build()
+
+def _parse_chunk_in_worker(chunk: list[tuple[int, Sequence[str]]]) -> list[ParseOutcome]:
+    import pickle
+    if _worker_wrapper is None:
+        raise RuntimeError("Worker was not initialized")
+    outcomes = _parse_chunk(_worker_wrapper, chunk)
+    for i, outcome in enumerate(outcomes):
+        if outcome.error is None or isinstance(outcome.error, SystemExit):
+            continue
+        try:
+            pickle.dumps(outcome.error)
+        except Exception:
+            outcomes[i] = outcome._replace(
+                error=RuntimeError(f'{type(outcome.error).__name__}: {outcome.error}')
+            )
+    return outcomes
+
+def parse_many(
+    wrapper: 'NamespaceWrapper[_NS]',
+    argvs: Iterable[Sequence[str]],
+    /,
+    **partial_options: Unpack[ParseManyOptionsPartial]
+    ) -> Iterator[ParseOutcome[_NS]]:
+    """Parses many argument vectors with one wrapper tree.
+
+    The tree is built and its lookup tables are prepared once. Results are
+    streamed in input order, and an argument vector that fails to parse is
+    reported in its `ParseOutcome` instead of aborting the batch. Shell
+    completion is not attempted.
+
+    Args:
+        wrapper (`NamespaceWrapper[_NS]`): The root namespace.
+        argvs (`Iterable[Sequence[str]]`): The argument vectors. Consumed lazily.
+        processes (`int | None`, optional): Parse in a process pool of this
+            size. Workers import the wrapper by its qualified name, so the root
+            class must be defined at module level, and the parsed results must
+            be picklable. Defaults to None, which parses in this process.
+        chunksize (`int`, optional): Argument vectors sent to a worker at once.
+            Defaults to 256.
+
+    Returns:
+        out (`Iterator[ParseOutcome[_NS]]`): One outcome per argument vector.
+    """
+
+    options = _resolve_parse_many_options(
+        ParseManyOptions(processes=None, chunksize=256),
+        partial_options
+    )
+    if options['chunksize'] < 1:
+        raise ValueError(f"chunksize must be positive, got {options['chunksize']}")
+
+    wrapper._build()
+
+    if not options['processes']:
+        for chunk in _chunks(argvs, options['chunksize']):
+            yield from _parse_chunk(wrapper, chunk)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    processes = options['processes']
+    ns_type = wrapper.T
+    with ProcessPoolExecutor(
+        processes,
+        initializer=_init_worker,
+        initargs=(ns_type.__module__, ns_type.__qualname__)
+        ) as executor:
+        # bounded number of chunks in flight keeps memory flat for huge inputs
+        pending = deque()
+        for chunk in _chunks(argvs, options['chunksize']):
+            pending.append(executor.submit(_parse_chunk_in_worker, chunk))
+            if len(pending) >= 2 * processes:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
@@ -0,0 +1,335 @@
+import os
+import sys
+import builtins
+import argparse
+from typing import TYPE_CHECKING
+
+from .base_wrapper import BaseWrapper
+from .compact import CompactListAction
+from .converters import _Converter
+from .routing import compile_routing_table, _MISSING
+from . import help_cache
+
+if TYPE_CHECKING:
+    from .namespace_wrapper import NamespaceWrapper
+
+_LITERAL_SCALARS = (type(None), bool, int, str, bytes, complex)
+_ROUTINE_KINDS = (staticmethod, classmethod, property)
+# parser defaults the wrappers keep for themselves
+_INTERNAL_PREFIXES = ('_namespace_wrapper', '_argument_group_wrapper')
+
+def _is_literal(value: object) -> bool:
+    t = type(value)
+    if t in _LITERAL_SCALARS:
+        return True
+    if t is float:
+        return value == value and value not in (float('inf'), float('-inf')) # type: ignore
+    if t in (list, tuple, set, frozenset):
+        return all(_is_literal(v) for v in value) # type: ignore
+    if t is dict:
+        return all(_is_literal(k) and _is_literal(v) for k, v in value.items()) # type: ignore
+    return False
+
+def _is_routine(value: object) -> bool:
+    return callable(value) and not isinstance(value, type) or isinstance(value, _ROUTINE_KINDS)
+
+def _check_supported(wrapper: 'NamespaceWrapper'):
+    if wrapper._parent is not None:
+        raise ValueError("generate the parser module from the root namespace")
+    ns_type = wrapper.ns_type
+    if '<locals>' in ns_type.__qualname__:
+        raise ValueError(f"{ns_type.__qualname__} is a local class and cannot be imported")
+    for option in ('config_files', 'env_prefix', 'response_file_prefix_chars'):
+        if wrapper._options.get(option, None):
+            raise ValueError(f"namespaces with {option!r} cannot be generated ahead of time")
+    parser = wrapper.parser
+    if parser.prefix_chars != '-' or parser.fromfile_prefix_chars:
+        raise ValueError("only parsers with the '-' prefix and no fromfile prefix can be generated")
+
+class _Generator:
+
+    def __init__(self, root: 'NamespaceWrapper'):
+        self.root = root
+        self.lines = list[str]()
+        self.records = dict[int, str]()
+        self.converters = dict[int, str]()
+        self.spec_count = 0
+        self.level_count = 1
+        self.levels = list[str]()
+
+    def emit(self, line: str = ''):
+        self.lines.append(line)
+
+    # records
+
+    def record(self, wrapper: BaseWrapper) -> str:
+        name = self.records.get(id(wrapper), None)
+        if name is not None:
+            return name
+        name = self.records[id(wrapper)] = f'_R{len(self.records)}'
+
+        ns_type = wrapper.ns_type
+        fieldnames = tuple(dict.fromkeys((*wrapper.attrnames, *sorted(wrapper.default_keys))))
+        defaults = dict[str, object]()
+        nested = list[str]()
+        for fieldname in fieldnames:
+            value = getattr(ns_type, fieldname, _MISSING)
+            if isinstance(value, BaseWrapper):
+                nested.append(fieldname)
+            elif value is not _MISSING and _is_literal(value):
+                defaults[fieldname] = value
+
+        self.emit(f'class {name}(_Record):')
+        self.emit(f'    __slots__ = {fieldnames!r}')
+        self.emit(f'    __qualname__ = {ns_type.__qualname__!r}')
+        self.emit(f'    __aot_type__ = ({ns_type.__module__!r}, {ns_type.__qualname__!r}, {defaults!r}, frozenset({nested!r}))')
+        self.emit(f'{name}.__name__ = {ns_type.__name__!r}')
+        self.emit()
+        return name
+
+    # converters
+
+    def reference(self, obj: object) -> str | None:
+        if obj is None:
+            return 'None'
+        qualname = getattr(obj, '__qualname__', None)
+        if isinstance(qualname, str) and getattr(builtins, qualname, None) is obj:
+            return qualname
+        module = getattr(obj, '__module__', None)
+        if not isinstance(module, str) or not isinstance(qualname, str) or '<locals>' in qualname:
+            return None
+        return f'_Ref({module!r}, {qualname!r})'
+
+    def converter(self, convert: object) -> str | None:
+        cached = self.converters.get(id(convert), None)
+        if cached is not None:
+            return cached
+        if isinstance(convert, _Converter):
+            steps = list[str]()
+            for t, values in convert.steps:
+                ref = self.reference(t)
+                if ref is None:
+                    return None
+                steps.append(f'({ref}, {None if values is None else frozenset(values)!r})')
+            expr = f"_Union(({', '.join(steps)},))"
+        else:
+            expr = self.reference(convert)
+            if expr is None:
+                return None
+        name = self.converters[id(convert)] = f'_C{len(self.converters)}'
+        self.emit(f'{name} = {expr}')
+        return name
+
+    # specs and levels
+
+    def value(self, level: int, dest: str, value: object) -> str:
+        return repr(value) if _is_literal(value) else f'_Lazy({level}, {dest!r})'
+
+    def spec(self, level: int, action: argparse.Action, subcommands: dict[str, int] | None = None) -> str:
+        name = f'_S{self.spec_count}'
+        self.spec_count += 1
+
+        kind = 'fallback'
+        convert: str | None = 'None'
+        arg = 'None'
+        if subcommands is not None:
+            kind = 'parser'
+            arg = repr(subcommands)
+        elif action.choices is not None or action.dest == argparse.SUPPRESS:
+            pass
+        elif isinstance(action, argparse._StoreConstAction) and _is_literal(action.const):
+            kind = 'const'
+            arg = repr(action.const)
+        elif isinstance(action, CompactListAction):
+            convert = self.converter(action.type)
+            kind = 'compact' if convert is not None else 'fallback'
+            arg = repr(action.typecode)
+        elif type(action) is argparse._StoreAction:
+            convert = self.converter(action.type)
+            kind = 'store' if convert is not None else 'fallback'
+            if _is_literal(action.const):
+                arg = repr(action.const)
+        if convert is None:
+            convert = 'None'
+
+        default = self.value(level, action.dest, action.default)
+        self.emit(f'{name} = _Spec({action.dest!r}, {kind!r}, {action.nargs!r}, {convert}, {arg}, {default})')
+        return name
+
+    def level(self, index: int, wrapper: 'NamespaceWrapper', parser: argparse.ArgumentParser, path: tuple[str, ...]) -> list[tuple[int, 'NamespaceWrapper', argparse.ArgumentParser, tuple[str, ...]]]:
+        children = list[tuple[int, 'NamespaceWrapper', argparse.ArgumentParser, tuple[str, ...]]]()
+        options = dict[str, str]()
+        positionals = list[str]()
+        required = list[str]()
+        defaults = dict[str, str]()
+
+        for action in parser._actions:
+            subcommands = None
+            if isinstance(action, argparse._SubParsersAction):
+                subcommands = dict[str, int]()
+                seen = dict[int, int]()
+                for choice, subparser in action.choices.items():
+                    if id(subparser) not in seen:
+                        sub = subparser._defaults['_namespace_wrapper_instance']
+                        seen[id(subparser)] = self.level_count
+                        self.level_count += 1
+                        children.append((seen[id(subparser)], sub, subparser, (*path, sub._bindname)))
+                    subcommands[choice] = seen[id(subparser)]
+            elif action.dest != argparse.SUPPRESS and action.default is not argparse.SUPPRESS:
+                default = action.default
+                if (
+                    isinstance(default, str) and action.type is not None
+                    and not isinstance(action, CompactListAction)
+                ):
+                    # argparse converts string defaults of arguments that were not given
+                    try:
+                        default = action.type(default) # type: ignore
+                    except Exception as e:
+                        raise ValueError(f"default of {action.dest!r} does not convert: {e}") from e
+                if not _is_routine(default):
+                    defaults[action.dest] = self.value(index, action.dest, default)
+
+            name = self.spec(index, action, subcommands)
+            if action.option_strings:
+                options.update((option_string, name) for option_string in action.option_strings)
+            else:
+                positionals.append(name)
+            if action.required:
+                required.append(name)
+
+        for dest, default in parser._defaults.items():
+            if dest.startswith(_INTERNAL_PREFIXES) or dest in defaults or _is_routine(default):
+                continue
+            defaults[dest] = self.value(index, dest, default)
+
+        self.levels.append('\n'.join((
+            '    _Level(',
+            f'        path={path!r},',
+            f"        options={{{', '.join(f'{k!r}: {v}' for k, v in options.items())}}},",
+            f"        positionals=[{', '.join(positionals)}],",
+            f"        defaults={{{', '.join(f'{k!r}: {v}' for k, v in defaults.items())}}},",
+            f"        required=({''.join(f'{r}, ' for r in required)}),",
+            f'        table={self.table(index, wrapper)},',
+            '    ),',
+        )))
+        return children
+
+    def table(self, index: int, wrapper: 'NamespaceWrapper') -> str:
+        compiled = compile_routing_table(wrapper, wrapper is self.root)
+        groups = [
+            f'({gname!r}, {self.record(wrapper._argument_groups[gname])})'
+            for gname, _ in compiled.groups
+        ]
+        fields = list[str]()
+        for dest, slot, fallback in compiled.fields:
+            if _is_routine(fallback):
+                continue
+            expr = '_MISSING' if fallback is _MISSING else self.value(index, dest, fallback)
+            fields.append(f'({dest!r}, {slot}, {expr})')
+
+        parents = list[str]()
+        bindname = wrapper._bindname
+        current: BaseWrapper = wrapper
+        while bindname is not None and current._parent is not None:
+            current = current._parent
+            parents.append(f'({bindname!r}, {self.record(current)})')
+            bindname = current.container.get_default('_namespace_wrapper_bind_name')
+
+        def tuple_expr(items: list[str]) -> str:
+            return f"({''.join(f'{item}, ' for item in items)})"
+
+        return f'({self.record(wrapper)}, {tuple_expr(groups)}, {tuple_expr(fields)}, {tuple_expr(parents)})'
+
+    def render(self) -> str:
+        from . import aot_runtime
+        with open(aot_runtime.__file__, encoding='utf-8') as f:
+            runtime = f.read()
+
+        root = self.root
+        ns_type = root.ns_type
+        pending = [(0, root, root.parser, tuple[str, ...]())]
+        while pending:
+            index, wrapper, parser, path = pending.pop(0)
+            pending.extend(self.level(index, wrapper, parser, path))
+
+        files = {
+            path: tuple(fingerprint)
+            for path, fingerprint in help_cache._tree_modules(root).items()
+            if fingerprint is not None
+        }
+        header = (
+            f'# Generated from {ns_type.__module__}.{ns_type.__qualname__} by '
+            'argparse_class_namespace.core.codegen; do not edit.\n'
+            '# Regenerate it after changing the command line: once a module defining\n'
+            '# it changed, parse_args hands every call to the real wrapper.\n\n'
+        )
+        tables = '\n'.join((
+            '',
+            '# tables',
+            '',
+            f'_SOURCE = ({ns_type.__module__!r}, {ns_type.__qualname__!r})',
+            f'_FILES = {files!r}',
+            '',
+            *self.lines,
+            '_LEVELS = [',
+            *self.levels,
+            ']',
+            '',
+            "__all__ = ['parse_args', 'to_result']",
+            '',
+        ))
+        return header + runtime + tables
+
+def generate_parser_module(
+    wrapper: 'NamespaceWrapper',
+    path: 'str | os.PathLike[str] | None' = None
+    ) -> str:
+    """Generates a standalone Python module that parses the command line of `wrapper`.
+
+    The module imports neither argparse nor this package nor the modules
+    defining the namespace. Its `parse_args(args=None)` splits argv with
+    argparse's rules, converts the values and returns records: `__slots__`
+    classes mirroring the wrapped classes, as with the `slots` option.
+    Records are not instances of the wrapped classes, so
+    `isinstance(record, Cli.T)` is False; `to_result(record)` and pickling
+    turn records into results of the real wrapper.
+
+    Help, completion, errors, abbreviated options, `--` and actions it does
+    not know are handed to the real wrapper, which returns its own results;
+    so is everything once a module defining the namespace changed.
+
+    Args:
+        wrapper (`NamespaceWrapper`): The root namespace. Its whole tree is built.
+        path (`str | os.PathLike[str] | None`, optional): Where to write the
+            module; it is byte-compiled there as well.
+
+    Returns:
+        out (`str`): The source of the module.
+    """
+
+    _check_supported(wrapper)
+    wrapper.materialize(recursive=True)
+    source = _Generator(wrapper).render()
+    if path is not None:
+        import py_compile
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(source)
+        # the first start should not pay for compiling it
+        py_compile.compile(os.fspath(path), doraise=True)
+    return source
+
+def main(argv: list[str] | None = None) -> int:
+    """`python -m argparse_class_namespace.core.codegen module:Qualname output.py`"""
+    import importlib
+    from .pickling import resolve_wrapper
+    args = sys.argv[1:] if argv is None else argv
+    if len(args) != 2 or ':' not in args[0]:
+        sys.stderr.write('usage: python -m argparse_class_namespace.core.codegen module:Qualname output.py\n')
+        return 2
+    module_name, qualname = args[0].split(':', 1)
+    importlib.import_module(module_name)
+    generate_parser_module(resolve_wrapper(module_name, qualname), args[1]) # type: ignore
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
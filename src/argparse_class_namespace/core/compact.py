@@ -0,0 +1,93 @@
+import argparse
+from array import array
+from typing import Callable, Iterable
+
+_TYPECODES: dict[type, str] = {int: 'q', float: 'd'}
+
+class CompactList:
+    """`Annotated` metadata storing a `list[int]` or `list[float]` field in an `array.array`.
+
+    All tokens are converted in one pass, and the values are stored unboxed:
+    `array('q')` for int and `array('d')` for float unless `typecode` says
+    otherwise. Arrays support the buffer protocol, so e.g.
+    `numpy.frombuffer(ns.ids, dtype=numpy.int64)` wraps them without a copy.
+    The field's default is used as written.
+
+    Examples:
+        ```python
+            @namespace
+            class Select:
+                ids: Annotated[list[int], CompactList()] = []
+        ```
+    """
+
+    def __init__(self, typecode: str | None = None):
+        self.typecode = typecode
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.typecode!r})'
+
+    def typecode_for(self, element_type: type) -> str:
+        if self.typecode is not None:
+            return self.typecode
+        try:
+            return _TYPECODES[element_type]
+        except KeyError:
+            raise TypeError(
+                f"CompactList() needs a typecode for list[{element_type.__name__}]"
+            ) from None
+
+class CompactListAction(argparse.Action):
+    """Stores the values of a list field as one `array.array`."""
+
+    def __init__(self, option_strings, dest, typecode: str = 'q', **kwargs):
+        super().__init__(option_strings, dest, **kwargs)
+        self.typecode = typecode
+
+    def convert(self, arg_strings: Iterable[object]) -> array:
+        arg_strings = list(arg_strings)
+        convert: Callable[[object], object] = self.type or str # type: ignore
+        try:
+            return array(self.typecode, map(convert, arg_strings))
+        except (TypeError, ValueError, OverflowError):
+            pass
+        # slow path only to name the offending token, like argparse does
+        name = getattr(convert, '__name__', repr(convert))
+        for arg_string in arg_strings:
+            try:
+                value = convert(arg_string)
+            except (TypeError, ValueError):
+                raise argparse.ArgumentError(self, f'invalid {name} value: {arg_string!r}')
+            try:
+                array(self.typecode, [value])
+            except (TypeError, OverflowError) as e:
+                raise argparse.ArgumentError(self, f'value out of range: {arg_string!r} ({e})')
+        raise argparse.ArgumentError(self, f'invalid {name} values')
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        if not isinstance(values, array):
+            # parsers that are not a `WrapperArgumentParser` pass converted tokens
+            values = self.convert(values)
+        setattr(namespace, self.dest, values)
+
+def compact_list_action(typecode: str) -> Callable[..., CompactListAction]:
+    import functools
+    return functools.partial(CompactListAction, typecode=typecode)
+
+class WrapperArgumentParser(argparse.ArgumentParser):
+    """The `ArgumentParser` built by `namespace()`.
+
+    Hands the tokens of `CompactListAction` fields to the action in one
+    batch instead of converting them one by one.
+    """
+
+    def _get_values(self, action, arg_strings):
+        if not isinstance(action, CompactListAction) or action.choices is not None:
+            return super()._get_values(action, arg_strings)
+        if '--' in arg_strings:
+            # argparse drops the first '--' the same way
+            arg_strings = list(arg_strings)
+            arg_strings.remove('--')
+        if not arg_strings and not action.option_strings and action.nargs == argparse.ZERO_OR_MORE:
+            return super()._get_values(action, arg_strings)
+        return action.convert(arg_strings)
@@ -0,0 +1,138 @@
+import os
+import time
+from typing import Callable, Iterable, Mapping, Any
+
+from . import disk_cache
+
+CompleterFunction = Callable[..., Iterable[str] | Mapping[str, str]]
+
+class Completer:
+    """`Annotated` metadata attaching an argcomplete completer to a field.
+
+    Examples:
+        ```python
+            @namespace
+            class Train:
+                dataset: Annotated[str, Completer(list_datasets)] = 'mnist'
+        ```
+
+    Completers can also be declared with a class-level mapping,
+    `__completers__ = {'dataset': list_datasets}`.
+    """
+
+    def __init__(self, func: CompleterFunction):
+        self.func = func
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.func!r})'
+
+def _default_completion_dir() -> str:
+    cache_dir = disk_cache.get_cache_dir()
+    if cache_dir is not None:
+        return os.path.join(cache_dir, 'completions')
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'argparse_class_namespace', 'completions')
+
+class CachedCompleter:
+    """Completer whose results are cached on local disk.
+
+    Every TAB press runs in a fresh process, so results are stored as one
+    small file per cache key. Entries older than `ttl` seconds are
+    recomputed, and the least recently written entries beyond `maxsize`
+    are removed.
+
+    Args:
+        func (`CompleterFunction`): The completer to cache. It is called with
+            argcomplete's keyword arguments (`prefix`, `action`, `parser`,
+            `parsed_args`).
+        ttl (`float`, optional): Lifetime of an entry in seconds. Defaults to 60.
+        maxsize (`int`, optional): Maximum number of entries kept for this
+            completer. Defaults to 64.
+        key (`(**kwargs) -> str`, optional): Computes the cache key from the
+            completer arguments. By default the results do not depend on the
+            prefix, since argcomplete filters them by prefix itself.
+        directory (`str`, optional): Where entries are stored. Defaults to
+            the configured cache directory, or the user cache directory.
+    """
+
+    def __init__(
+        self,
+        func: CompleterFunction,
+        ttl: float = 60.0,
+        maxsize: int = 64,
+        key: Callable[..., str] | None = None,
+        directory: str | None = None
+        ):
+        self.func = func
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.key = key
+        self.directory = directory
+        self.__name__ = getattr(func, '__name__', self.__class__.__name__)
+
+    def _entry_dir(self) -> str:
+        name = f'{getattr(self.func, "__module__", "")}.{getattr(self.func, "__qualname__", repr(self.func))}'
+        return os.path.join(self.directory or _default_completion_dir(), name)
+
+    def _evict(self, entry_dir: str):
+        try:
+            entries = [e for e in os.scandir(entry_dir) if e.name.endswith('.json')]
+        except OSError:
+            return
+        if len(entries) <= self.maxsize:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime_ns)
+        for entry in entries[:len(entries) - self.maxsize]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def __call__(self, **kwargs: Any) -> list[str] | dict[str, str]:
+        key = self.key(**kwargs) if self.key is not None else ''
+        entry_dir = self._entry_dir()
+        import hashlib
+        entry_path = os.path.join(
+            entry_dir, hashlib.sha256(key.encode('utf-8')).hexdigest()[:32] + '.json'
+        )
+
+        data = disk_cache.read_json(entry_path)
+        now = time.time()
+        if (
+            isinstance(data, dict)
+            and data.get('key') == key
+            and now - data.get('time', 0) < self.ttl
+        ):
+            return data['results']
+
+        output = self.func(**kwargs)
+        results = dict(output) if isinstance(output, Mapping) else list(output)
+        if disk_cache.write_json(entry_path, {'key': key, 'time': now, 'results': results}):
+            self._evict(entry_dir)
+        return results
+
+def cached_completer(
+    func: CompleterFunction | None = None,
+    /,
+    *,
+    ttl: float = 60.0,
+    maxsize: int = 64,
+    key: Callable[..., str] | None = None,
+    directory: str | None = None
+    ):
+    """Decorator form of `CachedCompleter`.
+
+    Examples:
+        ```python
+            @cached_completer(ttl=300)
+            def list_checkpoints(prefix, **kwargs):
+                ...
+        ```
+    """
+
+    def decorator(func: CompleterFunction) -> CachedCompleter:
+        return CachedCompleter(func, ttl=ttl, maxsize=maxsize, key=key, directory=directory)
+
+    if func is None:
+        return decorator
+    return decorator(func)
@@ -0,0 +1,75 @@
+from functools import lru_cache
+from typing import Callable
+
+ConverterStep = tuple[type, frozenset[object] | None]
+"""A constructor and the literal values it may produce, or None for any value."""
+
+_MAX_NAMED_LITERALS = 6
+
+def _step_name(step: ConverterStep) -> str:
+    t, values = step
+    if values is None:
+        return t.__name__
+    shown = sorted(values, key=repr)
+    names = [repr(v) for v in shown[:_MAX_NAMED_LITERALS]]
+    if len(shown) > _MAX_NAMED_LITERALS:
+        names.append('...')
+    return f"Literal[{', '.join(names)}]"
+
+class _Converter:
+
+    def __init__(self, steps: tuple[ConverterStep, ...]):
+        self.steps = steps
+        self.__name__ = ' | '.join(_step_name(step) for step in steps)
+
+    def __reduce__(self):
+        # unpickled converters are shared through the memo as well
+        return (compile_converter, (self.steps,))
+
+    def __repr__(self):
+        return f'<converter {self.__name__}>'
+
+class LiteralConverter(_Converter):
+    """Converts with a single constructor, then checks a frozenset of values."""
+
+    def __init__(self, steps: tuple[ConverterStep, ...]):
+        super().__init__(steps)
+        ((self._type, values),) = steps
+        self._values = values or frozenset()
+
+    def __call__(self, value_string: str) -> object:
+        value = self._type(value_string)
+        if value in self._values:
+            return value
+        raise ValueError(f"{value!r} is not one of {self.__name__}")
+
+class UnionConverter(_Converter):
+    """Tries each constructor in annotation order."""
+
+    def __call__(self, value_string: str) -> object:
+        for t, values in self.steps:
+            try:
+                value = t(value_string)
+            except (TypeError, ValueError):
+                continue
+            if values is None or value in values:
+                return value
+        raise ValueError(f"{value_string!r} does not match {self.__name__}")
+
+@lru_cache(maxsize=None)
+def compile_converter(steps: tuple[ConverterStep, ...]) -> Callable[[str], object]:
+    """Returns a specialized `type` callable for the given conversion steps.
+
+    A single unrestricted constructor is returned as is, so `int`, `float`
+    and `str` fields call the builtin directly. Results are memoized, so
+    fields with the same annotation share one converter.
+    """
+
+    if not steps:
+        raise ValueError("At least one conversion step is required")
+    if len(steps) == 1:
+        t, values = steps[0]
+        if values is None:
+            return t
+        return LiteralConverter(steps)
+    return UnionConverter(steps)
@@ -0,0 +1,275 @@
+import io
+import os
+import sys
+import json
+import socket
+import struct
+import traceback
+from typing import TypedDict, Unpack, Sequence, Mapping, TextIO, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .namespace_wrapper import NamespaceWrapper
+
+# frames are a 4-byte big-endian length and a UTF-8 JSON object: the request
+# is {"argv": [...], "cwd": str, "env": {...}}, followed by any number of
+# {"stdout": str} / {"stderr": str} responses and a final {"exit": int}
+_HEADER = struct.Struct('>I')
+_MAX_FRAME = 64 * 1024 * 1024
+
+class ServeOptions(TypedDict):
+    fork: bool
+    """Handle every connection in a forked child; when False they are handled one at a time in-process."""
+    backlog: int
+class ServeOptionsPartial(TypedDict, total=False):
+    fork: bool
+    backlog: int
+def _resolve_serve_options(full: ServeOptions, partial: ServeOptionsPartial) -> ServeOptions:
+    options = full.copy()
+    options.update(partial)
+    return options
+
+def _send_frame(sock: socket.socket, payload: object):
+    data = json.dumps(payload, separators=(',', ':')).encode('utf-8', 'surrogateescape')
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = list[bytes]()
+    while size:
+        chunk = sock.recv(min(size, 1 << 16))
+        if not chunk:
+            raise ConnectionError("Connection closed in the middle of a frame")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+def _recv_frame(sock: socket.socket) -> dict[str, object] | None:
+    header = sock.recv(_HEADER.size, socket.MSG_WAITALL)
+    if not header:
+        return None
+    if len(header) < _HEADER.size:
+        header += _recv_exact(sock, _HEADER.size - len(header))
+    (size,) = _HEADER.unpack(header)
+    if size > _MAX_FRAME:
+        raise ValueError(f"Frame of {size} bytes exceeds the limit of {_MAX_FRAME} bytes")
+    payload = json.loads(_recv_exact(sock, size).decode('utf-8', 'surrogateescape'))
+    if not isinstance(payload, dict):
+        raise ValueError(f"Expected a JSON object frame, got {type(payload).__name__}")
+    return payload
+
+class _FrameWriter(io.TextIOBase):
+    """A text stream that forwards every write as one frame."""
+
+    def __init__(self, sock: socket.socket, stream: str):
+        self._sock = sock
+        self._stream = stream
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, s: str) -> int:
+        if s:
+            _send_frame(self._sock, {self._stream: s})
+        return len(s)
+
+def _exit_code(e: SystemExit) -> int:
+    if e.code is None:
+        return 0
+    if isinstance(e.code, int):
+        return e.code
+    print(e.code, file=sys.stderr)
+    return 1
+
+def _invoke(wrapper: 'NamespaceWrapper', argv: Sequence[str]) -> int:
+    result = wrapper.run(argv)
+    if isinstance(result, int) and not isinstance(result, bool):
+        return result
+    return 0
+
+def _handle(wrapper: 'NamespaceWrapper', conn: socket.socket):
+
+    request = _recv_frame(conn)
+    if request is None:
+        return
+    argv = request.get('argv', [])
+    cwd = request.get('cwd', None)
+    env = request.get('env', None)
+
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout = _FrameWriter(conn, 'stdout')
+    sys.stderr = _FrameWriter(conn, 'stderr')
+    try:
+        try:
+            if isinstance(env, dict):
+                os.environ.clear()
+                os.environ.update(env)
+            if isinstance(cwd, str):
+                os.chdir(cwd)
+            code = _invoke(wrapper, argv) # type: ignore
+        except SystemExit as e:
+            code = _exit_code(e)
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        sys.stdout.flush()
+        sys.stderr.flush()
+        _send_frame(conn, {'exit': code})
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
+
+def _warm(wrapper: 'NamespaceWrapper'):
+    # everything built here is shared copy-on-write with the forked children
+    from .namespace_wrapper import NamespaceWrapper
+    wrapper.materialize(recursive=True)
+    stack = [wrapper]
+    while stack:
+        current = stack.pop()
+        current._routing_table(current is wrapper)
+        stack.extend(
+            sub for sub in current._subnamespaces.values()
+            if isinstance(sub, NamespaceWrapper)
+        )
+
+def _reap_children():
+    while True:
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if pid == 0:
+            return
+
+def serve(
+    wrapper: 'NamespaceWrapper',
+    path: 'str | os.PathLike[str]',
+    /,
+    **kwargs: Unpack[ServeOptionsPartial]
+    ) -> None:
+    """Serves invocations of `wrapper` over a Unix socket until interrupted.
+
+    The wrapper tree is built once. Every connection is handled in a forked
+    child that applies the client's working directory and environment, runs
+    the client's argv with `NamespaceWrapper.run` and streams what the
+    callback writes to `sys.stdout` and `sys.stderr` back, followed by the
+    exit code (the callback's return value when it is an int).
+
+    Standard input is not forwarded, and output written directly to file
+    descriptors 1 and 2 (e.g. by subprocesses) stays with the server.
+
+    Args:
+        wrapper (`NamespaceWrapper`): The root namespace to serve.
+        path (`str | os.PathLike[str]`): Where to create the socket. A stale
+            socket left at this path is replaced. The socket is only
+            accessible by the current user.
+        **kwargs (`*ServeOptionsPartial`): `fork` (default True where
+            available) and `backlog` (default 64).
+    """
+
+    options = _resolve_serve_options(
+        ServeOptions(fork=hasattr(os, 'fork'), backlog=64),
+        kwargs
+    )
+    path = os.fspath(path)
+
+    _warm(wrapper)
+
+    if os.path.exists(path):
+        import stat
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            raise ValueError(f"{path} exists and is not a socket")
+        os.remove(path)
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    umask = os.umask(0o177)
+    try:
+        server.bind(path)
+    finally:
+        os.umask(umask)
+    server.listen(options['backlog'])
+
+    if options['fork']:
+        import gc
+        # keeps the collector from touching, and so copying, the warm tree in children
+        gc.freeze()
+
+    try:
+        while True:
+            conn, _ = server.accept()
+            if not options['fork']:
+                cwd, env = os.getcwd(), dict(os.environ)
+                try:
+                    with conn:
+                        _handle(wrapper, conn)
+                finally:
+                    os.chdir(cwd)
+                    os.environ.clear()
+                    os.environ.update(env)
+                continue
+
+            if os.fork() == 0:
+                status = 0
+                try:
+                    server.close()
+                    with conn:
+                        _handle(wrapper, conn)
+                except BaseException:
+                    status = 1
+                finally:
+                    os._exit(status)
+            conn.close()
+            _reap_children()
+    finally:
+        server.close()
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def request(
+    path: 'str | os.PathLike[str]',
+    argv: Sequence[str] | None = None,
+    *,
+    cwd: str | None = None,
+    env: Mapping[str, str] | None = None,
+    stdout: TextIO | None = None,
+    stderr: TextIO | None = None
+    ) -> int:
+    """Runs one invocation on the server at `path` and returns its exit code.
+
+    `argv`, `cwd` and `env` default to those of the calling process. Output
+    is written to `stdout` and `stderr` (default `sys.stdout`, `sys.stderr`)
+    as it arrives.
+    """
+
+    stdout = sys.stdout if stdout is None else stdout
+    stderr = sys.stderr if stderr is None else stderr
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(os.fspath(path))
+        _send_frame(sock, {
+            'argv': list(sys.argv[1:] if argv is None else argv),
+            'cwd': os.getcwd() if cwd is None else cwd,
+            'env': dict(os.environ if env is None else env),
+        })
+        while True:
+            frame = _recv_frame(sock)
+            if frame is None:
+                raise ConnectionError("Server closed the connection without an exit code")
+            if 'stdout' in frame:
+                stdout.write(frame['stdout']) # type: ignore
+            elif 'stderr' in frame:
+                stderr.write(frame['stderr']) # type: ignore
+            elif 'exit' in frame:
+                stdout.flush()
+                stderr.flush()
+                return frame['exit'] # type: ignore
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Thin client: `python -m argparse_class_namespace.core.daemon SOCKET [ARGS...]`."""
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print(f"usage: python -m {__spec__.name if __spec__ else 'daemon'} SOCKET [ARGS...]", file=sys.stderr)
+        return 2
+    return request(argv[0], argv[1:])
+
+if __name__ == '__main__':
+    sys.exit(main())
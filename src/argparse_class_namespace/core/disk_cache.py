@@ -0,0 +1,86 @@
+import os
+import sys
+import atexit
+
+CACHE_DIR_ENV = 'ARGPARSE_CLASS_NAMESPACE_CACHE_DIR'
+
+_cache_dir: str | None = None
+_cache_dir_is_set = False
+
+def set_cache_dir(path: 'str | os.PathLike[str] | None') -> None:
+    """Enables the persistent startup caches and stores them under `path`.
+
+    Passing None disables them again. When this function is never called,
+    the `ARGPARSE_CLASS_NAMESPACE_CACHE_DIR` environment variable is used.
+    """
+    global _cache_dir, _cache_dir_is_set
+    _cache_dir = None if path is None else os.fspath(path)
+    _cache_dir_is_set = True
+
+def get_cache_dir() -> str | None:
+    if _cache_dir_is_set:
+        return _cache_dir
+    return os.environ.get(CACHE_DIR_ENV) or None
+
+def file_fingerprint(path: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def module_file(module_name: str) -> str | None:
+    module = sys.modules.get(module_name, None)
+    path = getattr(module, '__file__', None)
+    if not isinstance(path, str):
+        return None
+    return os.path.abspath(path)
+
+def cache_path(section: str, key: str, suffix: str = '.json') -> str | None:
+    cache_dir = get_cache_dir()
+    if cache_dir is None:
+        return None
+    import hashlib
+    digest = hashlib.sha256(key.encode('utf-8', 'surrogatepass')).hexdigest()[:32]
+    return os.path.join(cache_dir, section, digest + suffix)
+
+def read_json(path: str) -> object:
+    import json
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_atomic(path: str, data: bytes) -> bool:
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            # a bare file name is written to the working directory
+            os.makedirs(directory, exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
+    return True
+
+def write_json(path: str, data: object) -> bool:
+    import json
+    return write_atomic(path, json.dumps(data, separators=(',', ':')).encode('utf-8'))
+
+_flush_callbacks: list = []
+
+def register_flush(callback) -> None:
+    if not _flush_callbacks:
+        atexit.register(flush)
+    _flush_callbacks.append(callback)
+
+def flush() -> None:
+    for callback in _flush_callbacks:
+        callback()
@@ -0,0 +1,283 @@
+import io
+import os
+import contextlib
+from typing import (
+    TypeVar, TypedDict, Unpack, Literal,
+    Callable, Iterable, Iterator, Sequence, TYPE_CHECKING
+)
+
+from . import batch
+from .batch import ParseOutcome
+from .routing import _MISSING
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+    from .namespace_wrapper import NamespaceWrapper
+
+_R = TypeVar('_R')
+
+class DispatchOutcome(ParseOutcome[_R]):
+    """A `ParseOutcome` whose `result` is what the callback returned, or None
+    if parsing or the callback failed; `error` is then the exception raised
+    by the callback as well."""
+
+    __slots__ = ()
+
+class DispatchOptions(TypedDict):
+    executor: Literal['thread', 'process', 'async']
+    workers: int | None
+    max_pending: int | None
+    name: str | None
+class DispatchOptionsPartial(TypedDict, total=False):
+    executor: Literal['thread', 'process', 'async']
+    workers: int | None
+    max_pending: int | None
+    name: str | None
+def _resolve_dispatch_options(full: DispatchOptions, partial: DispatchOptionsPartial) -> DispatchOptions:
+    options = full.copy()
+    options.update(partial)
+    return options
+
+# (index, argv, stderr message, job) of a parsed argument vector
+_Parsed = tuple[int, Sequence[str], str, object]
+
+async def _await(awaitable):
+    return await awaitable
+
+def _call(func: Callable[[object], object], ns: object) -> object:
+    result = func(ns)
+    if hasattr(result, '__await__'):
+        import asyncio
+        return asyncio.run(_await(result))
+    return result
+
+def _compact(
+    wrapper: 'NamespaceWrapper',
+    values: dict[str, object],
+    selected: 'NamespaceWrapper'
+    ) -> dict[str, object]:
+    # only what the worker cannot restore from its own routing table:
+    # defaults (including callbacks) are filled in again there
+    fields = dict[str, object]()
+    for dest, _, fallback in selected._routing_table(selected is wrapper).fields:
+        value = values.get(dest, _MISSING)
+        if value is _MISSING or value is fallback:
+            continue
+        fields[dest] = value
+    return fields
+
+def _parse(
+    wrapper: 'NamespaceWrapper',
+    argvs: Iterable[Sequence[str]],
+    name: str | None,
+    compact: bool
+    ) -> Iterator[DispatchOutcome | _Parsed]:
+
+    stderr = io.StringIO()
+    for index, argv in enumerate(argvs):
+        try:
+            with contextlib.redirect_stderr(stderr):
+                values = wrapper._parse_values(argv, complete=False)
+                selected: NamespaceWrapper = values['_namespace_wrapper_instance'] # type: ignore
+                func = selected._callback_for(name)
+            if compact:
+                job = (wrapper._selected_path(selected), _compact(wrapper, values, selected))
+            else:
+                ns = wrapper._selected_namespace(wrapper._materialize_values(values), selected)
+                job = (func, ns)
+        except (SystemExit, Exception) as e:
+            yield DispatchOutcome(index, argv, None, e, stderr.getvalue())
+        else:
+            yield (index, argv, stderr.getvalue(), job)
+        stderr.seek(0)
+        stderr.truncate()
+
+def _call_in_worker(path: tuple[str, ...], fields: dict[str, object], name: str | None) -> object:
+    import pickle
+    # set up by the `parse_many` worker initializer
+    wrapper = batch._worker_wrapper
+    if wrapper is None:
+        raise RuntimeError("Worker was not initialized")
+    selected = wrapper
+    for bindname in path:
+        selected = selected._subnamespaces[bindname] # type: ignore
+    values = dict(fields)
+    values['_namespace_wrapper_instance'] = selected
+    ns = wrapper._selected_namespace(wrapper._materialize_values(values), selected)
+    try:
+        return _call(selected._callback_for(name), ns)
+    except Exception as e:
+        try:
+            pickle.dumps(e)
+        except Exception:
+            raise RuntimeError(f'{type(e).__name__}: {e}') from None
+        raise
+
+def _dispatch_futures(
+    parsed: Iterator[DispatchOutcome | _Parsed],
+    submit: Callable[[object], 'Future'],
+    max_pending: int
+    ) -> Iterator[DispatchOutcome]:
+
+    from concurrent.futures import wait, FIRST_COMPLETED
+
+    pending = dict['Future', tuple[int, Sequence[str], str]]()
+
+    def completed(block_until: int) -> Iterator[DispatchOutcome]:
+        while len(pending) > block_until:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, argv, message = pending.pop(future)
+                error = future.exception()
+                yield DispatchOutcome(
+                    index, argv, None if error else future.result(), error, message
+                )
+
+    for item in parsed:
+        if isinstance(item, DispatchOutcome):
+            yield item
+            continue
+        index, argv, message, job = item
+        pending[submit(job)] = (index, argv, message)
+        yield from completed(max_pending - 1)
+    yield from completed(0)
+
+def _dispatch_async(
+    parsed: Iterator[DispatchOutcome | _Parsed],
+    workers: int,
+    max_pending: int
+    ) -> Iterator[DispatchOutcome]:
+
+    import asyncio
+
+    loop = asyncio.new_event_loop()
+    semaphore = asyncio.Semaphore(workers)
+    pending = dict[asyncio.Task, tuple[int, Sequence[str], str]]()
+
+    async def run(func: Callable[[object], object], ns: object) -> object:
+        async with semaphore:
+            if asyncio.iscoroutinefunction(func):
+                return await func(ns)
+            result = await loop.run_in_executor(None, func, ns)
+            if hasattr(result, '__await__'):
+                return await result # type: ignore
+            return result
+
+    def completed(block_until: int) -> Iterator[DispatchOutcome]:
+        while len(pending) > block_until:
+            done, _ = loop.run_until_complete(
+                asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            )
+            for task in done:
+                index, argv, message = pending.pop(task)
+                error = task.exception()
+                yield DispatchOutcome(
+                    index, argv, None if error else task.result(), error, message
+                )
+
+    try:
+        for item in parsed:
+            if isinstance(item, DispatchOutcome):
+                yield item
+                continue
+            index, argv, message, (func, ns) = item # type: ignore
+            pending[loop.create_task(run(func, ns))] = (index, argv, message)
+            yield from completed(max_pending - 1)
+        yield from completed(0)
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            loop.run_until_complete(asyncio.wait(pending))
+        loop.run_until_complete(loop.shutdown_default_executor())
+        loop.close()
+
+def dispatch(
+    wrapper: 'NamespaceWrapper',
+    argvs: Iterable[Sequence[str]],
+    /,
+    **partial_options: Unpack[DispatchOptionsPartial]
+    ) -> Iterator[DispatchOutcome]:
+    """Parses many argument vectors and runs the selected callback of each concurrently.
+
+    Argument vectors are parsed in this process as they are consumed, and
+    at most `max_pending` callbacks are submitted and not yet yielded at any
+    time, so a huge or endless input is held back instead of queued.
+    Outcomes are yielded as the callbacks complete, not in input order.
+    Argument vectors that fail to parse are yielded right away.
+
+    Args:
+        wrapper (`NamespaceWrapper`): The root namespace.
+        argvs (`Iterable[Sequence[str]]`): The argument vectors. Consumed lazily.
+        executor (`'thread' | 'process' | 'async'`, optional): Run callbacks
+            on a thread pool, a process pool, or as tasks of an event loop
+            (plain functions go to the loop's default executor). With
+            'process', workers import the wrapper by its qualified name, so
+            the root class must be defined at module level; only the parsed
+            values that differ from the defaults are sent, and results must
+            be picklable. Defaults to 'thread'.
+        workers (`int | None`, optional): Threads, processes, or concurrently
+            running coroutines. Defaults to the executor's default, and to
+            64 coroutines.
+        max_pending (`int | None`, optional): Callbacks submitted but not yet
+            yielded. Defaults to twice `workers` for pools and to `workers`
+            for 'async'.
+        name (`str | None`, optional): The callback to run when a namespace
+            has several.
+
+    Returns:
+        out (`Iterator[DispatchOutcome]`): One outcome per argument vector.
+    """
+
+    options = _resolve_dispatch_options(
+        DispatchOptions(executor='thread', workers=None, max_pending=None, name=None),
+        partial_options
+    )
+    executor = options['executor']
+    workers = options['workers']
+    if workers is None:
+        workers = (
+            64 if executor == 'async'
+            else (os.cpu_count() or 1) if executor == 'process'
+            else min(32, (os.cpu_count() or 1) + 4)
+        )
+    if workers < 1:
+        raise ValueError(f"workers must be positive, got {workers}")
+    max_pending = options['max_pending'] or (workers if executor == 'async' else 2 * workers)
+    if max_pending < 1:
+        raise ValueError(f"max_pending must be positive, got {max_pending}")
+
+    wrapper._build()
+    parsed = _parse(wrapper, argvs, options['name'], compact=executor == 'process')
+
+    if executor == 'async':
+        yield from _dispatch_async(parsed, workers, max_pending)
+        return
+
+    if executor == 'thread':
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(workers) as pool:
+            yield from _dispatch_futures(
+                parsed, lambda job: pool.submit(_call, *job), max_pending # type: ignore
+            )
+        return
+
+    if executor != 'process':
+        raise ValueError(f"Unknown executor {executor!r}")
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    ns_type = wrapper.T
+    if '<locals>' in ns_type.__qualname__:
+        raise ValueError(
+            f"{ns_type.__qualname__} is a local class; the process executor needs a module-level class"
+        )
+    name = options['name']
+    with ProcessPoolExecutor(
+        workers,
+        initializer=batch._init_worker,
+        initargs=(ns_type.__module__, ns_type.__qualname__)
+        ) as pool:
+        yield from _dispatch_futures(
+            parsed, lambda job: pool.submit(_call_in_worker, *job, name), max_pending # type: ignore
+        )
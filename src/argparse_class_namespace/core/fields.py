@@ -0,0 +1,121 @@
+import sys
+import weakref
+from typing import TYPE_CHECKING, Iterable
+
+from .variable_docstring import get_cached_variable_docstrings
+
+if TYPE_CHECKING:
+    from .base_wrapper import AddArgumentKwargs
+
+# besides the standard library (`object`, `Generic`, `Protocol`, `ABC`,
+# `collections.abc`, ...), packages whose classes never define fields
+_NON_USER_PACKAGES = frozenset(('typing_extensions',))
+
+def is_user_class(cls: type) -> bool:
+    package = cls.__module__.partition('.')[0]
+    return package not in sys.stdlib_module_names and package not in _NON_USER_PACKAGES
+
+# set in the dict of every subclass by `abc.ABCMeta` and `typing.Protocol`
+_BOOKKEEPING_NAMES = frozenset(('_abc_impl', '_is_protocol'))
+
+def is_dunder(name: str) -> bool:
+    return name.startswith('__') and name.endswith('__')
+
+def _is_field_name(name: str) -> bool:
+    return not is_dunder(name) and name not in _BOOKKEEPING_NAMES
+
+class ClassFields:
+    """The fields one class defines itself, computed once per class.
+
+    Names are annotated names without a value first, then the class dict's
+    order. The arguments prepared from a field are kept here as well, so
+    every namespace inheriting the class reuses them.
+    """
+
+    __slots__ = ('_cls', 'module', 'names', 'annotated', 'assigned', '_docstrings', 'arguments', '__weakref__')
+
+    def __init__(self, cls: type):
+        # weak, as the table is the value of its class in `_tables`
+        self._cls = weakref.ref(cls)
+        self.module = cls.__module__
+        annotations = cls.__dict__.get('__annotations__', {})
+        ordered_keys = {
+            k: i for i, k in enumerate(annotations)
+        } | {
+            k: i for i, k in enumerate(cls.__dict__, start=len(annotations))
+        }
+        self.names = tuple(sorted(
+            filter(_is_field_name, ordered_keys),
+            key=ordered_keys.__getitem__
+        ))
+        self.annotated = frozenset(filter(_is_field_name, annotations))
+        self.assigned = frozenset(filter(_is_field_name, cls.__dict__))
+        self._docstrings: dict[str, str] | None = None
+        # (name, table of the value, table of the docstring) -> (args, kwargs)
+        self.arguments = dict[
+            tuple[str, 'ClassFields | None', 'ClassFields | None'],
+            tuple[list[str], 'AddArgumentKwargs']
+        ]()
+
+    @property
+    def cls(self) -> type:
+        cls = self._cls()
+        if cls is None:
+            raise ReferenceError(f"the class of {self.module} fields no longer exists")
+        return cls
+
+    @property
+    def docstrings(self) -> dict[str, str]:
+        if self._docstrings is None:
+            # classes without fields may have no source to read
+            self._docstrings = get_cached_variable_docstrings(self.cls) if self.names else {}
+        return self._docstrings
+
+_tables = weakref.WeakKeyDictionary[type, ClassFields]()
+
+def class_fields(cls: type) -> ClassFields:
+    table = _tables.get(cls, None)
+    if table is None:
+        table = _tables.setdefault(cls, ClassFields(cls))
+    return table
+
+def field_tables(cls: type) -> tuple[ClassFields, ...]:
+    """Returns the tables of `cls` and of its bases that can define fields, in MRO order."""
+    return tuple(
+        class_fields(klass) for klass in cls.__mro__
+        if klass is cls or is_user_class(klass)
+    )
+
+def _first(tables: Iterable[ClassFields], name: str, kind: str) -> ClassFields | None:
+    for table in tables:
+        if name in getattr(table, kind):
+            return table
+    return None
+
+def field_owners(
+    tables: tuple[ClassFields, ...],
+    name: str
+    ) -> tuple[ClassFields | None, ClassFields | None, ClassFields | None]:
+    """Returns the tables that give field `name` its annotation, its value
+    and its docstring, the most derived class winning each."""
+    return (
+        _first(tables, name, 'annotated'),
+        _first(tables, name, 'assigned'),
+        _first(tables, name, 'docstrings'),
+    )
+
+def collect_attrnames(cls: type) -> list[str]:
+    """Returns the field names of `cls` and its bases; fields of a base come first."""
+    return list(dict.fromkeys(
+        name for table in reversed(field_tables(cls)) for name in table.names
+    ))
+
+def source_modules(cls: type) -> list[str]:
+    """Returns the names of the modules defining `cls` and the bases it takes fields from."""
+    return list(dict.fromkeys(table.module for table in field_tables(cls)))
+
+def collect_docstrings(cls: type) -> dict[str, str]:
+    docstrings = dict[str, str]()
+    for table in reversed(field_tables(cls)):
+        docstrings.update(table.docstrings)
+    return docstrings
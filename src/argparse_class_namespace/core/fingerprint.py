@@ -0,0 +1,260 @@
+import _thread
+import os
+import sys
+import weakref
+from array import array
+from enum import Enum
+from types import FunctionType, BuiltinFunctionType, MethodType
+from typing import TYPE_CHECKING, Callable, Iterator, Mapping, Sequence, Set
+
+if TYPE_CHECKING:
+    from .base_wrapper import BaseWrapper
+
+_FINGERPRINT_PERSON = b'acn-fingerprint1'
+
+_MISSING = object()
+
+_ROUTINE_TYPES = (
+    FunctionType, BuiltinFunctionType, MethodType,
+    classmethod, staticmethod, property
+)
+
+# values that are already immutable and hashable as they are
+_SCALAR_TYPES = frozenset((type(None), bool, int, float, complex, str, bytes))
+
+def _length(n: int) -> bytes:
+    return n.to_bytes(8, 'little')
+
+def _label(text: str) -> bytes:
+    data = text.encode('utf-8', 'surrogatepass')
+    return _length(len(data)) + data
+
+class FieldPlan:
+    """The fields of one wrapped class in `attrnames` order, computed once per wrapper.
+
+    Every field carries its encoded name for fingerprints and the wrapper
+    of the group or subcommand stored under it, if any.
+    """
+
+    __slots__ = ('ns_type', 'types', 'header', 'fields', 'index', '__weakref__')
+
+    def __init__(self, wrapper: 'BaseWrapper'):
+        self.ns_type = wrapper.ns_type
+        self.types = (wrapper.ns_type, wrapper.result_type)
+        self.header = b'n' + _label(f'{self.ns_type.__module__}.{self.ns_type.__qualname__}')
+
+        nested = {**wrapper._subnamespaces, **wrapper._argument_groups}
+        class_dicts = [vars(klass) for klass in self.ns_type.__mro__]
+        # registered with `NamespaceWrapper.callback`, they are only defaults
+        callbacks = getattr(wrapper, '_callbacks', {})
+        fields = list[tuple[str, bytes, 'BaseWrapper | None']]()
+        for name in dict.fromkeys((*wrapper.attrnames, *sorted(wrapper.default_keys))):
+            if name.startswith('_namespace_wrapper') or name in callbacks:
+                continue
+            member = next((d[name] for d in class_dicts if name in d), None)
+            if isinstance(member, _ROUTINE_TYPES):
+                continue
+            fields.append((name, _label(name), nested.get(name, None)))
+        self.fields = tuple(fields)
+        self.index = {name: i for i, (name, _, _) in enumerate(self.fields)}
+
+_plans = weakref.WeakKeyDictionary['BaseWrapper', FieldPlan]()
+_plans_lock = _thread.allocate_lock()
+
+def field_plan(wrapper: 'BaseWrapper') -> FieldPlan:
+    plan = _plans.get(wrapper, None)
+    if plan is None:
+        # planned outside the lock, which may build the wrapper
+        plan = FieldPlan(wrapper)
+        with _plans_lock:
+            plan = _plans.setdefault(wrapper, plan)
+    return plan
+
+def forget(wrapper: 'BaseWrapper') -> None:
+    """Drops the plan of `wrapper`, whose fields changed."""
+    with _plans_lock:
+        _plans.pop(wrapper, None)
+
+def _check(plan: FieldPlan, obj: object) -> None:
+    if not isinstance(obj, plan.types):
+        raise TypeError(
+            f"expected a parsed {plan.ns_type.__qualname__}, got {type(obj).__qualname__}"
+        )
+
+def _freeze(value: object) -> object:
+    if type(value) in _SCALAR_TYPES:
+        return value
+    if isinstance(value, bytes | bytearray | memoryview):
+        # hashed as bytes by `_encode` as well
+        return bytes(value)
+    if isinstance(value, list | tuple | array) or (
+        isinstance(value, Sequence) and not isinstance(value, str | bytes)
+    ):
+        return tuple(map(_freeze, value))
+    if isinstance(value, Set):
+        return frozenset(map(_freeze, value))
+    if isinstance(value, Mapping):
+        return frozenset((_freeze(k), _freeze(v)) for k, v in value.items())
+    try:
+        hash(value)
+    except TypeError:
+        raise TypeError(f"cannot freeze a value of type {type(value).__qualname__}") from None
+    return value
+
+class FrozenNamespace:
+    """An immutable, hashable view of a parsed result.
+
+    Fields read like attributes of the result; groups and the selected
+    subcommand are `FrozenNamespace`s themselves, bytearrays become bytes,
+    lists, tuples and arrays become tuples, sets become frozensets and
+    mappings frozensets of items.
+    Two views are equal when they view the same class with equal fields.
+    """
+
+    __slots__ = ('_plan', '_values', '_hash')
+
+    def __init__(self, plan: FieldPlan, values: tuple[object, ...]):
+        object.__setattr__(self, '_plan', plan)
+        object.__setattr__(self, '_values', values)
+        object.__setattr__(self, '_hash', None)
+
+    def __getattr__(self, name: str) -> object:
+        # only reached for names that are not slots
+        i = self._plan.index.get(name, None)
+        if i is None or self._values[i] is _MISSING:
+            raise AttributeError(
+                f"{self._plan.ns_type.__qualname__!r} view has no field {name!r}"
+            )
+        return self._values[i]
+
+    def __setattr__(self, name: str, value: object):
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
+
+    def __delattr__(self, name: str):
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
+
+    def _items(self) -> Iterator[tuple[str, object]]:
+        for (name, _, _), value in zip(self._plan.fields, self._values):
+            if value is not _MISSING:
+                yield name, value
+
+    def _asdict(self) -> dict[str, object]:
+        return dict(self._items())
+
+    @property
+    def ns_type(self) -> type:
+        return self._plan.ns_type
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, FrozenNamespace):
+            return NotImplemented
+        return (
+            self._plan.ns_type is other._plan.ns_type
+            and self._asdict() == other._asdict()
+        )
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            object.__setattr__(self, '_hash', hash((self._plan.ns_type, frozenset(self._items()))))
+        return self._hash # type: ignore
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f'{name}={value!r}' for name, value in self._items())
+        return f'{self._plan.ns_type.__qualname__}({fields})'
+
+def freeze(wrapper: 'BaseWrapper', obj: object) -> FrozenNamespace:
+    """Returns a `FrozenNamespace` of `obj`, a result parsed by `wrapper`."""
+
+    plan = field_plan(wrapper)
+    _check(plan, obj)
+    values = list[object]()
+    for name, _, sub in plan.fields:
+        value = getattr(obj, name, _MISSING)
+        if value is _MISSING:
+            pass
+        elif sub is not None and value is not None:
+            value = freeze(sub, value)
+        else:
+            value = _freeze(value)
+        values.append(value)
+    return FrozenNamespace(plan, tuple(values))
+
+def _encode(value: object, write: Callable[[bytes], object]) -> None:
+    t = type(value)
+    if value is None:
+        write(b'N')
+    elif t is bool:
+        write(b'T' if value else b'F')
+    elif isinstance(value, Enum):
+        write(b'e' + _label(f'{t.__module__}.{t.__qualname__}'))
+        _encode(value.value, write)
+    elif isinstance(value, int):
+        write(b'i' + _label(str(int(value))))
+    elif isinstance(value, float):
+        write(b'f' + _label(float(value).hex()))
+    elif isinstance(value, complex):
+        write(b'c' + _label(value.real.hex()) + _label(value.imag.hex()))
+    elif isinstance(value, str):
+        write(b's' + _label(value))
+    elif isinstance(value, bytes | bytearray | memoryview):
+        data = bytes(value)
+        write(b'b' + _length(len(data)) + data)
+    elif isinstance(value, os.PathLike):
+        write(b'p' + _label(os.fsdecode(os.fspath(value))))
+    elif isinstance(value, array):
+        # arrays are hashed as stored, in little-endian byte order
+        if sys.byteorder != 'little' and value.itemsize > 1:
+            value = array(value.typecode, value)
+            value.byteswap()
+        write(b'a' + value.typecode.encode() + _length(len(value)))
+        write(value.tobytes())
+    elif isinstance(value, Set | Mapping):
+        items = value.items() if isinstance(value, Mapping) else value
+        encoded = list[bytes]()
+        for item in items:
+            parts = list[bytes]()
+            _encode(item, parts.append)
+            encoded.append(b''.join(parts))
+        encoded.sort()
+        write((b'd' if isinstance(value, Mapping) else b'S') + _length(len(encoded)))
+        for data in encoded:
+            write(data)
+    elif isinstance(value, Sequence):
+        write(b'l' + _length(len(value)))
+        for item in value:
+            _encode(item, write)
+    else:
+        raise TypeError(f"cannot fingerprint a value of type {t.__qualname__}")
+
+def _fingerprint_into(wrapper: 'BaseWrapper', obj: object, write: Callable[[bytes], object]) -> None:
+    plan = field_plan(wrapper)
+    _check(plan, obj)
+    write(plan.header)
+    for name, label, sub in plan.fields:
+        value = getattr(obj, name, _MISSING)
+        if value is _MISSING:
+            continue
+        write(label)
+        if sub is not None and value is not None:
+            _fingerprint_into(sub, value, write)
+        else:
+            _encode(value, write)
+
+def fingerprint(wrapper: 'BaseWrapper', obj: object, digest_size: int = 16) -> str:
+    """Returns a hex BLAKE2b digest of the fields of `obj`, a result parsed by `wrapper`.
+
+    The digest only depends on the class names, the field names and the
+    field values, so it is the same across processes, runs and platforms.
+
+    Args:
+        wrapper (`BaseWrapper`): The wrapper that parsed `obj`.
+        obj (`object`): The parsed result.
+        digest_size (`int`, optional): Digest size in bytes, 1 to 64. Defaults to 16.
+
+    Returns:
+        out (`str`): The digest as a hex string.
+    """
+    import hashlib
+    h = hashlib.blake2b(digest_size=digest_size, person=_FINGERPRINT_PERSON)
+    _fingerprint_into(wrapper, obj, h.update)
+    return h.hexdigest()
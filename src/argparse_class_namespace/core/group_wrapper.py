@@ -7,7 +7,7 @@ from typing import (
 )
 import argparse
 from .base_wrapper import (
-    _return_bool,
+    _return_bool, _add_argument,
     BaseWrapper, AddWrapperKwargs,
     WrapperOptions, WrapperOptionsPartial
 )
@@ -79,7 +79,7 @@ class GroupWrapper(BaseWrapper[_NS_co]):
             bindname
         )
         for args, kwargs in self._dummy_container.args_kwargs:
-            self.container.add_argument(*args, **kwargs)
+            _add_argument(self.container, args, kwargs)
         self.container.set_defaults(
             _argument_group_wrapper_bind_name=bindname,
             _argument_group_wrapper_instance=self
@@ -0,0 +1,120 @@
+import sys
+import weakref
+import argparse
+from typing import TYPE_CHECKING, Sequence
+
+from . import disk_cache, profiler
+from .fields import source_modules
+
+if TYPE_CHECKING:
+    from .base_wrapper import BaseWrapper
+
+_HELP_CACHE_VERSION = 1
+
+# bumped whenever a wrapper tree gains arguments, subcommands or defaults
+_generation = 0
+
+_rendered = weakref.WeakKeyDictionary[argparse.ArgumentParser, tuple[tuple, str]]()
+
+def invalidate() -> None:
+    global _generation
+    _generation += 1
+
+def _terminal_width() -> int:
+    import shutil
+    return shutil.get_terminal_size().columns
+
+def _tree_modules(wrapper: 'BaseWrapper') -> dict[str, list[int] | None]:
+    modules = dict[str, list[int] | None]()
+    stack = [wrapper]
+    while stack:
+        current = stack.pop()
+        # fields may come from bases defined in other modules
+        for module_name in source_modules(current.ns_type):
+            path = disk_cache.module_file(module_name)
+            if path is not None and path not in modules:
+                fingerprint = disk_cache.file_fingerprint(path)
+                modules[path] = None if fingerprint is None else list(fingerprint)
+        stack.extend(current._argument_groups.values())
+        stack.extend(current._subnamespaces.values())
+    return modules
+
+def _persisted_path(parser: argparse.ArgumentParser, wrapper: 'BaseWrapper', width: int) -> str | None:
+    formatter = parser.formatter_class
+    return disk_cache.cache_path('help', '\0'.join((
+        str(_HELP_CACHE_VERSION), f'{sys.version_info[0]}.{sys.version_info[1]}',
+        f'{formatter.__module__}.{formatter.__qualname__}',
+        f'{wrapper.ns_type.__module__}.{wrapper.ns_type.__qualname__}',
+        parser.prog, str(width),
+    )))
+
+def read_persisted_help(
+    parser: argparse.ArgumentParser,
+    wrapper: 'BaseWrapper',
+    actions: int | None = None
+    ) -> str | None:
+    """Returns the help of `parser` stored in the cache directory, if the
+    modules defining its wrapper tree are unchanged.
+
+    `actions` is the number of actions `parser` has; None skips that check
+    for a subcommand parser that is not built yet.
+    """
+    path = _persisted_path(parser, wrapper, _terminal_width())
+    if path is None:
+        return None
+    entry = disk_cache.read_json(path)
+    if not isinstance(entry, dict) or not isinstance(entry.get('text', None), str):
+        return None
+    if actions is not None and entry.get('actions', None) != actions:
+        return None
+    modules = entry.get('modules', None)
+    if not isinstance(modules, dict) or not modules:
+        return None
+    for module_path, fingerprint in modules.items():
+        current = disk_cache.file_fingerprint(module_path)
+        if current is None or fingerprint is None or list(current) != fingerprint:
+            return None
+    return entry['text']
+
+def render_help(parser: argparse.ArgumentParser) -> str:
+    """Returns `parser.format_help()`, reusing the text rendered for the same
+    width and formatter class until the wrapper tree changes."""
+
+    width = _terminal_width()
+    key = (
+        width, parser.formatter_class, parser.prog,
+        len(parser._actions), len(parser._action_groups), _generation
+    )
+    cached = _rendered.get(parser, None)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    wrapper = parser._defaults.get('_namespace_wrapper_instance', None)
+    with profiler.phase('help', getattr(wrapper, 'ns_type', None)):
+        text = None if wrapper is None else read_persisted_help(parser, wrapper, len(parser._actions))
+        if text is None:
+            text = parser.format_help()
+            path = None if wrapper is None else _persisted_path(parser, wrapper, width)
+            if path is not None:
+                disk_cache.write_json(path, {
+                    'modules': _tree_modules(wrapper),
+                    'actions': len(parser._actions),
+                    'text': text,
+                })
+
+    _rendered[parser] = (key, text)
+    return text
+
+def requests_help(parser: argparse.ArgumentParser, arg_strings: Sequence[str]) -> bool:
+    """Whether argparse would print the help of `parser` before looking at anything else."""
+    if not arg_strings:
+        return False
+    action = parser._option_string_actions.get(arg_strings[0], None)
+    return isinstance(action, CachedHelpAction)
+
+class CachedHelpAction(argparse._HelpAction):
+    """`-h/--help` that prints the help through `render_help`."""
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        parser._print_message(render_help(parser), sys.stdout)
+        parser.exit()
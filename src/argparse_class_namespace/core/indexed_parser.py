@@ -0,0 +1,72 @@
+import argparse
+from bisect import bisect_left
+
+from .compact import WrapperArgumentParser
+
+class _OptionIndex:
+
+    __slots__ = ('key', 'sorted_strings', 'order')
+
+    def __init__(self, parser: argparse.ArgumentParser):
+        self.key = (len(parser._option_string_actions), len(parser._actions))
+        self.order = {
+            option_string: i
+            for i, option_string in enumerate(parser._option_string_actions)
+        }
+        self.sorted_strings = sorted(self.order)
+
+    def with_prefix(self, prefix: str) -> list[str]:
+        strings = self.sorted_strings
+        matches = list[str]()
+        i = bisect_left(strings, prefix)
+        while i < len(strings) and strings[i].startswith(prefix):
+            matches.append(strings[i])
+            i += 1
+        return matches
+
+class _CandidateView:
+    # what `ArgumentParser._get_option_tuples` reads from the parser, with
+    # only the option strings that can match
+    __slots__ = ('prefix_chars', 'allow_abbrev', '_option_string_actions', 'error')
+
+    def __init__(self, parser: argparse.ArgumentParser, candidates: dict[str, argparse.Action]):
+        self.prefix_chars = parser.prefix_chars
+        self.allow_abbrev = parser.allow_abbrev
+        self._option_string_actions = candidates
+        self.error = parser.error
+
+class IndexedArgumentParser(WrapperArgumentParser):
+    """An `ArgumentParser` that matches abbreviated options through a sorted index.
+
+    argparse compares an abbreviated option against every option string of
+    the parser. Here the option strings that share its prefix are found by
+    bisection, and argparse's own matching runs on those alone, so results,
+    their order and the error messages are unchanged. The index is rebuilt
+    when options are added. Subcommands are already looked up by name in a
+    dict.
+    """
+
+    _option_index: _OptionIndex | None = None
+
+    def _get_option_index(self) -> _OptionIndex:
+        index = self._option_index
+        if index is None or index.key != (len(self._option_string_actions), len(self._actions)):
+            index = self._option_index = _OptionIndex(self)
+        return index
+
+    def _get_option_tuples(self, option_string: str):
+        if len(option_string) < 2 or option_string[0] not in self.prefix_chars:
+            return super()._get_option_tuples(option_string)
+
+        index = self._get_option_index()
+        # every match starts with the part before '=', except a short option
+        # directly followed by its argument, e.g. `-n5`
+        strings = index.with_prefix(option_string.partition('=')[0])
+        short = option_string[:2]
+        if short in index.order and short not in strings:
+            strings.append(short)
+        strings.sort(key=index.order.__getitem__)
+
+        actions = self._option_string_actions
+        view = _CandidateView(self, {s: actions[s] for s in strings})
+        return argparse.ArgumentParser._get_option_tuples(view, option_string) # type: ignore
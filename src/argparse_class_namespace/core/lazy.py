@@ -0,0 +1,26 @@
+import sys
+from types import ModuleType
+from typing import Callable, Mapping
+
+def loaded(name: str) -> ModuleType | None:
+    """Returns the module `name` of this package if it was imported already.
+
+    For optional features whose objects can only exist once their module
+    was imported, e.g. `ResponseFile()` metadata or a loaded snapshot.
+    """
+    return sys.modules.get(f'{__package__}.{name}', None)
+
+def lazy_exports(package: str, exports: Mapping[str, str]) -> Callable[[str], object]:
+    """Returns a module `__getattr__` importing each of `exports` (name ->
+    relative module) on first access, so importing `package` stays cheap."""
+
+    def __getattr__(name: str) -> object:
+        module_name = exports.get(name, None)
+        if module_name is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        from importlib import import_module
+        value = getattr(import_module(module_name, package), name)
+        setattr(sys.modules[package], name, value)
+        return value
+
+    return __getattr__
@@ -1,22 +1,34 @@
 from typing import (
     TypeVar, Generic, Protocol, ParamSpec, runtime_checkable,
-    Callable, Sequence,
+    Callable, Sequence, Iterable, Iterator,
     Union, Literal, Unpack, Concatenate,
-    TypedDict, DefaultDict,
+    TypedDict, DefaultDict, TYPE_CHECKING,
     Self, Any, overload
 )
 from types import UnionType
-from itertools import chain
+import os
+import sys
 import argparse
-import argcomplete
 
 from .base_wrapper import (
-    _return_bool,
+    _return_bool, _tree_lock,
     BaseWrapper, AddWrapperKwargs,
     WrapperOptions, WrapperOptionsPartial,
 )
 from .group_wrapper import GroupWrapper
-from .variable_docstring import get_variable_docstrings
+from .indexed_parser import IndexedArgumentParser
+from .routing import RoutingTable, compile_routing_table
+from .lazy import loaded
+from . import profiler, help_cache
+
+if TYPE_CHECKING:
+    import asyncio
+    from .batch import ParseOutcome, ParseManyOptionsPartial
+    from .daemon import ServeOptionsPartial
+    from .dispatch import DispatchOutcome, DispatchOptionsPartial
+    from .fingerprint import FrozenNamespace
+    from .result_cache import ResultCache, ResultCacheInfo
+    from . import sources
 
 _NS = TypeVar('_NS', bound=object)
 _NS_co = TypeVar('_NS_co', covariant=True, bound=object)
@@ -39,8 +51,25 @@ class AddParserDefaults(TypedDict, Generic[_NS]):
 
 class NamespaceOptions(WrapperOptions):
     parser: argparse.ArgumentParser
+    lazy: bool
+    config_files: Sequence['str | os.PathLike[str]']
+    env_prefix: str | None
+    result_cache: int
+    indexed: bool
+    response_file_prefix_chars: str | None
 class NamespaceOptionsPartial(WrapperOptionsPartial, total=False):
     parser: argparse.ArgumentParser
+    lazy: bool
+    config_files: Sequence['str | os.PathLike[str]']
+    """TOML or JSON files read before argv; later files override earlier ones."""
+    env_prefix: str | None
+    """Reads `<env_prefix><FIELD>` environment variables, overriding config files."""
+    result_cache: int
+    """Keeps the parsed values of this many recent command lines; 0 disables it."""
+    indexed: bool
+    """Builds the parser as an `IndexedArgumentParser`, for parsers with very many options."""
+    response_file_prefix_chars: str | None
+    """Like argparse's `fromfile_prefix_chars` (one argument per line), but files are memory-mapped and read line by line."""
 def _resolve_namespace_options(full: NamespaceOptions, partial: NamespaceOptionsPartial) -> NamespaceOptions:
     options = full.copy()
     options.update(partial)
@@ -55,6 +84,19 @@ def _resolve_callback_options(full: CallbackOptions, partial: CallbackOptionsPar
     options.update(partial)
     return options
 
+class RunOptions(TypedDict):
+    name: str | None
+    """Which callback of the selected namespace to call; needed when it has several."""
+    loop: 'asyncio.AbstractEventLoop | None'
+    """Event loop to run `async def` callbacks on instead of a new one per call."""
+class RunOptionsPartial(TypedDict, total=False):
+    name: str | None
+    loop: 'asyncio.AbstractEventLoop | None'
+def _resolve_run_options(full: RunOptions, partial: RunOptionsPartial) -> RunOptions:
+    options = full.copy()
+    options.update(partial)
+    return options
+
 class NamespaceWithOptions(Protocol):
     @overload
     def __call__(
@@ -85,9 +127,78 @@ class CallbackWithOptions(Protocol):
         func: Callable[Concatenate[_NS, _P], _R]
         ) -> Callable[Concatenate[_NS, _P], _R]: ...
 
+class _DeferredSubParsersAction(argparse._SubParsersAction):
+    """Subparsers action that builds lazy subcommands when they are selected."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._deferred = dict[str, tuple['NamespaceWrapper', argparse.ArgumentParser]]()
+
+    def defer(self, name: str, wrapper: 'NamespaceWrapper', parser: argparse.ArgumentParser):
+        self._deferred[name] = (wrapper, parser)
+
+    def materialize(self, name: str):
+        if name not in self._deferred:
+            return
+        with _tree_lock:
+            deferred = self._deferred.get(name, None)
+            if deferred is None:
+                return
+            wrapper, parser = deferred
+            with profiler.phase('materialize_subcommand', wrapper.ns_type):
+                wrapper._build()
+                # same as `parents=[wrapper.container]`, done on first use
+                parser._add_container_actions(wrapper.parser)
+                parser._defaults.update(wrapper.parser._defaults)
+            # dropped only once built, so other threads wait above until then
+            del self._deferred[name]
+            help_cache.invalidate()
+
+    def _print_persisted_help(self, name: str, arg_strings: Sequence[str]):
+        # `cmd -h` on a subcommand that is not built yet: print its help
+        # from the cache directory without building it
+        deferred = self._deferred.get(name, None)
+        if deferred is None:
+            return
+        wrapper, parser = deferred
+        if not help_cache.requests_help(wrapper.parser, arg_strings):
+            return
+        text = help_cache.read_persisted_help(parser, wrapper)
+        if text is not None:
+            parser._print_message(text, sys.stdout)
+            parser.exit()
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        if values:
+            self._print_persisted_help(values[0], values[1:])
+            self.materialize(values[0])
+        # a parent namespace only carries a layer once `sources` seeded it
+        sources = loaded('sources')
+        layer = None if sources is None or not values else sources.selected_layer(namespace, values[0])
+        if layer is None or values[0] not in self._name_parser_map:
+            super().__call__(parser, namespace, values, option_string)
+            return
+
+        # as in `_SubParsersAction.__call__`, but the fresh namespace the
+        # subcommand is parsed into starts with its config and env values
+        parser_name, *arg_strings = values
+        if self.dest is not argparse.SUPPRESS:
+            setattr(namespace, self.dest, parser_name)
+        subnamespace = type(namespace)()
+        layer.seed(subnamespace)
+        subnamespace, arg_strings = self._name_parser_map[parser_name].parse_known_args(
+            arg_strings, subnamespace
+        )
+        for key, value in vars(subnamespace).items():
+            setattr(namespace, key, value)
+        if arg_strings:
+            vars(namespace).setdefault(argparse._UNRECOGNIZED_ARGS_ATTR, [])
+            getattr(namespace, argparse._UNRECOGNIZED_ARGS_ATTR).extend(arg_strings)
+
 class ParseResult(Generic[_NS_co], argparse.Namespace):
     _namespace_wrapper_bind_name: str
     _namespace_wrapper_instance: BaseWrapper[_NS_co]
+    _namespace_wrapper_source_layer: 'sources.SourceLayer'
 
 class NamespaceWrapper(BaseWrapper[_NS_co]):
 
@@ -110,7 +221,7 @@ class NamespaceWrapper(BaseWrapper[_NS_co]):
             'add_help': False,
             'parents': (
                 [inst.container]
-                if isinstance(inst.container, argparse.ArgumentParser)
+                if inst._built and isinstance(inst.container, argparse.ArgumentParser)
                 else []
             ),
             'help': self._docstrings.get(attrname, None)
@@ -127,16 +238,94 @@ class NamespaceWrapper(BaseWrapper[_NS_co]):
             '_namespace_wrapper_instance': self
         }))
 
+        self._routing_tables = dict[bool, RoutingTable]()
+        self._callbacks = dict[str, Callable[..., object]]()
+        maxsize = options.get('result_cache', 0)
+        self._result_cache: 'ResultCache | None' = None
+        if maxsize:
+            from .result_cache import ResultCache
+            self._result_cache = ResultCache(maxsize)
+
         super().__init__(ns_type, options)
 
+    def _is_lazy(self) -> bool:
+        return self._options.get('lazy', False)
+
     def add_wrapper(self, target: BaseWrapper, *args: str, **kwargs: Unpack[AddParserKwargs]):
         if not isinstance(target.container, argparse.ArgumentParser):
             raise TypeError(
                 f"Expected target.container to be an ArgumentParser, got {type(target.container).__name__}"
             )
-        if target._subparsers is None:
-            target._subparsers = target.container.add_subparsers()
-        target._subparsers.add_parser(*args, **kwargs)
+        help_cache.invalidate()
+        with profiler.phase('add_parser', self._ns_co_type):
+            if target._subparsers is None:
+                target._subparsers = target.container.add_subparsers(
+                    action=_DeferredSubParsersAction
+                )
+            parser = target._subparsers.add_parser(*args, **kwargs)
+        if not self._built and isinstance(target._subparsers, _DeferredSubParsersAction):
+            target._subparsers.defer(args[0], self, parser)
+        if self._bindname is not None:
+            target._subnamespaces[self._bindname] = self
+
+    def materialize(self, recursive: bool = True):
+        """Builds this namespace now instead of on first use.
+
+        With `recursive`, every lazy subcommand below it is built as well,
+        which is what a full help or completion of the tree needs.
+        """
+        self._build()
+        if not recursive:
+            return
+        if isinstance(self._subparsers, _DeferredSubParsersAction):
+            for name in list(self._subparsers._deferred):
+                self._subparsers.materialize(name)
+        for subnamespace in self._subnamespaces.values():
+            if isinstance(subnamespace, NamespaceWrapper):
+                subnamespace.materialize(recursive)
+
+    def freeze(self) -> Self:
+        """
+        Builds the whole tree below this namespace and makes it read-only.
+
+        `parse_args` and the methods built on it may be called from many
+        threads at once; without freezing, the first calls build lazy parts
+        under a lock. After `freeze` every lazy subcommand is built and the
+        routing tables, result types, field plans and option indexes are
+        computed, so parsing only reads them and takes no lock except for
+        the result cache. `set_defaults` and `callback` then raise
+        `RuntimeError` anywhere in the tree. Freezing again does nothing.
+
+        Returns:
+            out (`Self`): This wrapper.
+        """
+        from . import fingerprint
+        with _tree_lock:
+            self.materialize(recursive=True)
+            stack: list[BaseWrapper] = [self]
+            while stack:
+                current = stack.pop()
+                current.result_type
+                fingerprint.field_plan(current)
+                if isinstance(current, NamespaceWrapper):
+                    # parsed through the root, or on its own
+                    current._routing_table(False)
+                    current._routing_table(True)
+                    parsers = [current.parser]
+                    if current._subparsers is not None:
+                        parsers.extend(current._subparsers._name_parser_map.values())
+                    for parser in parsers:
+                        if isinstance(parser, IndexedArgumentParser):
+                            parser._get_option_index()
+                current._frozen = True
+                stack.extend(current._argument_groups.values())
+                stack.extend(current._subnamespaces.values())
+        return self
+
+    @property
+    def is_frozen(self) -> bool:
+        """Whether `freeze` was called on this namespace or one above it."""
+        return self._frozen
 
     @property
     def ns_type(self) -> type[_NS_co]:
@@ -149,6 +338,7 @@ class NamespaceWrapper(BaseWrapper[_NS_co]):
         return self._subparsers
     @property
     def attrnames(self) -> list[str]:
+        self._build()
         return list(self._attrnames)
     @property
     def parser(self) -> argparse.ArgumentParser:
@@ -214,9 +404,10 @@ class NamespaceWrapper(BaseWrapper[_NS_co]):
         )
 
         def decorator(func: Callable[Concatenate[_NS, _P], _R]) -> Callable[Concatenate[_NS, _P], _R]:
-            self.set_defaults(**{
-                resolved_options['name'] or func.__name__: func
-            })
+            self._check_mutable('callback')
+            name = resolved_options['name'] or func.__name__
+            self.set_defaults(**{name: func})
+            self._callbacks[name] = func
             return func
 
         if func is None:
@@ -224,61 +415,263 @@ class NamespaceWrapper(BaseWrapper[_NS_co]):
         else:
             return decorator(func)
 
-    def parse_args(self: 'NamespaceWrapper[_NS]', args: Sequence[str] | None = None) -> _NS:
-        
-        argcomplete.autocomplete(self.parser)
-        parse_result = self.parser.parse_args(args, ParseResult[_NS]())
-        ns_wrapper_instance = parse_result._namespace_wrapper_instance
-        ns_wrapper_bind_name = parse_result._namespace_wrapper_bind_name
+    def _routing_table(self, is_root: bool) -> RoutingTable:
+        table = self._routing_tables.get(is_root, None)
+        if table is None:
+            with _tree_lock:
+                table = self._routing_tables.get(is_root, None)
+                if table is None:
+                    table = self._routing_tables[is_root] = compile_routing_table(self, is_root)
+        return table
+
+    def _materialize_values(self: 'NamespaceWrapper[_NS]', values: dict[str, object]) -> _NS:
+
+        ns_wrapper_instance = values.get('_namespace_wrapper_instance', None)
         if not isinstance(ns_wrapper_instance, NamespaceWrapper):
             # Never
             raise ValueError(
                 "ParseResult does not contain a valid NamespaceWrapper instance."
             )
 
-        ns: _NS = ns_wrapper_instance._ns_co_type()
-        attrname_to_gname = dict[str, str]()
-        gname_to_gns = dict[str, object]()
-        for agname, agwrapper in ns_wrapper_instance._argument_groups.items():
-            attrname_to_gname.update(
-                (attrname, agname)
-                for attrname in agwrapper.attrnames
+        with profiler.phase('materialize', ns_wrapper_instance._ns_co_type):
+            table = ns_wrapper_instance._routing_table(ns_wrapper_instance is self)
+            return table.materialize(values) # type: ignore
+
+    def _materialize(self: 'NamespaceWrapper[_NS]', parse_result: ParseResult[_NS]) -> _NS:
+        return self._materialize_values(vars(parse_result))
+
+    def set_defaults(self, **kwargs: object):
+        self._check_mutable('set_defaults')
+        with _tree_lock:
+            # fallback defaults are part of the compiled routing tables, and
+            # cached results of this namespace and its parents hold the defaults
+            self._routing_tables.clear()
+            current: BaseWrapper | None = self
+            while current is not None:
+                if isinstance(current, NamespaceWrapper) and current._result_cache is not None:
+                    current._result_cache.clear()
+                current = current._parent
+            return super().set_defaults(**kwargs)
+
+    def result_cache_info(self) -> 'ResultCacheInfo | None':
+        """Hit, miss and eviction counters of the result cache, or None when it is disabled."""
+        if self._result_cache is None:
+            return None
+        return self._result_cache.info()
+
+    def clear_result_cache(self):
+        if self._result_cache is not None:
+            self._result_cache.clear()
+
+    def _new_parse_result(self: 'NamespaceWrapper[_NS]') -> ParseResult[_NS]:
+        parse_result = ParseResult[_NS]()
+        if not self._options.get('config_files', None) and self._options.get('env_prefix', None) is None:
+            # no sources to layer, so `sources` is not even imported
+            return parse_result
+        from . import sources
+        layer = sources.root_layer(self)
+        if layer is not None:
+            with profiler.phase('sources', self._ns_co_type):
+                layer.seed(parse_result)
+        return parse_result
+
+    def _parse_values(self, args: Sequence[str] | None, complete: bool = True) -> dict[str, object]:
+
+        self._build()
+        prefix_chars = self._options.get('response_file_prefix_chars', None)
+        if prefix_chars:
+            from .response_file import expand_response_files
+            args = expand_response_files(
+                sys.argv[1:] if args is None else args,
+                prefix_chars,
+                self.parser.convert_arg_line_to_args,
+                self.parser.error
             )
-            agns = agwrapper._ns_co_type()
-            gname_to_gns[agname] = agns
-            setattr(ns, agname, agns)
-
-        for attrname in chain(
-            attrname_to_gname.keys(),
-            ns_wrapper_instance.attrnames,
-            ns_wrapper_instance.default_keys):
-
-            if (
-                ns_wrapper_instance is self
-                and ns_wrapper_instance.subparsers
-                and (
-                    any(
-                        attrname.replace('_', pc) in ns_wrapper_instance.subparsers.choices
-                        for pc in ns_wrapper_instance.parser.prefix_chars
-                    )
-                    or attrname in ns_wrapper_instance.subparsers.choices
-                    )
-                ):
-                continue
-            if not hasattr(parse_result, attrname):
-                if default := ns_wrapper_instance.container.get_default(attrname):
-                    setattr(ns, attrname, default)
-            elif (gname := attrname_to_gname.get(attrname, None)) is None:
-                setattr(ns, attrname, getattr(parse_result, attrname))
-            else:
-                gns_inst = gname_to_gns[gname]
-                setattr(gns_inst, attrname, getattr(parse_result, attrname))
-
-        while ns_wrapper_bind_name is not None and ns_wrapper_instance._parent is not None:
-            ns_wrapper_instance = ns_wrapper_instance._parent
-            new_ns = ns_wrapper_instance._ns_co_type()
-            setattr(new_ns, ns_wrapper_bind_name, ns)
-            ns_wrapper_bind_name = ns_wrapper_instance.container.get_default('_namespace_wrapper_bind_name')
-            ns = new_ns
+        if complete and '_ARGCOMPLETE' in os.environ:
+            # only pay for importing argcomplete when the shell asks for completions
+            with profiler.phase('autocomplete', self._ns_co_type):
+                import argcomplete
+                argcomplete.autocomplete(self.parser)
+
+        cache = self._result_cache
+        if cache is None:
+            with profiler.phase('parse', self._ns_co_type):
+                return vars(self.parser.parse_args(args, self._new_parse_result()))
 
+        from . import sources
+        key = (
+            tuple(sys.argv[1:] if args is None else args),
+            sources.source_fingerprint(self)
+        )
+        values = cache.get(key)
+        if values is None:
+            with profiler.phase('parse', self._ns_co_type):
+                values = vars(self.parser.parse_args(args, self._new_parse_result()))
+            values.pop(sources._LAYER_ATTR, None)
+            # set by typing when instantiating `ParseResult[_NS]`, not a parsed value
+            values.pop('__orig_class__', None)
+            cache.put(key, values)
+        return values
+
+    def _selected_path(self, selected: 'NamespaceWrapper') -> tuple[str, ...]:
+        # the bind names leading from this wrapper down to `selected`
+        path = list[str]()
+        current: BaseWrapper | None = selected
+        while current is not None and current is not self and current._bindname is not None:
+            path.append(current._bindname)
+            current = current._parent
+        return tuple(reversed(path))
+
+    def _selected_namespace(self, ns: object, selected: 'NamespaceWrapper') -> object:
+        # follows the bind names from `ns` down to the object of `selected`
+        for bindname in self._selected_path(selected):
+            ns = getattr(ns, bindname)
         return ns
+
+    def parse_args(self: 'NamespaceWrapper[_NS]', args: Sequence[str] | None = None) -> _NS:
+        return self._materialize_values(self._parse_values(args))
+
+    def _select_callback(
+        self,
+        args: Sequence[str] | None,
+        name: str | None
+        ) -> tuple[Callable[..., object], object]:
+
+        values = self._parse_values(args)
+        selected = values['_namespace_wrapper_instance']
+        if not isinstance(selected, NamespaceWrapper):
+            # Never
+            raise ValueError(
+                "ParseResult does not contain a valid NamespaceWrapper instance."
+            )
+        func = selected._callback_for(name)
+        return func, self._selected_namespace(self._materialize_values(values), selected)
+
+    def _callback_for(self, name: str | None) -> Callable[..., object]:
+        if name is not None:
+            func = self._callbacks.get(name, None)
+            if func is None:
+                raise ValueError(
+                    f"{self.ns_type.__name__} has no callback named {name!r}"
+                )
+            return func
+        if len(self._callbacks) == 1:
+            (func,) = self._callbacks.values()
+            return func
+        if not self._callbacks:
+            self.parser.error("no command to run; choose a subcommand")
+        raise ValueError(
+            f"{self.ns_type.__name__} has several callbacks "
+            f"({', '.join(self._callbacks)}); pass name= to choose one"
+        )
+
+    def run(
+        self,
+        args: Sequence[str] | None = None,
+        /,
+        **kwargs: Unpack[RunOptionsPartial]
+        ) -> Any:
+        """
+        Parses `args` and calls the callback registered on the selected
+        (sub)namespace with its materialized object.
+
+        Args:
+            args (`Sequence[str] | None`, optional): The arguments to parse;
+                `sys.argv[1:]` when None.
+            **kwargs (`*RunOptionsPartial`): `name` selects one of several
+                callbacks. `async def` callbacks run on a new event loop per
+                call, or on `loop` when given; a loop running in another
+                thread is used through `asyncio.run_coroutine_threadsafe`.
+
+        Returns:
+            out (`Any`): What the callback returned, awaited if needed.
+        """
+
+        options = _resolve_run_options(RunOptions(name=None, loop=None), kwargs)
+        func, ns = self._select_callback(args, options['name'])
+        result = func(ns)
+        if not hasattr(result, '__await__'):
+            return result
+
+        # only pay for importing asyncio when a callback is a coroutine
+        import asyncio
+        loop = options['loop']
+        if loop is None:
+            return asyncio.run(result) # type: ignore
+        if not loop.is_running():
+            return loop.run_until_complete(result) # type: ignore
+        if asyncio._get_running_loop() is loop:
+            result.close() # type: ignore
+            raise RuntimeError(
+                "run() cannot wait on the event loop of the current thread; use run_async()"
+            )
+        return asyncio.run_coroutine_threadsafe(result, loop).result() # type: ignore
+
+    async def run_async(
+        self,
+        args: Sequence[str] | None = None,
+        /,
+        name: str | None = None
+        ) -> Any:
+        """Like `run`, for callers already inside an event loop."""
+        func, ns = self._select_callback(args, name)
+        result = func(ns)
+        if hasattr(result, '__await__'):
+            return await result # type: ignore
+        return result
+
+    def frozen(self: 'NamespaceWrapper[_NS]', ns: _NS) -> 'FrozenNamespace':
+        """
+        Returns an immutable, hashable view of `ns`, a result of this namespace,
+        including its groups and selected subcommands. See `fingerprint.freeze`.
+        """
+        from .fingerprint import freeze
+        return freeze(self, ns)
+
+    def fingerprint(self: 'NamespaceWrapper[_NS]', ns: _NS, digest_size: int = 16) -> str:
+        """
+        Returns a stable hex digest of the content of `ns`, a result of this
+        namespace. See `fingerprint.fingerprint`.
+        """
+        from .fingerprint import fingerprint
+        return fingerprint(self, ns, digest_size)
+
+    def parse_many(
+        self: 'NamespaceWrapper[_NS]',
+        argvs: Iterable[Sequence[str]],
+        /,
+        **kwargs: Unpack['ParseManyOptionsPartial']
+        ) -> 'Iterator[ParseOutcome[_NS]]':
+        """
+        Parses many argument vectors, yielding one `ParseOutcome` per argv in input order.
+        See `batch.parse_many` for the options.
+        """
+        from .batch import parse_many
+        return parse_many(self, argvs, **kwargs)
+
+    def dispatch(
+        self,
+        argvs: Iterable[Sequence[str]],
+        /,
+        **kwargs: Unpack['DispatchOptionsPartial']
+        ) -> 'Iterator[DispatchOutcome]':
+        """
+        Runs the selected callback for many argument vectors concurrently,
+        yielding one `DispatchOutcome` per argv in completion order.
+        See `dispatch.dispatch` for the options.
+        """
+        from .dispatch import dispatch
+        return dispatch(self, argvs, **kwargs)
+
+    def serve(
+        self,
+        path: 'str | os.PathLike[str]',
+        /,
+        **kwargs: Unpack['ServeOptionsPartial']
+        ) -> None:
+        """
+        Serves invocations of this command line over a Unix socket at `path`
+        until interrupted. See `daemon.serve` for the options.
+        """
+        from .daemon import serve
+        serve(self, path, **kwargs)
@@ -0,0 +1,56 @@
+import copyreg
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .base_wrapper import BaseWrapper
+
+# `@namespace class Cli` rebinds `Cli` to the wrapper, so pickle cannot find
+# the class of a parsed result by its qualified name. Instances are reduced
+# to the qualified name instead and the class is looked up through `.T`.
+
+def resolve(module_name: str, qualname: str) -> object:
+    obj: object = importlib.import_module(module_name)
+    for part in qualname.split('.'):
+        if part == '<locals>':
+            raise ValueError(
+                f"Cannot resolve {module_name}.{qualname}: local classes are not importable"
+            )
+        if _is_wrapper(obj):
+            obj = obj.T # type: ignore
+        obj = getattr(obj, part)
+    return obj
+
+def resolve_type(module_name: str, qualname: str) -> type:
+    obj = resolve(module_name, qualname)
+    if _is_wrapper(obj):
+        obj = obj.T # type: ignore
+    if not isinstance(obj, type):
+        raise TypeError(f"{module_name}.{qualname} is not a class")
+    return obj
+
+def resolve_wrapper(module_name: str, qualname: str) -> 'BaseWrapper':
+    obj = resolve(module_name, qualname)
+    if not _is_wrapper(obj):
+        raise TypeError(f"{module_name}.{qualname} is not a wrapped namespace")
+    return obj # type: ignore
+
+def _is_wrapper(obj: object) -> bool:
+    from .base_wrapper import BaseWrapper
+    return isinstance(obj, BaseWrapper)
+
+def _reconstruct(module_name: str, qualname: str, state: dict[str, object] | None):
+    ns_type = resolve_type(module_name, qualname)
+    obj = ns_type.__new__(ns_type)
+    if state:
+        obj.__dict__.update(state)
+    return obj
+
+def _reduce(obj: object):
+    ns_type = type(obj)
+    return (_reconstruct, (ns_type.__module__, ns_type.__qualname__, getattr(obj, '__dict__', None)))
+
+def register(ns_type: type) -> None:
+    if '<locals>' in ns_type.__qualname__:
+        return
+    copyreg.pickle(ns_type, _reduce)
@@ -0,0 +1,151 @@
+import os
+import sys
+import time
+import atexit
+import _thread
+
+PROFILE_ENV = 'ARGPARSE_CLASS_NAMESPACE_PROFILE'
+
+# (phase, owner type, start ns, duration ns, allocated blocks delta, thread id)
+_Event = tuple[str, type | None, int, int, int, int]
+
+_enabled = False
+_output: str | None = None
+_exit_registered = False
+_events = list[_Event]()
+
+class _Phase:
+
+    __slots__ = ('name', 'owner', 'start', 'blocks')
+
+    def __init__(self, name: str, owner: type | None):
+        self.name = name
+        self.owner = owner
+
+    def __enter__(self):
+        self.blocks = sys.getallocatedblocks()
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter_ns()
+        _events.append((
+            self.name, self.owner,
+            self.start, end - self.start,
+            sys.getallocatedblocks() - self.blocks,
+            _thread.get_ident()
+        ))
+
+class _NullPhase:
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+_NULL_PHASE = _NullPhase()
+
+def phase(name: str, owner: type | None = None) -> _Phase | _NullPhase:
+    """Times the enclosed block as phase `name` of the wrapped class `owner`.
+
+    Does nothing unless profiling is enabled.
+    """
+    if not _enabled:
+        return _NULL_PHASE
+    return _Phase(name, owner)
+
+def _owner_name(owner: type | None) -> str:
+    if owner is None:
+        return '-'
+    return f'{owner.__module__}.{owner.__qualname__}'
+
+def enable_profiling(output: 'str | os.PathLike[str] | None' = None) -> None:
+    """Starts recording wall time and allocated blocks per phase and wrapped class.
+
+    Phases are decoration (`decorate`, `build`, `docstrings`, `prepare_arg`,
+    `add_parser`), building a lazy subcommand when it is selected
+    (`materialize_subcommand`) and every parse (`autocomplete`, `sources`,
+    `parse`, `materialize`). Durations are inclusive of nested phases.
+
+    Args:
+        output (`str | os.PathLike[str] | None`, optional): Where to write the
+            profile at exit: `'-'` for a report on stderr, a `.json` path for
+            a Chrome trace-event file (chrome://tracing, Perfetto), any other
+            path for a report file. None writes nothing; use `profile_report`
+            or `write_trace`. Setting the `ARGPARSE_CLASS_NAMESPACE_PROFILE`
+            environment variable to `1` or a path enables profiling from
+            import time in the same way.
+    """
+    global _enabled, _output, _exit_registered
+    _enabled = True
+    _output = None if output is None else os.fspath(output)
+    if _output is not None and not _exit_registered:
+        atexit.register(_write_at_exit)
+        _exit_registered = True
+
+def disable_profiling() -> None:
+    global _enabled
+    _enabled = False
+
+def reset_profile() -> None:
+    _events.clear()
+
+def profile_report() -> str:
+    """Returns the recorded phases per wrapped class, most expensive first."""
+
+    totals = dict[tuple[str, type | None], list[int]]()
+    for name, owner, _, duration, blocks, _ in list(_events):
+        total = totals.setdefault((name, owner), [0, 0, 0])
+        total[0] += 1
+        total[1] += duration
+        total[2] += blocks
+
+    rows = sorted(totals.items(), key=lambda item: item[1][1], reverse=True)
+    lines = [f"{'phase':<24} {'class':<48} {'calls':>7} {'total ms':>10} {'mean us':>10} {'blocks':>9}"]
+    for (name, owner), (calls, duration, blocks) in rows:
+        lines.append(
+            f'{name:<24} {_owner_name(owner):<48} {calls:>7} '
+            f'{duration / 1e6:>10.3f} {duration / calls / 1e3:>10.1f} {blocks:>9}'
+        )
+    return '\n'.join(lines) + '\n'
+
+def write_trace(path: 'str | os.PathLike[str]') -> None:
+    """Writes the recorded phases as a Chrome trace-event JSON file."""
+    import json
+    pid = os.getpid()
+    trace = {
+        'traceEvents': [
+            {
+                'name': f'{name} {owner.__qualname__}' if owner is not None else name,
+                'cat': name,
+                'ph': 'X',
+                'ts': start / 1e3,
+                'dur': duration / 1e3,
+                'pid': pid,
+                'tid': tid,
+                'args': {'class': _owner_name(owner), 'allocated_blocks': blocks},
+            }
+            for name, owner, start, duration, blocks, tid in list(_events)
+        ],
+        'displayTimeUnit': 'ms',
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(trace, f)
+
+def _write_at_exit():
+    if _output is None or not _events:
+        return
+    if _output == '-':
+        sys.stderr.write(profile_report())
+    elif _output.lower().endswith('.json'):
+        write_trace(_output)
+    else:
+        with open(_output, 'w', encoding='utf-8') as f:
+            f.write(profile_report())
+
+_env_output = os.environ.get(PROFILE_ENV, '')
+if _env_output and _env_output != '0':
+    enable_profiling('-' if _env_output.lower() in ('1', 'true', 'yes', 'on') else _env_output)
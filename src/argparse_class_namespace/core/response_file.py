@@ -0,0 +1,225 @@
+import os
+import sys
+import argparse
+from array import array
+from itertools import accumulate
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Sequence, overload
+
+from .disk_cache import file_fingerprint
+
+if TYPE_CHECKING:
+    import mmap
+
+# lines are split a block at a time, so memory stays bounded by the block
+# while the splitting itself runs in C
+_BLOCK_SIZE = 1 << 20
+
+def _encoding() -> tuple[str, str]:
+    return sys.getfilesystemencoding(), sys.getfilesystemencodeerrors()
+
+def _open_mmap(path: str) -> 'mmap.mmap | None':
+    import mmap
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def _iter_line_blocks(mm: 'mmap.mmap') -> Iterator[list[bytes]]:
+    size = len(mm)
+    start = 0
+    while start < size:
+        stop = min(start + _BLOCK_SIZE, size)
+        if stop < size:
+            newline = mm.rfind(b'\n', start, stop)
+            if newline < 0:
+                newline = mm.find(b'\n', stop)
+            stop = size if newline < 0 else newline + 1
+        lines = mm[start:stop].split(b'\n')
+        if lines[-1] == b'':
+            lines.pop()
+        yield lines
+        start = stop
+
+def iter_lines(path: 'str | os.PathLike[str]') -> Iterator[list[str]]:
+    """Yields the lines of a response file in blocks, read from a memory map.
+
+    Lines end in `\\n` or `\\r\\n`; a final line break does not start an
+    empty line. The file is decoded with the filesystem encoding.
+    """
+    encoding, errors = _encoding()
+    mm = _open_mmap(os.fspath(path))
+    if mm is None:
+        return
+    with mm:
+        for lines in _iter_line_blocks(mm):
+            yield [
+                (line[:-1] if line.endswith(b'\r') else line).decode(encoding, errors)
+                for line in lines
+            ]
+
+def expand_response_files(
+    arg_strings: Iterable[str],
+    prefix_chars: str,
+    convert_arg_line: Callable[[str], Iterable[str]],
+    error: Callable[[str], object]
+    ) -> list[str]:
+    """Replaces every argument starting with one of `prefix_chars` by the
+    arguments read from the file it names, like argparse's
+    `fromfile_prefix_chars`, including response files named inside
+    response files. Each line goes through `convert_arg_line`.
+    """
+
+    one_per_line = (
+        getattr(convert_arg_line, '__func__', None)
+        is argparse.ArgumentParser.convert_arg_line_to_args
+    )
+    expanded = list[str]()
+    # iterators of arguments, innermost file last
+    stack: list[tuple[Iterator[str], str | None]] = [(iter(arg_strings), None)]
+    active = set[str]()
+    while stack:
+        iterator, current = stack[-1]
+        for arg_string in iterator:
+            if not arg_string or arg_string[0] not in prefix_chars:
+                expanded.append(arg_string)
+                continue
+            path = os.path.abspath(arg_string[1:])
+            if path in active:
+                error(f"response file {arg_string[1:]!r} includes itself")
+            try:
+                args = list[str]()
+                for lines in iter_lines(path):
+                    if one_per_line:
+                        args.extend(lines)
+                    else:
+                        for line in lines:
+                            args.extend(convert_arg_line(line))
+            except OSError as err:
+                error(str(err))
+                raise
+            if not any(arg and arg[0] in prefix_chars for arg in args):
+                expanded.extend(args)
+                continue
+            active.add(path)
+            stack.append((iter(args), path))
+            break
+        else:
+            stack.pop()
+            if current is not None:
+                active.discard(current)
+    return expanded
+
+class ResponseFileLines(Sequence[str]):
+    """The lines of a response file, decoded on access.
+
+    Only the offsets of the lines are kept, in one `array('Q')`, and the
+    text stays in the memory-mapped file until `close()`, or the end of a
+    `with` block. Pickling produces a plain list.
+    """
+
+    __slots__ = ('path', 'fingerprint', '_mmap', '_offsets', '_encoding', '_errors')
+
+    def __init__(self, path: 'str | os.PathLike[str]'):
+        self.path = os.fspath(path)
+        self._encoding, self._errors = _encoding()
+        self.fingerprint = file_fingerprint(self.path)
+        self._mmap = _open_mmap(self.path)
+        # start of every line, then the end of the last one
+        self._offsets = array('Q', [0])
+        if self._mmap is None:
+            return
+        try:
+            for lines in _iter_line_blocks(self._mmap):
+                base = self._offsets[-1]
+                self._offsets.extend(accumulate((len(line) + 1 for line in lines), initial=base))
+                del self._offsets[-len(lines) - 1]
+        except BaseException:
+            self.close()
+            raise
+
+    def is_current(self) -> bool:
+        """Whether the file still has the mtime and size it was read with."""
+        return self.fingerprint is not None and file_fingerprint(self.path) == self.fingerprint
+
+    @property
+    def closed(self) -> bool:
+        return self._mmap is not None and self._mmap.closed
+
+    def close(self):
+        """Unmaps the file; the lines cannot be read afterwards."""
+        if self._mmap is not None:
+            self._mmap.close()
+
+    def __enter__(self) -> 'ResponseFileLines':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def _line(self, i: int) -> str:
+        mm = self._mmap
+        start, end = self._offsets[i], self._offsets[i + 1] - 1
+        if end > start and mm[end - 1] == 0x0d: # type: ignore
+            end -= 1
+        return mm[start:end].decode(self._encoding, self._errors) # type: ignore
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+    @overload
+    def __getitem__(self, index: slice) -> list[str]: ...
+    def __getitem__(self, index: int | slice) -> str | list[str]:
+        if isinstance(index, slice):
+            return [self._line(i) for i in range(*index.indices(len(self)))]
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError('response file line index out of range')
+        return self._line(index)
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self._line(i)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ResponseFileLines | list | tuple):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None # type: ignore
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({self.path!r}, lines={len(self)})'
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
+def response_file(path: str) -> ResponseFileLines:
+    try:
+        return ResponseFileLines(path)
+    except OSError as e:
+        # reported as a usage error of the argument, like `argparse.FileType`
+        raise argparse.ArgumentTypeError(f"can't open '{path}': {e}")
+
+class ResponseFile:
+    """`Annotated` metadata for a `list[str]` field read from a response file.
+
+    The field takes a single path and its value is a `ResponseFileLines`,
+    so tens of thousands of values neither pass through argv nor become
+    intermediate lists.
+
+    Examples:
+        ```python
+            @namespace
+            class Index:
+                paths: Annotated[list[str], ResponseFile()] = []
+        ```
+
+        `--paths files.txt` reads one path per line from `files.txt`.
+    """
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}()'
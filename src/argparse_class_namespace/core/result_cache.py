@@ -0,0 +1,126 @@
+import _thread
+from array import array
+from collections import OrderedDict
+from enum import Enum
+from types import FunctionType, BuiltinFunctionType, MethodType
+from typing import NamedTuple, Mapping, Hashable
+
+from .base_wrapper import BaseWrapper
+from .response_file import ResponseFileLines
+
+class ResultCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: int
+    currsize: int
+
+# values that are never modified in place and are handed out as they are
+_SCALAR_TYPES = frozenset((type(None), bool, int, float, complex, str, bytes))
+
+def _copy(value: object) -> object:
+    t = type(value)
+    if t is list:
+        return [v if type(v) in _SCALAR_TYPES else _copy(v) for v in value] # type: ignore
+    if t is dict:
+        return {k: _copy(v) for k, v in value.items()} # type: ignore
+    if t is set:
+        # only sets of immutable elements are cached
+        return set(value) # type: ignore
+    if t is bytearray or t is array:
+        return value[:] # type: ignore
+    return value
+
+def _is_immutable(value: object) -> bool:
+    t = type(value)
+    if t in _SCALAR_TYPES:
+        return True
+    if t is tuple or t is frozenset:
+        return all(map(_is_immutable, value)) # type: ignore
+    return isinstance(value, Enum)
+
+def _is_cacheable(value: object) -> bool:
+    # only values known to be immutable or known to be copied by `_copy`
+    # are cached; wrappers and callbacks are stored for their identity
+    if _is_immutable(value):
+        return True
+    t = type(value)
+    if t is bytearray or t is array:
+        return True
+    if t is list:
+        return all(map(_is_cacheable, value)) # type: ignore
+    if t is set:
+        return all(map(_is_immutable, value)) # type: ignore
+    if t is dict:
+        return all(map(_is_immutable, value)) and all(map(_is_cacheable, value.values())) # type: ignore
+    return isinstance(value, ResponseFileLines | BaseWrapper | FunctionType | BuiltinFunctionType | MethodType)
+
+class ResultCache:
+    """A size-bounded LRU mapping from a parse key to the parsed values.
+
+    Only the flat values argparse produced are stored, and only when each
+    is of a type known to be immutable (scalars, enums, and tuples and
+    frozensets of those) or a list, dict, set, bytearray or array of such
+    values. Every hit copies those containers again, so results handed out
+    can be modified without touching the cache. Wrappers and callbacks are
+    kept as they are. Values of any other type are not cached, even
+    hashable ones.
+
+    Entries with response file values are dropped once one of those files
+    changes, since the key only holds their paths. The cache may be shared
+    by threads parsing at the same time.
+    """
+
+    __slots__ = ('maxsize', '_entries', '_hits', '_misses', '_evictions', '_lock')
+
+    def __init__(self, maxsize: int):
+        if maxsize <= 0:
+            raise ValueError(f"maxsize must be positive, got {maxsize}")
+        self.maxsize = maxsize
+        # key -> (values, response files the values were read from)
+        self._entries = OrderedDict[Hashable, tuple[dict[str, object], tuple[ResponseFileLines, ...]]]()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = _thread.allocate_lock()
+
+    def get(self, key: Hashable) -> dict[str, object] | None:
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is not None and not all(
+                not lines.closed and lines.is_current() for lines in entry[1]
+            ):
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            values = entry[0]
+            self._entries.move_to_end(key)
+            self._hits += 1
+        return {dest: _copy(value) for dest, value in values.items()}
+
+    def put(self, key: Hashable, values: Mapping[str, object]):
+        if not all(map(_is_cacheable, values.values())):
+            return
+        entry = (
+            {dest: _copy(value) for dest, value in values.items()},
+            tuple(value for value in values.values() if isinstance(value, ResponseFileLines))
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def info(self) -> ResultCacheInfo:
+        with self._lock:
+            return ResultCacheInfo(
+                self._hits, self._misses, self._evictions,
+                self.maxsize, len(self._entries)
+            )
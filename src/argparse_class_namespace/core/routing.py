@@ -0,0 +1,109 @@
+from typing import TYPE_CHECKING, Mapping
+from itertools import chain
+
+if TYPE_CHECKING:
+    from .namespace_wrapper import NamespaceWrapper
+
+_MISSING = object()
+
+class RoutingTable:
+    """How parsed values of one selected namespace become user objects.
+
+    Compiled once per wrapper: every dest is mapped to its target slot
+    (0 for the namespace itself, 1.. for its groups) together with the
+    fallback default used when argparse did not set it, and the chain of
+    parent namespaces is resolved up front.
+    """
+
+    __slots__ = ('ns_type', 'groups', 'fields', 'parents')
+
+    def __init__(
+        self,
+        ns_type: type,
+        groups: list[tuple[str, type]],
+        fields: list[tuple[str, int, object]],
+        parents: list[tuple[str, type]]
+        ):
+        self.ns_type = ns_type
+        self.groups = groups
+        self.fields = fields
+        self.parents = parents
+
+    def materialize(self, values: Mapping[str, object]) -> object:
+        ns = self.ns_type()
+        targets = [ns]
+        for gname, gtype in self.groups:
+            gns = gtype()
+            setattr(ns, gname, gns)
+            targets.append(gns)
+
+        for dest, slot, fallback in self.fields:
+            value = values.get(dest, _MISSING)
+            if value is not _MISSING:
+                setattr(targets[slot], dest, value)
+            elif fallback is not _MISSING:
+                setattr(targets[slot], dest, fallback)
+
+        for bindname, parent_type in self.parents:
+            parent = parent_type()
+            setattr(parent, bindname, ns)
+            ns = parent
+
+        return ns
+
+def _is_subcommand_attrname(wrapper: 'NamespaceWrapper', attrname: str) -> bool:
+    subparsers = wrapper.subparsers
+    if not subparsers:
+        return False
+    return (
+        any(
+            attrname.replace('_', pc) in subparsers.choices
+            for pc in wrapper.parser.prefix_chars
+        )
+        or attrname in subparsers.choices
+    )
+
+def compile_routing_table(wrapper: 'NamespaceWrapper', is_root: bool) -> RoutingTable:
+    """Compiles the table for `wrapper` selected by argv.
+
+    `is_root` tells whether `wrapper` is the namespace `parse_args` was
+    called on, whose subcommand attributes are left to the subcommands.
+    """
+
+    groups = list[tuple[str, type]]()
+    attrname_to_slot = dict[str, int]()
+    for slot, (agname, agwrapper) in enumerate(wrapper._argument_groups.items(), start=1):
+        groups.append((agname, agwrapper.result_type))
+        attrname_to_slot.update(
+            (attrname, slot)
+            for attrname in agwrapper.attrnames
+        )
+
+    fields = list[tuple[str, int, object]]()
+    seen = set[str]()
+    for attrname in chain(
+        attrname_to_slot.keys(),
+        wrapper.attrnames,
+        wrapper.default_keys):
+
+        if attrname in seen:
+            continue
+        seen.add(attrname)
+        if is_root and _is_subcommand_attrname(wrapper, attrname):
+            continue
+        fallback = wrapper.container.get_default(attrname)
+        fields.append((
+            attrname,
+            attrname_to_slot.get(attrname, 0),
+            fallback if fallback else _MISSING
+        ))
+
+    parents = list[tuple[str, type]]()
+    bindname = wrapper._bindname
+    current = wrapper
+    while bindname is not None and current._parent is not None:
+        current = current._parent
+        parents.append((bindname, current.result_type))
+        bindname = current.container.get_default('_namespace_wrapper_bind_name')
+
+    return RoutingTable(wrapper.result_type, groups, fields, parents)
@@ -0,0 +1,88 @@
+from typing import TYPE_CHECKING
+
+from . import pickling
+
+if TYPE_CHECKING:
+    from .base_wrapper import BaseWrapper
+
+_COPIED_KINDS = (staticmethod, classmethod, property)
+
+def _copied_members(ns_type: type, fieldnames: tuple[str, ...]) -> dict[str, object]:
+    # methods and properties of the user's class keep working on the slotted
+    # sibling; dunders are replaced by the generated ones below
+    members = dict[str, object]()
+    for klass in reversed(ns_type.__mro__[:-1]):
+        for name, value in vars(klass).items():
+            if name.startswith('__') and name.endswith('__') or name in fieldnames:
+                continue
+            if callable(value) and not isinstance(value, type) or isinstance(value, _COPIED_KINDS):
+                members[name] = value
+    return members
+
+def _rebuild(module_name: str, qualname: str, state: dict[str, object]):
+    wrapper = pickling.resolve(module_name, qualname)
+    result_type = wrapper.result_type # type: ignore
+    obj = result_type.__new__(result_type)
+    for name, value in state.items():
+        setattr(obj, name, value)
+    return obj
+
+def make_slotted_type(wrapper: 'BaseWrapper', fieldnames: tuple[str, ...]) -> type:
+    """Generates a `__slots__` sibling of the wrapped class.
+
+    Instances have no per-instance `__dict__`. Fields that were not set fall
+    back to the class defaults of the wrapped class, and unselected
+    subcommands read as None, like on the wrapped class itself.
+    """
+
+    from .base_wrapper import BaseWrapper
+
+    ns_type = wrapper._ns_co_type
+    field_set = frozenset(fieldnames)
+
+    def _set_items(self) -> list[tuple[str, object]]:
+        items = []
+        for name in fieldnames:
+            try:
+                items.append((name, object.__getattribute__(self, name)))
+            except AttributeError:
+                pass
+        return items
+
+    def __getattr__(self, name: str):
+        if name not in field_set:
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'"
+            )
+        value = getattr(ns_type, name)
+        if isinstance(value, BaseWrapper):
+            return None
+        return value
+
+    def __eq__(self, other: object):
+        if type(other) is not type(self):
+            return NotImplemented
+        return _set_items(self) == _set_items(other)
+
+    def __repr__(self):
+        return (
+            f'{ns_type.__name__}('
+            + ', '.join(f'{name}={value!r}' for name, value in _set_items(self))
+            + ')'
+        )
+
+    def __reduce__(self):
+        return (_rebuild, (ns_type.__module__, ns_type.__qualname__, dict(_set_items(self))))
+
+    return type(ns_type.__name__, (), {
+        **_copied_members(ns_type, fieldnames),
+        '__slots__': fieldnames,
+        '__module__': ns_type.__module__,
+        '__qualname__': ns_type.__qualname__,
+        '__doc__': ns_type.__doc__,
+        '__getattr__': __getattr__,
+        '__eq__': __eq__,
+        '__hash__': None,
+        '__repr__': __repr__,
+        '__reduce__': __reduce__,
+    })
@@ -0,0 +1,144 @@
+import os
+import sys
+from typing import TYPE_CHECKING, TypedDict
+
+from . import disk_cache
+from .fields import source_modules
+
+if TYPE_CHECKING:
+    from .base_wrapper import BaseWrapper, AddArgumentKwargs
+
+_SNAPSHOT_VERSION = 3
+
+class WrapperRecipe(TypedDict):
+    attrnames: list[str]
+    docstrings: dict[str, str]
+    arguments: dict[str, tuple[list[str], 'AddArgumentKwargs']]
+
+class _ModuleEntry(TypedDict):
+    path: str
+    fingerprint: tuple[int, int]
+    # qualname -> (pickled recipe, fingerprints of the other modules its fields come from)
+    recipes: dict[str, tuple[bytes, dict[str, tuple[int, int]]]]
+
+# module name -> qualname -> pickled recipe, only for modules whose
+# fingerprint matched when the snapshot was loaded
+_pending = dict[str, dict[str, bytes]]()
+
+def _snapshot_header() -> tuple[int, tuple[int, int]]:
+    return (_SNAPSHOT_VERSION, sys.version_info[:2])
+
+def lookup_recipe(ns_type: type) -> WrapperRecipe | None:
+    recipes = _pending.get(ns_type.__module__, None)
+    if not recipes:
+        return None
+    data = recipes.pop(ns_type.__qualname__, None)
+    if data is None:
+        return None
+    import pickle
+    try:
+        recipe = pickle.loads(data)
+    except Exception:
+        return None
+    if not isinstance(recipe, dict):
+        return None
+    return recipe
+
+def load_snapshot(path: 'str | os.PathLike[str]') -> bool:
+    """Loads a snapshot written by `save_snapshot`.
+
+    Call this before the modules defining the namespace classes are
+    imported (or before lazy namespaces are built). Classes whose module,
+    or the module of a base they take fields from, changed since the
+    snapshot was written are built from scratch, and any unreadable or
+    mismatching file is ignored.
+
+    Returns:
+        out (`bool`): Whether the snapshot was usable for at least one module.
+    """
+
+    import pickle
+    try:
+        with open(path, 'rb') as f:
+            header, modules = pickle.load(f)
+    except Exception:
+        return False
+    if header != _snapshot_header() or not isinstance(modules, dict):
+        return False
+
+    loaded = False
+    for module_name, entry in modules.items():
+        if disk_cache.file_fingerprint(entry['path']) != tuple(entry['fingerprint']):
+            continue
+        recipes = _pending.setdefault(module_name, {})
+        for qualname, (data, bases) in entry['recipes'].items():
+            if all(
+                disk_cache.file_fingerprint(base_path) == tuple(fingerprint)
+                for base_path, fingerprint in bases.items()
+            ):
+                recipes[qualname] = data
+        loaded = True
+    return loaded
+
+def _iter_wrappers(wrapper: 'BaseWrapper'):
+    yield wrapper
+    for child in (*wrapper._argument_groups.values(), *wrapper._subnamespaces.values()):
+        yield from _iter_wrappers(child)
+
+def _base_fingerprints(ns_type: type) -> dict[str, tuple[int, int]] | None:
+    # the other modules `ns_type` takes fields from, or None when one of
+    # them cannot be checked
+    bases = dict[str, tuple[int, int]]()
+    for module_name in source_modules(ns_type)[1:]:
+        path = disk_cache.module_file(module_name)
+        fingerprint = None if path is None else disk_cache.file_fingerprint(path)
+        if path is None or fingerprint is None:
+            return None
+        bases[path] = fingerprint
+    return bases
+
+def save_snapshot(wrapper: 'BaseWrapper', path: 'str | os.PathLike[str]') -> bool:
+    """Builds the whole tree below `wrapper` and writes it to `path`.
+
+    Classes whose prepared arguments cannot be pickled (for example
+    defaults of local types) are left out and built normally on restore.
+
+    Returns:
+        out (`bool`): Whether the snapshot file was written.
+    """
+
+    import pickle
+
+    if hasattr(wrapper, 'materialize'):
+        wrapper.materialize()
+
+    modules = dict[str, _ModuleEntry]()
+    for w in _iter_wrappers(wrapper):
+        ns_type = w._ns_co_type
+        source_path = disk_cache.module_file(ns_type.__module__)
+        if source_path is None:
+            continue
+        fingerprint = disk_cache.file_fingerprint(source_path)
+        if fingerprint is None:
+            continue
+        bases = _base_fingerprints(ns_type)
+        if bases is None:
+            continue
+        try:
+            data = pickle.dumps(w._recipe(), protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            continue
+        entry = modules.setdefault(ns_type.__module__, _ModuleEntry(
+            path=source_path,
+            fingerprint=fingerprint,
+            recipes={}
+        ))
+        entry['recipes'][ns_type.__qualname__] = (data, bases)
+
+    return disk_cache.write_atomic(
+        os.fspath(path),
+        pickle.dumps((_snapshot_header(), modules), protocol=pickle.HIGHEST_PROTOCOL)
+    )
+
+def clear_snapshot() -> None:
+    _pending.clear()
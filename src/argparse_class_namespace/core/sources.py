@@ -0,0 +1,253 @@
+import os
+import argparse
+from array import array
+from typing import TYPE_CHECKING, Mapping, Sequence
+
+from .disk_cache import file_fingerprint, cache_path, write_atomic
+from .compact import CompactListAction
+
+if TYPE_CHECKING:
+    from .base_wrapper import BaseWrapper
+    from .namespace_wrapper import NamespaceWrapper
+
+_LAYER_ATTR = '_namespace_wrapper_source_layer'
+
+_TRUE_STRINGS = frozenset(('1', 'true', 'yes', 'on'))
+_FALSE_STRINGS = frozenset(('0', 'false', 'no', 'off', ''))
+
+# abspath -> (fingerprint, parsed data)
+_parsed_files = dict[str, tuple[tuple[int, int], Mapping[str, object]]]()
+
+def _decode(path: str) -> object:
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.toml':
+        import tomllib
+        with open(path, 'rb') as f:
+            return tomllib.load(f)
+    if ext == '.json':
+        import json
+        with open(path, 'rb') as f:
+            return json.load(f)
+    raise ValueError(f"Unsupported config file type: {path} (expected .toml or .json)")
+
+def _read_persisted(path: str, fingerprint: tuple[int, int]) -> Mapping[str, object] | None:
+    persisted = cache_path('configs', path, '.pickle')
+    if persisted is None:
+        return None
+    import pickle
+    try:
+        with open(persisted, 'rb') as f:
+            cached_fingerprint, data = pickle.load(f)
+    except Exception:
+        return None
+    if tuple(cached_fingerprint) != fingerprint or not isinstance(data, Mapping):
+        return None
+    return data
+
+def _write_persisted(path: str, fingerprint: tuple[int, int], data: Mapping[str, object]):
+    persisted = cache_path('configs', path, '.pickle')
+    if persisted is None:
+        return
+    import pickle
+    write_atomic(persisted, pickle.dumps((fingerprint, data), pickle.HIGHEST_PROTOCOL))
+
+def load_config_file(path: 'str | os.PathLike[str]') -> Mapping[str, object] | None:
+    """Returns the parsed contents of a TOML or JSON config file, or None if it does not exist.
+
+    Parsed files are kept for the lifetime of the process and reused while
+    their mtime and size are unchanged. When a cache directory is set (see
+    `set_cache_dir`), they are also stored there, so other processes
+    reading the same file skip decoding it. The returned mapping is shared
+    and must not be modified.
+    """
+
+    path = os.path.abspath(os.fspath(path))
+    fingerprint = file_fingerprint(path)
+    if fingerprint is None:
+        _parsed_files.pop(path, None)
+        return None
+
+    cached = _parsed_files.get(path, None)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+
+    data = _read_persisted(path, fingerprint)
+    if data is None:
+        decoded = _decode(path)
+        if not isinstance(decoded, Mapping):
+            raise ValueError(f"Config file {path} must contain a table at the top level")
+        data = decoded
+        _write_persisted(path, fingerprint, data)
+
+    _parsed_files[path] = (fingerprint, data)
+    return data
+
+def clear_config_cache():
+    _parsed_files.clear()
+
+def _parse_bool(value: str) -> bool:
+    lowered = value.strip().lower()
+    if lowered in _TRUE_STRINGS:
+        return True
+    if lowered in _FALSE_STRINGS:
+        return False
+    raise ValueError(f"{value!r} is not a boolean")
+
+def _convert(action: argparse.Action, value: object) -> object:
+    if isinstance(action, argparse._StoreTrueAction | argparse._StoreFalseAction):
+        return _parse_bool(value) if isinstance(value, str) else bool(value)
+
+    convert = action.type if callable(action.type) else None
+    if action.nargs in ('*', '+') or isinstance(action.nargs, int):
+        if isinstance(value, str):
+            import shlex
+            items = shlex.split(value)
+        elif isinstance(value, list | tuple):
+            items = list(value)
+        else:
+            items = [value]
+        if isinstance(action, CompactListAction):
+            return action.convert(items)
+        return [
+            convert(item) if convert is not None and isinstance(item, str) else item
+            for item in items
+        ]
+    if convert is not None and isinstance(value, str):
+        return convert(value)
+    return value
+
+def _lookup(datas: Sequence[Mapping[str, object]], key: str) -> tuple[bool, object]:
+    for data in reversed(datas):
+        if key in data:
+            return True, data[key]
+    return False, None
+
+def _descend(datas: Sequence[Mapping[str, object]], key: str) -> tuple[Mapping[str, object], ...]:
+    return tuple(
+        child for child in (data.get(key, None) for data in datas)
+        if isinstance(child, Mapping)
+    )
+
+class SourceLayer:
+    """Values from config files and the environment for one namespace.
+
+    Keys of a config table are attribute names; groups and subcommands are
+    nested tables. Environment variables are named `<env_prefix>` followed
+    by the upper-cased attribute path joined with `__`, e.g. `APP_STEPS`,
+    `APP_IO__PATH` or `APP_FIT__STEPS` for the prefix `APP_`. Later config
+    files override earlier ones and the environment overrides them all.
+
+    Values are placed on the namespace before argparse parses argv, so
+    anything given on the command line wins. Positional arguments are
+    always taken from argv.
+    """
+
+    __slots__ = ('wrapper', 'datas', 'env_prefix', 'path')
+
+    def __init__(
+        self,
+        wrapper: 'NamespaceWrapper',
+        datas: tuple[Mapping[str, object], ...],
+        env_prefix: str | None,
+        path: tuple[str, ...]
+        ):
+        self.wrapper = wrapper
+        self.datas = datas
+        self.env_prefix = env_prefix
+        self.path = path
+
+    def _env_name(self, path: tuple[str, ...]) -> str:
+        return f"{self.env_prefix}{'__'.join(path).upper()}"
+
+    def _collect(
+        self,
+        wrapper: 'BaseWrapper',
+        datas: tuple[Mapping[str, object], ...],
+        path: tuple[str, ...],
+        actions: Mapping[str, argparse.Action],
+        values: dict[str, object]
+        ):
+
+        for attrname in wrapper.attrnames:
+            if attrname in wrapper._subnamespaces:
+                continue
+            group = wrapper._argument_groups.get(attrname, None)
+            if group is not None:
+                self._collect(group, _descend(datas, attrname), (*path, attrname), actions, values)
+                continue
+
+            action = actions.get(attrname, None)
+            if action is None or not action.option_strings:
+                continue
+
+            source = None
+            found, value = _lookup(datas, attrname)
+            if found:
+                source = f"config key '{'.'.join((*path, attrname))}'"
+            if self.env_prefix is not None:
+                env_name = self._env_name((*path, attrname))
+                env_value = os.environ.get(env_name, None)
+                if env_value is not None:
+                    found, value, source = True, env_value, f"environment variable {env_name}"
+            if not found:
+                continue
+
+            try:
+                values[attrname] = _convert(action, value)
+            except (TypeError, ValueError, argparse.ArgumentError) as e:
+                self.wrapper.parser.error(f"invalid value {value!r} from {source}: {e}")
+
+    def values(self) -> dict[str, object]:
+        actions = {action.dest: action for action in self.wrapper.parser._actions}
+        values = dict[str, object]()
+        self._collect(self.wrapper, self.datas, self.path, actions, values)
+        return values
+
+    def child(self, command: str) -> 'SourceLayer | None':
+        from .namespace_wrapper import NamespaceWrapper
+        for attrname, subnamespace in self.wrapper._subnamespaces.items():
+            if attrname.replace('_', '-') == command and isinstance(subnamespace, NamespaceWrapper):
+                return SourceLayer(
+                    subnamespace,
+                    _descend(self.datas, attrname),
+                    self.env_prefix,
+                    (*self.path, attrname)
+                )
+        return None
+
+    def seed(self, namespace: argparse.Namespace):
+        """Sets the layered values on `namespace` before argv is parsed into it."""
+        for dest, value in self.values().items():
+            # parsed files are shared, results must not alias them
+            setattr(namespace, dest, value[:] if isinstance(value, list | array) else value)
+        setattr(namespace, _LAYER_ATTR, self)
+
+def root_layer(wrapper: 'NamespaceWrapper') -> SourceLayer | None:
+    files = wrapper._options.get('config_files', None) or ()
+    env_prefix = wrapper._options.get('env_prefix', None)
+    if not files and env_prefix is None:
+        return None
+    datas = tuple(
+        data for data in map(load_config_file, files)
+        if data is not None
+    )
+    return SourceLayer(wrapper, datas, env_prefix, ())
+
+def selected_layer(namespace: argparse.Namespace, command: str) -> SourceLayer | None:
+    """The layer of subcommand `command`, when its parent namespace has one."""
+    layer = getattr(namespace, _LAYER_ATTR, None)
+    if not isinstance(layer, SourceLayer):
+        return None
+    return layer.child(command)
+
+def source_fingerprint(wrapper: 'NamespaceWrapper') -> tuple[object, ...]:
+    """What the layered values of `wrapper` depend on, for result caching."""
+    files = wrapper._options.get('config_files', None) or ()
+    env_prefix = wrapper._options.get('env_prefix', None)
+    return (
+        tuple(file_fingerprint(os.path.abspath(os.fspath(path))) for path in files),
+        None if env_prefix is None else tuple(sorted(
+            item for item in os.environ.items()
+            if item[0].startswith(env_prefix)
+        )),
+    )
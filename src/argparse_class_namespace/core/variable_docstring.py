@@ -1,9 +1,19 @@
-import ast
-import inspect
 import itertools
-import textwrap
+from typing import TYPE_CHECKING
 
-def _get_tree_from_class(cls: type) -> ast.Module:
+from . import disk_cache
+
+if TYPE_CHECKING:
+    import ast
+
+# `ast`, `inspect` and `textwrap` are imported only when docstrings are
+# actually extracted, so cached or lazy startups do not pay for them.
+
+def _get_tree_from_class(cls: type) -> 'ast.Module':
+
+    import ast
+    import inspect
+    import textwrap
 
     try:
         source = inspect.getsource(cls)
@@ -22,7 +32,9 @@ def _get_tree_from_class(cls: type) -> ast.Module:
 
     return tree
 
-def _get_var_name_from_assign(assign: ast.Assign) -> str | None:
+def _get_var_name_from_assign(assign: 'ast.Assign') -> str | None:
+
+    import ast
 
     if len(assign.targets) != 1:
         return None
@@ -34,14 +46,18 @@ def _get_var_name_from_assign(assign: ast.Assign) -> str | None:
 
     return target.id
 
-def _get_var_name_from_annassign(assign: ast.AnnAssign) -> str | None:
+def _get_var_name_from_annassign(assign: 'ast.AnnAssign') -> str | None:
+
+    import ast
 
     if not isinstance(assign.target, ast.Name):
         return None
 
     return assign.target.id
 
-def _get_str_const_expr(expr: ast.Expr) -> str | None:
+def _get_str_const_expr(expr: 'ast.Expr') -> str | None:
+
+    import ast
 
     if not isinstance(expr.value, ast.Constant):
         return None
@@ -69,6 +85,8 @@ def get_variable_docstrings(cls: type) -> dict[str, str]:
 
     tree = _get_tree_from_class(cls)
 
+    import ast
+
     if len(tree.body) != 1:
         raise RuntimeError(
             f"Expected a single class definition in {cls.__name__}, "
@@ -91,4 +109,74 @@ def get_variable_docstrings(cls: type) -> dict[str, str]:
             or isinstance(assign, ast.AnnAssign) and (target_name := _get_var_name_from_annassign(assign)) is not None
         )
         and isinstance(expr, ast.Expr) and (docstring := _get_str_const_expr(expr)) is not None
-    }
\ No newline at end of file
+    }
+
+class _DocstringCacheFile:
+
+    def __init__(self, source_path: str, fingerprint: tuple[int, int] | None):
+        self.source_path = source_path
+        self.fingerprint = fingerprint
+        self.classes: dict[str, dict[str, str]] = {}
+        self.dirty = False
+
+        cache_path = disk_cache.cache_path('docstrings', source_path)
+        if cache_path is None or fingerprint is None:
+            return
+        data = disk_cache.read_json(cache_path)
+        if (
+            isinstance(data, dict)
+            and data.get('source') == source_path
+            and data.get('fingerprint') == list(fingerprint)
+            and isinstance(data.get('classes'), dict)
+        ):
+            self.classes = data['classes']
+
+    def flush(self):
+        if not self.dirty or self.fingerprint is None:
+            return
+        cache_path = disk_cache.cache_path('docstrings', self.source_path)
+        if cache_path is None:
+            return
+        if disk_cache.write_json(cache_path, {
+            'source': self.source_path,
+            'fingerprint': list(self.fingerprint),
+            'classes': self.classes,
+        }):
+            self.dirty = False
+
+_docstring_cache_files: dict[str, _DocstringCacheFile] = {}
+
+def _flush_docstring_cache_files():
+    for cache_file in _docstring_cache_files.values():
+        cache_file.flush()
+
+def get_cached_variable_docstrings(cls: type) -> dict[str, str]:
+    """Same as `get_variable_docstrings`, but backed by the persistent cache.
+
+    Entries are keyed by the source file path, its mtime and size, and the
+    class qualname. The cache is only used when a cache directory is
+    configured (see `disk_cache.set_cache_dir`).
+    """
+
+    if disk_cache.get_cache_dir() is None:
+        return get_variable_docstrings(cls)
+
+    source_path = disk_cache.module_file(cls.__module__)
+    if source_path is None:
+        return get_variable_docstrings(cls)
+
+    cache_file = _docstring_cache_files.get(source_path, None)
+    fingerprint = disk_cache.file_fingerprint(source_path)
+    if cache_file is None or cache_file.fingerprint != fingerprint:
+        if not _docstring_cache_files:
+            disk_cache.register_flush(_flush_docstring_cache_files)
+        cache_file = _docstring_cache_files[source_path] = _DocstringCacheFile(
+            source_path, fingerprint
+        )
+
+    docstrings = cache_file.classes.get(cls.__qualname__, None)
+    if docstrings is None:
+        docstrings = cache_file.classes[cls.__qualname__] = get_variable_docstrings(cls)
+        cache_file.dirty = True
+
+    return dict(docstrings)
@@ -149,3 +149,1120 @@ def test_namespace_group():
     )
 
 
+
+def test_variable_docstring_cache(tmp_path, monkeypatch):
+
+    from argparse_class_namespace import set_cache_dir
+    from argparse_class_namespace.core import disk_cache, variable_docstring
+
+    class CachedDocstrings:
+        cached_var: int = 0
+        """This docstring comes from the cache."""
+
+    set_cache_dir(tmp_path)
+    try:
+        first = variable_docstring.get_cached_variable_docstrings(CachedDocstrings)
+        disk_cache.flush()
+        variable_docstring._docstring_cache_files.clear()
+
+        def _fail(cls):
+            raise AssertionError("source should not be parsed on a warm start")
+        monkeypatch.setattr(variable_docstring, 'get_variable_docstrings', _fail)
+        second = variable_docstring.get_cached_variable_docstrings(CachedDocstrings)
+    finally:
+        set_cache_dir(None)
+        variable_docstring._docstring_cache_files.clear()
+
+    assert first == second == {'cached_var': "This docstring comes from the cache."}
+
+def test_lazy_namespace():
+
+    from argparse_class_namespace import namespace
+
+    lazy_namespace = namespace(lazy=True)
+
+    @lazy_namespace
+    class Train:
+        epochs: int = 1
+        """Number of epochs."""
+
+    @lazy_namespace
+    class Evaluate:
+        split: str = 'test'
+
+    @namespace
+    class LazyRoot:
+        train = Train
+        """Train a model."""
+        evaluate = Evaluate
+        """Evaluate a model."""
+
+    assert not Train._built and not Evaluate._built
+
+    ns = LazyRoot.parse_args(['train', '--epochs', '3'])
+
+    assert ns.train and ns.train.epochs == 3
+    assert Train._built and not Evaluate._built
+
+    LazyRoot.materialize()
+    assert Evaluate._built
+    ns = LazyRoot.parse_args(['evaluate', '--split', 'val'])
+    assert ns.evaluate and ns.evaluate.split == 'val'
+
+def test_snapshot_restore(tmp_path, monkeypatch):
+
+    import sys
+    import importlib
+    from argparse_class_namespace import save_snapshot, load_snapshot
+    from argparse_class_namespace.core import base_wrapper, fields, snapshot
+
+    (tmp_path / 'snapshot_cli.py').write_text(
+        "from typing import Literal\n"
+        "from argparse_class_namespace import namespace\n"
+        "@namespace\n"
+        "class Run:\n"
+        "    mode: Literal['fast', 'slow'] | int = 'fast'\n"
+        "    \"\"\"Run mode.\"\"\"\n"
+        "@namespace\n"
+        "class Cli:\n"
+        "    run = Run\n"
+        "    \"\"\"Run something.\"\"\"\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    module = importlib.import_module('snapshot_cli')
+    assert save_snapshot(module.Cli, tmp_path / 'cli.snapshot')
+    # a bare file name is written to the working directory
+    monkeypatch.chdir(tmp_path)
+    assert save_snapshot(module.Cli, 'relative.snapshot')
+    assert (tmp_path / 'relative.snapshot').is_file()
+    del sys.modules['snapshot_cli']
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("snapshot should have been used")
+    monkeypatch.setattr(base_wrapper.BaseWrapper, '_prepare_arg', _fail)
+    monkeypatch.setattr(fields, 'get_cached_variable_docstrings', _fail)
+
+    try:
+        assert load_snapshot(tmp_path / 'cli.snapshot')
+        module = importlib.import_module('snapshot_cli')
+    finally:
+        snapshot.clear_snapshot()
+        sys.modules.pop('snapshot_cli', None)
+
+    ns = module.Cli.parse_args(['run', '--mode', '3'])
+    assert ns.run and ns.run.mode == 3
+    assert module.Cli.subparsers._choices_actions[0].help == "Run something."
+
+def test_base_module_changes(tmp_path, monkeypatch):
+
+    import os
+    import sys
+    import importlib
+    from argparse_class_namespace import save_snapshot, load_snapshot, generate_parser_module
+    from argparse_class_namespace.core import snapshot, help_cache
+
+    base = tmp_path / 'common_base.py'
+    base.write_text(
+        "class Logging:\n"
+        "    log_level: str = 'info'\n"
+    )
+    (tmp_path / 'base_app.py').write_text(
+        "from argparse_class_namespace import namespace\n"
+        "from common_base import Logging\n"
+        "@namespace\n"
+        "class App(Logging):\n"
+        "    name: str = 'app'\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    App = importlib.import_module('base_app').App
+    assert str(base) in help_cache._tree_modules(App)
+    assert save_snapshot(App, tmp_path / 'app.snapshot')
+    generate_parser_module(App, tmp_path / 'base_app_fast.py')
+    fast = importlib.import_module('base_app_fast')
+
+    # same size, so only the mtime tells the edit apart
+    base.write_text(
+        "class Logging:\n"
+        "    log_level: str = 'warn'\n"
+    )
+    os.utime(base, ns=(0, 1))
+    for name in ('base_app', 'common_base'):
+        del sys.modules[name]
+
+    assert not fast._is_fresh()
+    try:
+        assert load_snapshot(tmp_path / 'app.snapshot')
+        App = importlib.import_module('base_app').App
+    finally:
+        snapshot.clear_snapshot()
+        for name in ('base_app', 'common_base', 'base_app_fast'):
+            sys.modules.pop(name, None)
+    assert App.parse_args([]).log_level == 'warn'
+
+def test_field_completers(tmp_path):
+
+    from typing import Annotated
+    from argparse_class_namespace import namespace, Completer, cached_completer
+
+    calls = []
+
+    @cached_completer(ttl=60, directory=str(tmp_path))
+    def list_datasets(**kwargs):
+        calls.append(kwargs['prefix'])
+        return ['mnist', 'cifar10']
+
+    def list_runs(**kwargs):
+        return ['run-1']
+
+    @namespace
+    class CompletedNamespace:
+        __completers__ = {'run_id': list_runs}
+        dataset: Annotated[str, Completer(list_datasets)] = 'mnist'
+        run_id: str = ''
+
+    ns = CompletedNamespace.parse_args(['--dataset', 'cifar10'])
+    assert ns.dataset == 'cifar10'
+
+    actions = {a.dest: a for a in CompletedNamespace.parser._actions}
+    assert actions['run_id'].completer is list_runs
+
+    completer = actions['dataset'].completer
+    assert completer(prefix='m') == ['mnist', 'cifar10']
+    assert completer(prefix='c') == ['mnist', 'cifar10']
+    assert calls == ['m']
+
+def test_import_time_budget():
+
+    import os
+    import sys
+    import subprocess
+
+    # sum of the package's own module import times, in microseconds; about
+    # 14 ms were measured, the rest is headroom for a loaded machine
+    budget_us = 25_000
+    lazily_imported = {'argcomplete', 'ast', 'inspect', 'textwrap', 'pickle', 'json'} | {
+        f'argparse_class_namespace.core.{name}' for name in (
+            'codegen', 'batch', 'dispatch', 'daemon', 'snapshot', 'fingerprint',
+            'result_cache', 'sources', 'completion', 'response_file'
+        )
+    }
+
+    env = {k: v for k, v in os.environ.items() if k != '_ARGCOMPLETE'}
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import argparse_class_namespace'],
+        capture_output=True, text=True, env=env, check=True
+    )
+
+    imported = dict[str, int]()
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        imported[name.strip()] = int(self_us)
+
+    assert not lazily_imported & imported.keys(), lazily_imported & imported.keys()
+    own_us = sum(
+        us for name, us in imported.items()
+        if name.split('.')[0] == 'argparse_class_namespace'
+    )
+    assert own_us < budget_us, f"import took {own_us} us, budget is {budget_us} us"
+
+def test_parse_many(tmp_path, monkeypatch):
+
+    import importlib
+
+    (tmp_path / 'batch_cli.py').write_text(
+        "from argparse_class_namespace import namespace\n"
+        "@namespace\n"
+        "class Job:\n"
+        "    shard: int\n"
+        "    name: str = 'job'\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    Job = importlib.import_module('batch_cli').Job
+
+    argvs = [['1'], ['two'], ['3', '--name', 'last']]
+
+    for options in ({}, {'processes': 2, 'chunksize': 1}):
+        outcomes = list(Job.parse_many(iter(argvs), **options))
+
+        assert [o.index for o in outcomes] == [0, 1, 2]
+        assert [o.ok for o in outcomes] == [True, False, True]
+        assert isinstance(outcomes[1].error, SystemExit)
+        assert "'two'" in outcomes[1].message
+        assert outcomes[2].result.shard == 3 and outcomes[2].result.name == 'last'
+
+def test_compiled_converters():
+
+    from typing import Literal
+    from argparse_class_namespace import namespace
+
+    @namespace
+    class First:
+        mode: Literal['a', 'b'] | int = 'a'
+        ids: list[int] = []
+
+    @namespace
+    class Second:
+        other_mode: Literal['a', 'b'] | int = 'b'
+
+    first = {a.dest: a for a in First.parser._actions}
+    second = {a.dest: a for a in Second.parser._actions}
+
+    assert first['ids'].type is int
+    assert first['mode'].type is second['other_mode'].type
+
+    convert = first['mode'].type
+    assert convert('b') == 'b' and convert('7') == 7
+    try:
+        convert('z')
+    except ValueError:
+        pass
+    else:
+        assert False, "'z' should be rejected"
+
+def test_postponed_annotations(tmp_path, monkeypatch):
+
+    import importlib
+
+    (tmp_path / 'postponed_cli.py').write_text(
+        "from __future__ import annotations\n"
+        "from typing import Literal\n"
+        "from argparse_class_namespace import namespace, group\n"
+        "@namespace\n"
+        "class Postponed:\n"
+        "    count: int\n"
+        "    level: Literal['debug', 'info'] | int = 'info'\n"
+        "    ids: list[int] = []\n"
+        "    verbose: bool = False\n"
+        "def make_local():\n"
+        "    from pathlib import Path\n"
+        "    @namespace\n"
+        "    class Local:\n"
+        "        out: Path = Path('.')\n"
+        "    return Local\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    module = importlib.import_module('postponed_cli')
+    Postponed = module.Postponed
+
+    ns = Postponed.parse_args(['3', '--level', '2', '--ids', '4', '5', '--verbose'])
+
+    assert ns.count == 3 and ns.level == 2 and ns.ids == [4, 5] and ns.verbose is True
+
+    # `Path` is local to the function, so the annotation cannot be resolved
+    import pytest
+    with pytest.raises(NameError, match=r"'Path' of .*Local\.out"):
+        module.make_local()
+
+def test_routing_table_defaults():
+
+    from argparse_class_namespace import namespace, group
+
+    @namespace
+    class Sub:
+        level: int = 1
+
+    @namespace
+    class Routed:
+        name: str = 'routed'
+        sub = Sub
+
+        @group
+        class opts:
+            retries: int = 3
+
+    @Sub.callback
+    def run(ns):
+        return ns.level
+
+    ns = Routed.parse_args(['sub', '--level', '2'])
+    assert ns.sub and ns.sub.level == 2 and ns.sub.run(ns.sub) == 2
+
+    ns = Routed.parse_args(['--name', 'x', '--retries', '5'])
+    assert ns.name == 'x' and ns.opts.retries == 5 and ns.sub is None
+
+def test_slotted_results(tmp_path, monkeypatch):
+
+    import pickle
+    import importlib
+
+    (tmp_path / 'slotted_cli.py').write_text(
+        "from argparse_class_namespace import namespace, group\n"
+        "slotted = namespace(slots=True)\n"
+        "@slotted\n"
+        "class Fit:\n"
+        "    steps: int = 10\n"
+        "@slotted\n"
+        "class Config:\n"
+        "    name: str = 'config'\n"
+        "    fit = Fit\n"
+        "    @group(slots=True)\n"
+        "    class io:\n"
+        "        path: str = '.'\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    Config = importlib.import_module('slotted_cli').Config
+
+    ns = Config.parse_args(['fit', '--steps', '3'])
+
+    assert not hasattr(ns, '__dict__') and not hasattr(ns.fit, '__dict__')
+    assert ns.name == 'config' and ns.io is None
+    assert ns.fit.steps == 3
+    assert repr(ns.fit) == 'Fit(steps=3)'
+
+    restored = pickle.loads(pickle.dumps(ns))
+    assert restored == ns and restored.fit == ns.fit
+
+    ns = Config.parse_args(['--path', '/data'])
+    assert not hasattr(ns.io, '__dict__') and ns.io.path == '/data' and ns.fit is None
+    assert pickle.loads(pickle.dumps(ns)) == ns
+
+def test_layered_sources(tmp_path, monkeypatch):
+
+    from argparse_class_namespace import namespace, group
+    from argparse_class_namespace.core import sources
+
+    config = tmp_path / 'app.toml'
+    config.write_text(
+        "name = 'from-file'\n"
+        "verbose = true\n"
+        "[io]\n"
+        "path = '/file'\n"
+        "[fit]\n"
+        "steps = 5\n"
+        "layers = [1, 2]\n"
+    )
+
+    @namespace
+    class Fit:
+        steps: int = 10
+        layers: list[int] = []
+
+    @namespace(config_files=[config, tmp_path / 'missing.json'], env_prefix='APP_')
+    class App:
+        name: str = 'default'
+        verbose: bool = False
+        fit = Fit
+
+        @group
+        class io:
+            path: str = '.'
+
+    monkeypatch.setenv('APP_IO__PATH', '/env')
+    monkeypatch.setenv('APP_FIT__LAYERS', '3 4')
+
+    ns = App.parse_args(['--name', 'argv'])
+    assert ns.name == 'argv' and ns.verbose is True and ns.io.path == '/env'
+
+    ns = App.parse_args(['fit', '--steps', '7'])
+    assert ns.fit.steps == 7 and ns.fit.layers == [3, 4]
+
+    monkeypatch.delenv('APP_FIT__LAYERS')
+    ns = App.parse_args(['fit'])
+    assert ns.fit.steps == 5 and ns.fit.layers == [1, 2]
+
+    # parsed once, shared by later parses, reloaded when the file changes
+    cached = sources.load_config_file(config)
+    assert sources.load_config_file(config) is cached
+    config.write_text("name = 'changed'\n")
+    assert App.parse_args([]).name == 'changed'
+
+def test_result_cache():
+
+    from argparse_class_namespace import namespace
+
+    @namespace(result_cache=2)
+    class Cached:
+        name: str = 'cached'
+        tags: list[str] = []
+
+    first = Cached.parse_args(['--tags', 'a', 'b'])
+    first.tags.append('mutated')
+    second = Cached.parse_args(['--tags', 'a', 'b'])
+    assert second is not first and second.tags == ['a', 'b']
+
+    Cached.parse_args(['--name', 'x'])
+    Cached.parse_args(['--name', 'y'])
+    info = Cached.result_cache_info()
+    assert (info.hits, info.misses, info.evictions, info.maxsize, info.currsize) == (1, 3, 1, 2, 2)
+
+    @Cached.callback
+    def run(ns):
+        return ns.name
+
+    assert Cached.result_cache_info().currsize == 0
+    assert Cached.parse_args(['--name', 'y']).run is run
+
+    @namespace(result_cache=4)
+    class Mutable:
+        env: dict[str, str] = {}
+        seen: set[str] = set()
+        nested: list[list[int]] = []
+
+    Mutable.set_defaults(env={'a': '1'}, seen={'x'}, nested=[[1]])
+    Mutable.parse_args([])
+    first = Mutable.parse_args([])
+    first.env['b'] = '2'
+    first.seen.add('y')
+    first.nested[0].append(2)
+    second = Mutable.parse_args([])
+    assert (second.env, second.seen, second.nested) == ({'a': '1'}, {'x'}, [[1]])
+    assert Mutable.result_cache_info().hits == 2
+
+    import enum
+
+    class Color(enum.Enum):
+        RED = 'red'
+
+    @namespace(result_cache=4)
+    class Immutable:
+        color: str = Color.RED # type: ignore
+        point: str = (1, ('a', b'b')) # type: ignore
+        keys: str = frozenset({1, 2}) # type: ignore
+
+    Immutable.parse_args([])
+    assert Immutable.parse_args([]).point == (1, ('a', b'b'))
+    assert Immutable.result_cache_info().hits == 1
+
+    class Opaque:
+        pass
+
+    @namespace(result_cache=4)
+    class Uncacheable:
+        opaque: str = Opaque() # type: ignore
+        holder: str = ([],) # type: ignore
+
+    Uncacheable.parse_args([])
+    Uncacheable.set_defaults(opaque='plain')
+    Uncacheable.parse_args([])
+    # values of unknown types are not cached, even hashable ones, and
+    # neither are immutable containers of mutable values
+    assert Uncacheable.result_cache_info().currsize == 0
+
+def test_daemon(tmp_path):
+
+    import io
+    import os
+    import sys
+    import time
+    import subprocess
+    from argparse_class_namespace.core import daemon
+
+    (tmp_path / 'daemon_cli.py').write_text(
+        "import os\n"
+        "from argparse_class_namespace import namespace\n"
+        "@namespace\n"
+        "class Greet:\n"
+        "    name: str = 'world'\n"
+        "@namespace\n"
+        "class Tool:\n"
+        "    greet = Greet\n"
+        "@Greet.callback\n"
+        "def run(ns):\n"
+        "    print(f\"hello {ns.name} from {os.getcwd()} {os.environ.get('GREETING_MARK')}\")\n"
+        "    return 3\n"
+    )
+    path = str(tmp_path / 'tool.sock')
+    server = subprocess.Popen(
+        [sys.executable, '-c', f'import daemon_cli; daemon_cli.Tool.serve({path!r})'],
+        cwd=tmp_path, env={**os.environ, 'PYTHONPATH': str(tmp_path)}
+    )
+    try:
+        deadline = time.monotonic() + 10
+        while not os.path.exists(path):
+            assert server.poll() is None and time.monotonic() < deadline
+            time.sleep(0.01)
+
+        out, err = io.StringIO(), io.StringIO()
+        code = daemon.request(
+            path, ['greet', '--name', 'daemon'],
+            cwd='/', env={'GREETING_MARK': '!'}, stdout=out, stderr=err
+        )
+        assert code == 3 and out.getvalue() == 'hello daemon from / !\n'
+
+        out, err = io.StringIO(), io.StringIO()
+        code = daemon.request(path, ['greet', '--bogus'], stdout=out, stderr=err)
+        assert code == 2 and 'unrecognized arguments: --bogus' in err.getvalue()
+    finally:
+        server.terminate()
+        server.wait(10)
+
+def test_run_callbacks():
+
+    import asyncio
+    import threading
+    from argparse_class_namespace import namespace
+
+    @namespace
+    class Fetch:
+        url: str = 'http://localhost'
+
+    @namespace
+    class Show:
+        verbose: bool = False
+
+    @namespace
+    class Cli:
+        fetch = Fetch
+        show = Show
+
+    @Fetch.callback
+    async def fetch(ns):
+        await asyncio.sleep(0)
+        return f'fetched {ns.url}'
+
+    @Show.callback
+    def show(ns):
+        return ns.verbose
+
+    assert Cli.run(['show', '--verbose']) is True
+    assert Cli.run(['fetch', '--url', 'x']) == 'fetched x'
+    assert asyncio.run(Cli.run_async(['fetch'])) == 'fetched http://localhost'
+
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever)
+    thread.start()
+    try:
+        assert Cli.run(['fetch', '--url', 'y'], loop=loop) == 'fetched y'
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+def test_dispatch(tmp_path, monkeypatch):
+
+    import importlib
+
+    (tmp_path / 'dispatch_cli.py').write_text(
+        "import os\n"
+        "import asyncio\n"
+        "from argparse_class_namespace import namespace\n"
+        "@namespace\n"
+        "class Shard:\n"
+        "    index: int = 0\n"
+        "    label: str = 'shard'\n"
+        "@namespace\n"
+        "class Job:\n"
+        "    shard = Shard\n"
+        "@Shard.callback\n"
+        "async def process(ns):\n"
+        "    await asyncio.sleep(0)\n"
+        "    if ns.index == 3:\n"
+        "        raise ValueError('bad shard')\n"
+        "    return (ns.label, ns.index * 10, os.getpid())\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    Job = importlib.import_module('dispatch_cli').Job
+
+    argvs = [['shard', '--index', str(i)] for i in range(6)] + [['shard', '--index', 'x']]
+    for executor in ('thread', 'async', 'process'):
+        outcomes = sorted(
+            Job.dispatch(iter(argvs), executor=executor, workers=2, max_pending=3),
+            key=lambda outcome: outcome.index
+        )
+        assert [o.index for o in outcomes] == list(range(7))
+        assert [o.result[:2] for o in outcomes if o.ok] == [('shard', i * 10) for i in (0, 1, 2, 4, 5)]
+        assert isinstance(outcomes[3].error, ValueError)
+        assert isinstance(outcomes[6].error, SystemExit) and "invalid int value: 'x'" in outcomes[6].message
+
+def test_phase_profiler(tmp_path):
+
+    import json
+    from argparse_class_namespace import namespace
+    from argparse_class_namespace.core import profiler
+
+    profiler.enable_profiling()
+    try:
+        @namespace
+        class Profiled:
+            name: str = 'profiled'
+            count: int = 1
+
+        Profiled.parse_args(['--count', '2'])
+    finally:
+        profiler.disable_profiling()
+
+    report = profiler.profile_report()
+    for phase in ('decorate', 'build', 'docstrings', 'prepare_arg', 'parse', 'materialize'):
+        assert any(
+            line.startswith(phase + ' ') and 'Profiled' in line
+            for line in report.splitlines()
+        ), phase
+
+    trace = tmp_path / 'trace.json'
+    profiler.write_trace(trace)
+    events = json.loads(trace.read_text())['traceEvents']
+    assert {'ph', 'ts', 'dur', 'args'} <= events[0].keys()
+    profiler.reset_profile()
+
+def test_cached_help(tmp_path, monkeypatch, capsys):
+
+    import sys
+    import pytest
+    import importlib
+    from argparse_class_namespace import set_cache_dir
+    from argparse_class_namespace.core import help_cache
+
+    (tmp_path / 'help_cli.py').write_text(
+        "from argparse_class_namespace import namespace\n"
+        "@namespace(lazy=True)\n"
+        "class Train:\n"
+        "    epochs: int = 1\n"
+        "    '''Number of epochs.'''\n"
+        "@namespace\n"
+        "class Cli:\n"
+        "    train = Train\n"
+        "    '''Train a model.'''\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setenv('COLUMNS', '100')
+    set_cache_dir(tmp_path / 'cache')
+    try:
+        Cli = importlib.import_module('help_cli').Cli
+
+        with pytest.raises(SystemExit):
+            Cli.parse_args(['train', '-h'])
+        first = capsys.readouterr().out
+        assert 'Number of epochs.' in first
+
+        # rendered once per parser until the tree changes
+        train_parser = Cli.subparsers.choices['train']
+        assert help_cache.render_help(train_parser) is help_cache.render_help(train_parser)
+        Cli.T.train.set_defaults(extra=1)
+        assert help_cache.render_help(train_parser) == first
+
+        # a fresh process prints the persisted help without building `train`
+        del sys.modules['help_cli']
+        Cli = importlib.import_module('help_cli').Cli
+        with pytest.raises(SystemExit):
+            Cli.parse_args(['train', '--help'])
+        assert capsys.readouterr().out == first
+        assert not Cli.T.train._built
+    finally:
+        set_cache_dir(None)
+
+def test_indexed_option_lookup(capsys):
+
+    import pytest
+    from argparse_class_namespace import namespace
+
+    def make(indexed: bool):
+        @namespace(indexed=indexed)
+        class Wide:
+            verbose: bool = False
+            value_a: int = 0
+            value_b: int = 0
+            value_total: int = 0
+            name: str = ''
+        Wide.parser.add_argument('-n', dest='count', type=int)
+        return Wide
+
+    plain, indexed = make(False), make(True)
+    assert type(indexed.parser).__name__ == 'IndexedArgumentParser'
+
+    for token in ('--verb', '--value-t', '--value-t=3', '--na=x', '-n5', '--nope', '-x', '--value-'):
+        assert (
+            [t[1:] for t in indexed.parser._get_option_tuples(token)]
+            == [t[1:] for t in plain.parser._get_option_tuples(token)]
+        ), token
+
+    argv = ['--verb', '--value-t', '4', '--na=x', '-n5']
+    assert vars(indexed.parse_args(argv)) == vars(plain.parse_args(argv))
+
+    messages = []
+    for wrapper in (plain, indexed):
+        with pytest.raises(SystemExit):
+            wrapper.parse_args(['--value', '1'])
+        messages.append(capsys.readouterr().err)
+    assert messages[0] == messages[1] and 'could match --value-a, --value-b, --value-total' in messages[0]
+
+def test_response_files(tmp_path, capsys):
+
+    import pickle
+    from typing import Annotated
+    from argparse_class_namespace import namespace, ResponseFile
+
+    @namespace(response_file_prefix_chars='@')
+    class Job:
+        name: str = 'job'
+        inputs: list[str] = []
+        manifest: Annotated[list[str], ResponseFile()] = []
+
+    (tmp_path / 'nested.txt').write_text('--name\nnested\n')
+    (tmp_path / 'args.txt').write_text(
+        '--inputs\r\na b.txt\r\n\r\nc.txt\n@' + str(tmp_path / 'nested.txt') + '\n'
+    )
+    paths = [f'/data/file-{i}.bin' for i in range(20000)]
+    (tmp_path / 'manifest.txt').write_text('\n'.join(paths))
+
+    ns = Job.parse_args([
+        '@' + str(tmp_path / 'args.txt'),
+        '--manifest', str(tmp_path / 'manifest.txt'),
+    ])
+    assert ns.inputs == ['a b.txt', '', 'c.txt'] and ns.name == 'nested'
+    assert len(ns.manifest) == 20000 and ns.manifest[-1] == paths[-1]
+    assert ns.manifest[5:7] == paths[5:7] and ns.manifest == paths
+    assert pickle.loads(pickle.dumps(ns.manifest)) == paths
+    with ns.manifest as manifest:
+        assert manifest[0] == paths[0]
+
+    import os
+    import pytest
+
+    # a missing file is a usage error of the argument
+    with pytest.raises(SystemExit):
+        Job.parse_args(['--manifest', str(tmp_path / 'missing.txt')])
+    assert "can't open" in capsys.readouterr().err
+
+    # cached results are not reused once the file they read changed
+    @namespace(result_cache=4)
+    class Cached:
+        manifest: Annotated[list[str], ResponseFile()] = []
+
+    listing = tmp_path / 'listing.txt'
+    listing.write_text('a\nb\n')
+    assert list(Cached.parse_args(['--manifest', str(listing)]).manifest) == ['a', 'b']
+    assert list(Cached.parse_args(['--manifest', str(listing)]).manifest) == ['a', 'b']
+    listing.write_text('c\n')
+    os.utime(listing, ns=(0, 1))
+    assert list(Cached.parse_args(['--manifest', str(listing)]).manifest) == ['c']
+    with Cached.parse_args(['--manifest', str(listing)]).manifest:
+        pass
+    assert list(Cached.parse_args(['--manifest', str(listing)]).manifest) == ['c']
+    info = Cached.result_cache_info()
+    assert (info.hits, info.misses) == (2, 3)
+
+    # batches expand response files and use the cache like single parses
+    outcomes = list(Job.parse_many([['@' + str(tmp_path / 'args.txt')], ['@missing.txt']]))
+    assert outcomes[0].ok and outcomes[0].result.inputs == ['a b.txt', '', 'c.txt']
+    assert outcomes[0].result.name == 'nested'
+    assert not outcomes[1].ok and 'missing.txt' in outcomes[1].message
+    assert [outcome.ok for outcome in Cached.parse_many([['--manifest', str(listing)]] * 2)] == [True, True]
+    assert Cached.result_cache_info().hits == 4
+
+def test_compact_list(capsys):
+
+    import pytest
+    from array import array
+    from typing import Annotated
+    from argparse_class_namespace import namespace, CompactList
+
+    @namespace
+    class Select:
+        ids: Annotated[list[int], CompactList()] = []
+        weights: Annotated[list[float], CompactList('f')] = []
+
+    ns = Select.parse_args(['--ids', *map(str, range(1000)), '--weights', '0.5', '2'])
+    assert isinstance(ns.ids, array) and ns.ids.typecode == 'q'
+    assert list(ns.ids) == list(range(1000))
+    assert memoryview(ns.ids).format == 'q'
+    assert ns.weights == array('f', [0.5, 2.0])
+
+    with pytest.raises(SystemExit):
+        Select.parse_args(['--ids', '1', 'x'])
+    assert "argument --ids: invalid int value: 'x'" in capsys.readouterr().err
+
+    with pytest.raises(TypeError):
+        @namespace
+        class Mixed:
+            values: Annotated[list[int | str], CompactList()] = []
+        Mixed.parse_args([])
+
+def test_frozen_and_fingerprint():
+
+    import pytest
+    from argparse_class_namespace import namespace, group
+
+    @group
+    class Optim:
+        lr: float = 0.1
+
+    @namespace
+    class Train:
+        epochs: int = 1
+        tags: list[str] = []
+
+    @namespace
+    class Cli:
+        name: str = 'run'
+        optim = Optim
+        train = Train
+
+    a = Cli.parse_args(['--name', 'x', '--lr', '0.5'])
+    b = Cli.parse_args(['--name', 'x', '--lr', '0.5'])
+    view = Cli.frozen(a)
+    assert view.name == 'x' and view.optim.lr == 0.5 and view.train is None
+    assert view == Cli.frozen(b) and {view: 1}[Cli.frozen(b)] == 1
+    with pytest.raises(AttributeError):
+        view.name = 'y' # type: ignore
+
+    assert Cli.fingerprint(a) == Cli.fingerprint(b)
+    assert Cli.fingerprint(a) != Cli.fingerprint(Cli.parse_args(['--name', 'x']))
+
+    c = Cli.parse_args(['train', '--tags', 'a', 'b'])
+    assert Cli.frozen(c).train.tags == ('a', 'b')
+    c.train.tags.append('c') # type: ignore
+    assert Cli.fingerprint(c) != Cli.fingerprint(Cli.parse_args(['train', '--tags', 'a', 'b']))
+
+    with pytest.raises(TypeError):
+        Cli.fingerprint(object()) # type: ignore
+
+    # bytearrays are frozen and hashed as bytes alike
+    d = Cli.parse_args([])
+    d.name = bytearray(b'ab') # type: ignore
+    e = Cli.parse_args([])
+    e.name = b'ab' # type: ignore
+    assert Cli.frozen(d).name == b'ab' and Cli.frozen(d) == Cli.frozen(e)
+    assert Cli.fingerprint(d) == Cli.fingerprint(e)
+
+    # callbacks are defaults of the namespace, not fields
+    @Cli.callback
+    def run(ns):
+        return ns.name
+
+    f = Cli.parse_args(['--name', 'x', '--lr', '0.5'])
+    assert f.run is run and not hasattr(Cli.frozen(f), 'run')
+    assert Cli.frozen(f) == view and Cli.fingerprint(f) == Cli.fingerprint(a)
+
+def test_generated_parser_module(tmp_path, monkeypatch, capsys):
+
+    import os
+    import sys
+    import pickle
+    import importlib
+    import textwrap
+    import pytest
+    from argparse_class_namespace import generate_parser_module
+
+    (tmp_path / 'aot_cli.py').write_text(textwrap.dedent('''
+        from pathlib import Path
+        from typing import Annotated, Literal
+        from argparse_class_namespace import namespace, group, CompactList
+
+        @group
+        class Limits:
+            retries: int = 3
+
+        @namespace
+        class Fetch:
+            url: str
+            ids: Annotated[list[int], CompactList()] = []
+            verbose: bool = False
+
+        @namespace
+        class Cli:
+            mode: Literal['fast', 'safe'] = 'fast'
+            tags: list[str] = []
+            src: Path | None = None
+            limits = Limits
+            fetch = Fetch
+    '''))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    cli = importlib.import_module('aot_cli').Cli
+    generate_parser_module(cli, tmp_path / 'aot_cli_fast.py')
+    fast = importlib.import_module('aot_cli_fast')
+
+    def fields(obj):
+        if not hasattr(obj, '__dict__'):
+            return obj
+        return type(obj).__qualname__, {k: fields(v) for k, v in vars(obj).items()}
+
+    monkeypatch.setattr(fast, '_root_wrapper', lambda: pytest.fail('fell back'))
+    for argv in (
+        [],
+        ['--mode', 'safe', '--tags', 'a', 'b', '--retries=5'],
+        ['--src', '/tmp/a'],
+        ['fetch', 'http://h', '--ids', '1', '-2', '--verbose'],
+    ):
+        record = fast.parse_args(argv)
+        result = cli.parse_args(argv)
+        assert type(record).__qualname__ == type(result).__qualname__
+        assert fields(fast.to_result(record)) == fields(result)
+        assert fields(pickle.loads(pickle.dumps(record))) == fields(result)
+    monkeypatch.undo()
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    record = fast.parse_args(['fetch', 'http://h'])
+    assert record.fetch.url == 'http://h' and record.mode == 'fast'
+
+    # abbreviations and errors are left to argparse
+    assert type(fast.parse_args(['--mod', 'safe'])) is cli.result_type
+    with pytest.raises(SystemExit):
+        fast.parse_args(['--mode', 'slow'])
+    assert "argument --mode" in capsys.readouterr().err
+    with pytest.raises(SystemExit):
+        fast.parse_args(['fetch'])
+
+    # converters such as `pathlib.Path` are imported without the package
+    import subprocess
+    check = subprocess.run(
+        [sys.executable, '-c',
+         "import sys, aot_cli_fast\n"
+         "assert aot_cli_fast.parse_args(['--src', '/tmp/a']).src.name == 'a'\n"
+         "assert 'argparse_class_namespace' not in sys.modules\n"
+         "assert 'argparse' not in sys.modules\n"],
+        cwd=tmp_path, capture_output=True, text=True,
+    )
+    assert check.returncode == 0, check.stderr
+
+def test_threaded_parse_and_freeze():
+
+    import sys
+    import os
+    import time
+    import pytest
+    from concurrent.futures import ThreadPoolExecutor
+    from argparse_class_namespace import namespace, group
+
+    @group
+    class Optim:
+        lr: float = 0.1
+
+    @namespace(lazy=True, result_cache=8)
+    class Fetch:
+        url: str = ''
+        retries: int = 3
+
+    @namespace(lazy=True, slots=True)
+    class Train:
+        epochs: int = 1
+        optim = Optim
+
+    @namespace(lazy=True)
+    class Cli:
+        verbose: bool = False
+        fetch = Fetch
+        train = Train
+
+    argvs = [
+        ['fetch', '--url', f'u{i % 5}', '--retries', str(i % 7)] if i % 2 else
+        ['train', '--epochs', str(i), '--lr', f'0.{i % 9}']
+        for i in range(400)
+    ]
+    def parse(argv: list[str]) -> str:
+        return repr(Cli.frozen(Cli.parse_args(argv)))
+
+    # the lazy tree is built by whichever threads get there first; threads
+    # switch very often to provoke races
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(parse, argvs))
+    finally:
+        sys.setswitchinterval(interval)
+    assert results == [parse(argv) for argv in argvs]
+
+    @Cli.callback
+    def main(ns: Cli): ...
+
+    assert Cli.freeze() is Cli and Cli.is_frozen and Train.is_frozen
+    with pytest.raises(RuntimeError, match='frozen'):
+        Cli.set_defaults(verbose=True)
+    with pytest.raises(RuntimeError, match='frozen'):
+        Train.callback(lambda ns: None)
+
+    with ThreadPoolExecutor(8) as executor:
+        assert list(executor.map(parse, argvs * 5)) == results * 5
+
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', lambda: True)
+    if is_gil_enabled() or (os.cpu_count() or 1) < 4:
+        return
+    # free-threaded builds: parsing a frozen tree scales with threads
+    def run(workers: int) -> float:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(workers) as executor:
+            for _ in executor.map(lambda _: [parse(argv) for argv in argvs], range(workers)):
+                pass
+        return workers / (time.perf_counter() - start)
+    assert run(4) > 2 * run(1)
+
+def test_inherited_fields(monkeypatch):
+
+    from typing import Generic, TypeVar
+    from argparse_class_namespace import namespace
+    from argparse_class_namespace.core import base_wrapper, fields
+
+    T = TypeVar('T')
+
+    class Logging:
+        log_level: str = 'info'
+        """Log level."""
+        quiet: bool = False
+
+    class Io(Generic[T]):
+        out: str = '-'
+        """Output file."""
+
+    calls = list[tuple[str, type]]()
+    analyze = base_wrapper.BaseWrapper._analyze_field
+    def _counted(attrname, annotated, assigned, documented):
+        calls.append((attrname, (annotated or assigned).cls)) # type: ignore
+        return analyze(attrname, annotated, assigned, documented)
+    monkeypatch.setattr(base_wrapper.BaseWrapper, '_analyze_field', staticmethod(_counted))
+
+    @namespace
+    class Fetch(Logging, Io[int]):
+        url: str
+        """Where to fetch from."""
+
+    @namespace
+    class Push(Io[str], Logging):
+        log_level = 'debug'
+        out: str = 'push.out'
+
+    assert Fetch.attrnames == ['out', 'log_level', 'quiet', 'url']
+    assert Push.attrnames == ['log_level', 'quiet', 'out']
+    fetch = Fetch.parse_args(['u', '--quiet', '--out', 'o'])
+    assert (fetch.url, fetch.quiet, fetch.out, fetch.log_level) == ('u', True, 'o', 'info')
+    push = Push.parse_args([])
+    assert (push.out, push.log_level, push.quiet) == ('push.out', 'debug', False)
+
+    help_of = {
+        (parser, action.dest): action.help
+        for parser in ('fetch', 'push')
+        for action in (Fetch if parser == 'fetch' else Push).parser._actions
+    }
+    assert help_of['fetch', 'log_level'] == help_of['push', 'log_level'] == 'Log level.'
+    # a redefined field without a docstring keeps the one of its base
+    assert help_of['fetch', 'out'] == help_of['push', 'out'] == 'Output file.'
+    assert help_of['fetch', 'url'] == 'Where to fetch from.'
+
+    # fields defined once by a base are analyzed once for all subclasses;
+    # `log_level` has another default in Push and `out` is redefined
+    assert calls.count(('quiet', Logging)) == 1
+    assert calls.count(('log_level', Logging)) == 2
+    assert ('out', Io) in calls and ('out', Push.ns_type) in calls
+    assert fields.class_fields(Logging).names == ('log_level', 'quiet')
+
+    from collections.abc import Iterable
+    from typing import Protocol
+
+    class Sized(Protocol):
+        size: int = 0
+
+    # standard library bases add no fields, and neither do the names
+    # ABCMeta and Protocol set on every subclass
+    @namespace
+    class Listing(Iterable, Sized):
+        path: str = '.'
+
+        def __iter__(self):
+            return iter(())
+
+    assert Listing.attrnames == ['size', 'path']
+    assert fields.source_modules(Listing.ns_type) == [__name__]
+
+    # the tables do not keep their classes alive
+    import gc
+    import weakref
+    class Temporary(Logging):
+        extra: int = 0
+    fields.class_fields(Temporary)
+    temporary = weakref.ref(Temporary)
+    del Temporary
+    gc.collect()
+    assert temporary() is None